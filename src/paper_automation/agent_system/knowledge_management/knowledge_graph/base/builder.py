@@ -1,8 +1,10 @@
 """Knowledge Graph Builder Module
 """
 import uuid
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Set, Iterable
 import logging
+import networkx as nx
+from .graph_view import GraphView
 
 class GraphBuilder:
     """图构建器"""
@@ -12,6 +14,10 @@ class GraphBuilder:
         self.graph = {"nodes": [], "edges": []}
         self.nodes = {}  # 节点字典，用于快速查找
         self.edges = {}  # 边字典，用于快速查找
+        self.adjacency: Dict[str, Dict[str, int]] = {}  # 节点ID -> {邻居ID: 相连边数}，不区分方向
+        self.incident_edges: Dict[str, Set[str]] = {}  # 节点ID -> 关联边ID集合
+        self.version = 0  # 结构变更计数，用于判断物化视图是否过期
+        self._view: Optional[GraphView] = None
         self.valid_node_types = {"concept", "entity", "attribute"}
         self.valid_edge_types = {"includes", "uses", "related", "same_as", "subclass"}
         self.logger = logging.getLogger(__name__)
@@ -41,8 +47,16 @@ class GraphBuilder:
             if field not in node:
                 raise ValueError(f"缺少必要字段: {field}")
                 
+        if node["id"] in self.nodes:
+            # 同ID节点直接替换，保持节点列表与索引一致
+            old_node = self.nodes[node["id"]]
+            self.graph["nodes"] = [node if item is old_node else item for item in self.graph["nodes"]]
+        else:
+            self.graph["nodes"].append(node)
         self.nodes[node["id"]] = node
-        self.graph["nodes"].append(node)
+        self.adjacency.setdefault(node["id"], {})
+        self.incident_edges.setdefault(node["id"], set())
+        self.version += 1
         self.logger.info(f"添加节点: {node['id']}")
         return True
         
@@ -75,8 +89,9 @@ class GraphBuilder:
         edge_id = str(uuid.uuid4())
         edge["id"] = edge_id
         
-        self.edges[edge_id] = edge
+        self._index_edge(edge)
         self.graph["edges"].append(edge)
+        self.version += 1
         self.logger.info(f"添加边: {edge_id}")
         return True
         
@@ -94,8 +109,80 @@ class GraphBuilder:
             "nodes": nodes,
             "edges": edges
         }
+        self.nodes = {}
+        self.edges = {}
+        self.adjacency = {}
+        self.incident_edges = {}
+        for node in nodes:
+            self.nodes[node["id"]] = node
+            self.adjacency.setdefault(node["id"], {})
+            self.incident_edges.setdefault(node["id"], set())
+        for edge in edges:
+            edge.setdefault("id", str(uuid.uuid4()))
+            self._index_edge(edge)
+        self.version += 1
         return self.graph
         
+    def _index_edge(self, edge: Dict[str, Any]) -> None:
+        """将边加入ID索引和邻接索引"""
+        source, target = edge["source"], edge["target"]
+        self.edges[edge["id"]] = edge
+        self.incident_edges.setdefault(source, set()).add(edge["id"])
+        self.incident_edges.setdefault(target, set()).add(edge["id"])
+        source_adj = self.adjacency.setdefault(source, {})
+        source_adj[target] = source_adj.get(target, 0) + 1
+        if source != target:
+            target_adj = self.adjacency.setdefault(target, {})
+            target_adj[source] = target_adj.get(source, 0) + 1
+            
+    def _unindex_edge(self, edge: Dict[str, Any]) -> None:
+        """将边从ID索引和邻接索引中移除"""
+        source, target = edge["source"], edge["target"]
+        del self.edges[edge["id"]]
+        for node_id in (source, target):
+            self.incident_edges.get(node_id, set()).discard(edge["id"])
+        for node_id, other in ((source, target), (target, source)):
+            neighbors = self.adjacency.get(node_id, {})
+            if other in neighbors:
+                neighbors[other] -= 1
+                if neighbors[other] <= 0:
+                    del neighbors[other]
+            if source == target:
+                break
+                
+    def get_neighbors(self, node_id: str) -> Set[str]:
+        """获取节点的邻居ID集合（不区分方向），复杂度 O(度)"""
+        return set(self.adjacency.get(node_id, ()))
+        
+    def get_degree(self, node_id: str) -> int:
+        """获取节点的度（关联边数）"""
+        return len(self.incident_edges.get(node_id, ()))
+        
+    def get_view(self) -> GraphView:
+        """获取当前版本的物化视图，图未变更时复用上次构建的视图
+        
+        Returns:
+            GraphView: 图视图
+        """
+        if self._view is None or self._view.version != self.version:
+            self._view = GraphView(self.nodes, self.edges.values(), self.version)
+        return self._view
+        
+    def to_networkx(self, directed: bool = True) -> nx.Graph:
+        """获取当前版本的 networkx 图（只读，多次调用共享同一对象）
+        
+        Args:
+            directed: 是否为有向图
+            
+        Returns:
+            nx.Graph: networkx 图
+        """
+        return self.get_view().to_networkx(directed=directed)
+        
+    def has_edge_between(self, node1: str, node2: str) -> bool:
+        """判断两个节点之间是否存在边（不区分方向）"""
+        return node2 in self.adjacency.get(node1, {})
+        
     def get_node(self, node_id: str) -> Dict[str, Any]:
         """Get node
         
@@ -139,17 +226,30 @@ class GraphBuilder:
         """
         if node_id not in self.nodes:
             raise ValueError(f"Node not found: {node_id}")
+        self.remove_nodes([node_id])
+        
+    def remove_nodes(self, node_ids: Iterable[str]) -> None:
+        """Remove nodes and their edges, rebuilding the node/edge lists once
+        
+        Args:
+            node_ids: Node IDs, unknown IDs are ignored
+        """
+        node_ids = {node_id for node_id in node_ids if node_id in self.nodes}
+        if not node_ids:
+            return
             
-        # Remove edges related to this node
-        edges_to_remove = []
-        for edge_id, edge in self.edges.items():
-            if edge["source"] == node_id or edge["target"] == node_id:
-                edges_to_remove.append(edge_id)
-                
-        for edge_id in edges_to_remove:
-            del self.edges[edge_id]
-            
-        del self.nodes[node_id]
+        # Remove edges related to these nodes
+        edge_ids = set()
+        for node_id in node_ids:
+            edge_ids.update(self.incident_edges.get(node_id, ()))
+        self.remove_edges(edge_ids)
+        
+        for node_id in node_ids:
+            del self.nodes[node_id]
+            self.adjacency.pop(node_id, None)
+            self.incident_edges.pop(node_id, None)
+        self.graph["nodes"] = [node for node in self.graph["nodes"] if node["id"] not in node_ids]
+        self.version += 1
         
     def remove_edge(self, edge_id: str) -> None:
         """Remove edge
@@ -162,7 +262,43 @@ class GraphBuilder:
         """
         if edge_id not in self.edges:
             raise ValueError(f"Edge not found: {edge_id}")
-        del self.edges[edge_id]
+        self.remove_edges([edge_id])
+        
+    def remove_edges(self, edge_ids: Iterable[str]) -> None:
+        """Remove edges, rebuilding the edge list once
+        
+        Args:
+            edge_ids: Edge IDs, unknown IDs are ignored
+        """
+        edge_ids = {edge_id for edge_id in edge_ids if edge_id in self.edges}
+        if not edge_ids:
+            return
+        for edge_id in edge_ids:
+            self._unindex_edge(self.edges[edge_id])
+        self.graph["edges"] = [edge for edge in self.graph["edges"] if edge.get("id") not in edge_ids]
+        self.version += 1
+        
+    def reconnect_edge(self, edge_id: str, source: Optional[str] = None, target: Optional[str] = None) -> None:
+        """Move an edge to new endpoints, keeping the indexes consistent
+        
+        Args:
+            edge_id: Edge ID
+            source: New source node ID, unchanged if None
+            target: New target node ID, unchanged if None
+            
+        Raises:
+            ValueError: When edge does not exist
+        """
+        if edge_id not in self.edges:
+            raise ValueError(f"Edge not found: {edge_id}")
+        edge = self.edges[edge_id]
+        self._unindex_edge(edge)
+        if source is not None:
+            edge["source"] = source
+        if target is not None:
+            edge["target"] = target
+        self._index_edge(edge)
+        self.version += 1
         
     def update_node(self, node_id: str, properties: Dict[str, Any]) -> None:
         """Update node
@@ -0,0 +1,131 @@
+"""Knowledge Graph View Module
+
+图构建器在某一版本下的只读物化视图：节点编号、SciPy 稀疏邻接矩阵（CSR）
+以及按需构建的 networkx 图。视图及其分析结果在同一版本内被各分析方法共享，
+图发生变更后由构建器重新生成。
+"""
+
+from typing import Dict, Any, Iterable, List, Set
+import numpy as np
+import networkx as nx
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+class GraphView:
+    """图的物化视图"""
+
+    def __init__(self, nodes: Iterable[str], edges: Iterable[Dict[str, Any]], version: int):
+        """初始化视图
+
+        Args:
+            nodes: 节点ID列表
+            edges: 边列表，包含 source、target
+            version: 构建视图时图构建器的版本号
+        """
+        self.version = version
+        self.node_ids = list(nodes)
+        self.index = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        self._edges = [(edge["source"], edge["target"]) for edge in edges
+                       if edge["source"] in self.index and edge["target"] in self.index]
+        self._cache: Dict[str, Any] = {}
+
+        n = len(self.node_ids)
+        rows = np.fromiter((self.index[s] for s, _ in self._edges), dtype=np.int64, count=len(self._edges))
+        cols = np.fromiter((self.index[t] for _, t in self._edges), dtype=np.int64, count=len(self._edges))
+
+        # 有向邻接矩阵，重复边合并为一条（与 nx.DiGraph 一致）
+        directed = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(n, n))
+        directed.data[:] = 1
+        self.directed = directed
+
+        # 无向邻接矩阵，去掉自环，用于聚类系数
+        mask = rows != cols
+        both_rows = np.concatenate([rows[mask], cols[mask]])
+        both_cols = np.concatenate([cols[mask], rows[mask]])
+        undirected = sparse.csr_matrix((np.ones(len(both_rows), dtype=np.int32), (both_rows, both_cols)), shape=(n, n))
+        undirected.data[:] = 1
+        self.undirected = undirected
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self) -> int:
+        """去重后的有向边数"""
+        return int(self.directed.nnz)
+
+    def _labels_to_sets(self, labels: np.ndarray, count: int) -> List[Set[str]]:
+        components = [set() for _ in range(count)]
+        for node_id, label in zip(self.node_ids, labels):
+            components[label].add(node_id)
+        return components
+
+    def components(self, connection: str = "weak") -> List[Set[str]]:
+        """连通分量
+
+        Args:
+            connection: weak 为弱连通（等价于无向连通），strong 为强连通
+
+        Returns:
+            List[Set[str]]: 连通分量列表
+        """
+        key = f"components_{connection}"
+        if key not in self._cache:
+            if self.node_count == 0:
+                self._cache[key] = []
+            else:
+                count, labels = connected_components(self.directed, directed=True, connection=connection)
+                self._cache[key] = self._labels_to_sets(labels, count)
+        return self._cache[key]
+
+    def in_degrees(self) -> np.ndarray:
+        return np.asarray(self.directed.getnnz(axis=0))
+
+    def out_degrees(self) -> np.ndarray:
+        return np.asarray(self.directed.getnnz(axis=1))
+
+    def degree_centrality(self) -> Dict[str, Dict[str, float]]:
+        """度中心性、入度中心性和出度中心性（与 networkx 对有向图的定义一致）"""
+        if "degree_centrality" not in self._cache:
+            n = self.node_count
+            if n <= 1:
+                # 与 networkx 一致，单节点图的中心性为 1
+                single = {node_id: 1.0 for node_id in self.node_ids}
+                return {"degree": single, "in_degree": dict(single), "out_degree": dict(single)}
+            in_degrees = self.in_degrees() / (n - 1)
+            out_degrees = self.out_degrees() / (n - 1)
+            self._cache["degree_centrality"] = {
+                "degree": dict(zip(self.node_ids, (in_degrees + out_degrees).tolist())),
+                "in_degree": dict(zip(self.node_ids, in_degrees.tolist())),
+                "out_degree": dict(zip(self.node_ids, out_degrees.tolist()))
+            }
+        return self._cache["degree_centrality"]
+
+    def clustering(self) -> np.ndarray:
+        """各节点的聚类系数（无向、忽略自环和重复边）"""
+        if "clustering" not in self._cache:
+            A = self.undirected
+            degrees = np.asarray(A.getnnz(axis=1), dtype=float)
+            # (A @ A) 与 A 逐元素相乘后按行求和得到经过该节点的三角形数的两倍
+            triangles = np.asarray((A @ A).multiply(A).sum(axis=1)).ravel() / 2
+            possible = degrees * (degrees - 1) / 2
+            coefficients = np.zeros_like(degrees)
+            np.divide(triangles, possible, out=coefficients, where=possible > 0)
+            self._cache["clustering"] = coefficients
+        return self._cache["clustering"]
+
+    def average_clustering(self) -> float:
+        if self.node_count == 0:
+            return 0.0
+        return float(self.clustering().mean())
+
+    def to_networkx(self, directed: bool = True) -> nx.Graph:
+        """按需构建的 networkx 图，同一视图内复用，调用方不应修改"""
+        key = "networkx_directed" if directed else "networkx_undirected"
+        if key not in self._cache:
+            graph = nx.DiGraph() if directed else nx.Graph()
+            graph.add_nodes_from(self.node_ids)
+            graph.add_edges_from(self._edges)
+            self._cache[key] = graph
+        return self._cache[key]
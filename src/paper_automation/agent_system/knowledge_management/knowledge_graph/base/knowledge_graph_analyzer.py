@@ -30,16 +30,10 @@ class KnowledgeGraphAnalyzer:
         Raises:
             ValueError: 当节点不存在时抛出
         """
-        if not any(node["id"] == node_id for node in self.builder.graph["nodes"]):
+        if node_id not in self.builder.nodes:
             raise ValueError(f"Node not found: {node_id}")
             
-        neighbors = set()
-        for edge in self.builder.graph["edges"]:
-            if edge["source"] == node_id:
-                neighbors.add(edge["target"])
-            elif edge["target"] == node_id:
-                neighbors.add(edge["source"])
-        return list(neighbors)
+        return list(self.builder.adjacency.get(node_id, ()))
         
     def get_node_degree(self, node_id: str) -> int:
         """获取节点的度
@@ -53,14 +47,10 @@ class KnowledgeGraphAnalyzer:
         Raises:
             ValueError: 当节点不存在时抛出
         """
-        if not any(node["id"] == node_id for node in self.builder.graph["nodes"]):
+        if node_id not in self.builder.nodes:
             raise ValueError(f"Node not found: {node_id}")
             
-        degree = 0
-        for edge in self.builder.graph["edges"]:
-            if edge["source"] == node_id or edge["target"] == node_id:
-                degree += 1
-        return degree
+        return self.builder.get_degree(node_id)
         
     def find_path(self, source_id: str, target_id: str) -> List[str]:
         """查找两个节点之间的最短路径
@@ -75,27 +65,31 @@ class KnowledgeGraphAnalyzer:
         Raises:
             ValueError: 当找不到路径时抛出
         """
-        if not any(node["id"] == source_id for node in self.builder.graph["nodes"]):
+        if source_id not in self.builder.nodes:
             raise ValueError(f"Source node not found: {source_id}")
             
-        if not any(node["id"] == target_id for node in self.builder.graph["nodes"]):
+        if target_id not in self.builder.nodes:
             raise ValueError(f"Target node not found: {target_id}")
             
-        # 使用BFS查找最短路径
-        queue = deque([[source_id]])
-        visited = {source_id}
+        # 使用BFS查找最短路径，记录前驱节点而不是复制整条路径
+        adjacency = self.builder.adjacency
+        parents = {source_id: None}
+        queue = deque([source_id])
         
         while queue:
-            path = queue.popleft()
-            node = path[-1]
+            node = queue.popleft()
             
             if node == target_id:
-                return path
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = parents[node]
+                return path[::-1]
                 
-            for neighbor in self.get_node_neighbors(node):
-                if neighbor not in visited:
-                    visited.add(neighbor)
-                    queue.append(path + [neighbor])
+            for neighbor in adjacency.get(node, ()):
+                if neighbor not in parents:
+                    parents[neighbor] = node
+                    queue.append(neighbor)
                     
         raise ValueError(f"No path found between {source_id} and {target_id}")
         
@@ -105,19 +99,7 @@ class KnowledgeGraphAnalyzer:
         Returns:
             List[Set[str]]: 连通分量列表
         """
-        G = nx.Graph()
-        
-        # 添加节点
-        for node in self.builder.graph["nodes"]:
-            G.add_node(node["id"])
-            
-        # 添加边
-        for edge in self.builder.graph["edges"]:
-            G.add_edge(edge["source"], edge["target"])
-            
-        # 获取连通分量
-        components = list(nx.connected_components(G))
-        return [set(component) for component in components]
+        return [set(component) for component in self.builder.get_view().components("weak")]
         
     def get_centrality(self, node_id: str) -> float:
         """获取节点的中心性
@@ -131,10 +113,10 @@ class KnowledgeGraphAnalyzer:
         Raises:
             ValueError: 当节点不存在时抛出
         """
-        if not any(node["id"] == node_id for node in self.builder.graph["nodes"]):
+        if node_id not in self.builder.nodes:
             raise ValueError(f"Node not found: {node_id}")
             
-        node_count = len(self.builder.graph["nodes"])
+        node_count = len(self.builder.nodes)
         if node_count > 1:
             return self.get_node_degree(node_id) / (node_count - 1)
         return 0.0
@@ -151,21 +133,26 @@ class KnowledgeGraphAnalyzer:
         Raises:
             ValueError: 当节点不存在时抛出
         """
-        if not any(node["id"] == node_id for node in self.builder.graph["nodes"]):
+        if node_id not in self.builder.nodes:
             raise ValueError(f"Node not found: {node_id}")
             
-        neighbors = self.get_node_neighbors(node_id)
+        return self._clustering(node_id)
+        
+    def _clustering(self, node_id: str) -> float:
+        """基于邻接索引计算聚类系数，复杂度为邻居度数之和"""
+        adjacency = self.builder.adjacency
+        # 自环不参与聚类系数计算
+        neighbors = set(adjacency.get(node_id, ())) - {node_id}
         if len(neighbors) < 2:
             return 0.0
             
-        edge_count = 0
-        for i in range(len(neighbors)):
-            for j in range(i + 1, len(neighbors)):
-                for edge in self.builder.graph["edges"]:
-                    if (edge["source"] == neighbors[i] and edge["target"] == neighbors[j]) or \
-                       (edge["source"] == neighbors[j] and edge["target"] == neighbors[i]):
-                        edge_count += 1
-                        break
+        # 每条邻居间的边会从两端各统计一次
+        links = 0
+        for neighbor in neighbors:
+            for other in adjacency.get(neighbor, ()):
+                if other != neighbor and other in neighbors:
+                    links += 1
+        edge_count = links // 2
                         
         max_edges = len(neighbors) * (len(neighbors) - 1) / 2
         if max_edges > 0:
@@ -178,13 +165,13 @@ class KnowledgeGraphAnalyzer:
         Returns:
             float: 图的密度
         """
-        node_count = len(self.builder.graph["nodes"])
+        node_count = len(self.builder.nodes)
         if node_count < 2:
             return 0.0
             
         max_edges = node_count * (node_count - 1) / 2
         if max_edges > 0:
-            return len(self.builder.graph["edges"]) / max_edges
+            return len(self.builder.edges) / max_edges
         return 0.0
         
     def get_average_clustering(self) -> float:
@@ -193,21 +180,7 @@ class KnowledgeGraphAnalyzer:
         Returns:
             float: 图的平均聚类系数
         """
-        node_ids = [node["id"] for node in self.builder.graph["nodes"]]
-        if not node_ids:
-            return 0.0
-            
-        coefficients = []
-        for node_id in node_ids:
-            try:
-                coefficient = self.get_clustering_coefficient(node_id)
-                coefficients.append(coefficient)
-            except ValueError:
-                continue
-                
-        if coefficients:
-            return sum(coefficients) / len(coefficients)
-        return 0.0
+        return self.builder.get_view().average_clustering()
         
     def analyze_structure(self) -> Dict[str, Any]:
         """分析图的结构
@@ -216,17 +189,15 @@ class KnowledgeGraphAnalyzer:
             Dict[str, Any]: 结构分析结果
         """
         try:
-            graph = self.builder.to_networkx(directed=True)
-            
-            node_count = len(self.builder.graph["nodes"])
-            edge_count = len(self.builder.graph["edges"])
+            node_count = len(self.builder.nodes)
+            edge_count = len(self.builder.edges)
             density = self.get_graph_density()
             avg_clustering = self.get_average_clustering()
             components = len(self.get_connected_components())
             
             # 计算平均度
-            if self.builder.graph["nodes"]:
-                avg_degree = sum(self.get_node_degree(node["id"]) for node in self.builder.graph["nodes"]) / node_count
+            if node_count:
+                avg_degree = sum(self.builder.get_degree(node_id) for node_id in self.builder.nodes) / node_count
             else:
                 avg_degree = 0.0
                 
@@ -250,15 +221,16 @@ class KnowledgeGraphAnalyzer:
             Dict[str, Any]: 连通性分析结果
         """
         try:
-            graph = self.builder.to_networkx(directed=True)
+            view = self.builder.get_view()
             
-            strongly_connected = list(nx.strongly_connected_components(graph))
-            weakly_connected = list(nx.weakly_connected_components(graph))
-            density = nx.density(graph)
+            strongly_connected = [set(component) for component in view.components("strong")]
+            weakly_connected = [set(component) for component in view.components("weak")]
+            node_count = view.node_count
+            density = view.edge_count / (node_count * (node_count - 1)) if node_count > 1 else 0
             
-            # 计算平均度
-            if graph.number_of_nodes() > 0:
-                average_degree = sum(dict(graph.degree()).values()) / graph.number_of_nodes()
+            # 计算平均度（入度与出度之和）
+            if node_count > 0:
+                average_degree = 2 * view.edge_count / node_count
             else:
                 average_degree = 0
                 
@@ -280,11 +252,14 @@ class KnowledgeGraphAnalyzer:
             Dict[str, Dict[str, float]]: 中心性分析结果
         """
         try:
-            graph = self.builder.to_networkx(directed=True)
-            
-            degree_centrality = nx.degree_centrality(graph)
-            in_degree_centrality = nx.in_degree_centrality(graph)
-            out_degree_centrality = nx.out_degree_centrality(graph)
+            view = self.builder.get_view()
+            graph = view.to_networkx(directed=True)
+            
+            # 度中心性由稀疏矩阵直接计算，其余指标使用同一版本共享的 networkx 图
+            degree_centralities = view.degree_centrality()
+            degree_centrality = dict(degree_centralities["degree"])
+            in_degree_centrality = dict(degree_centralities["in_degree"])
+            out_degree_centrality = dict(degree_centralities["out_degree"])
             betweenness_centrality = nx.betweenness_centrality(graph)
             closeness_centrality = nx.closeness_centrality(graph)
             eigenvector_centrality = nx.eigenvector_centrality(graph, max_iter=1000)
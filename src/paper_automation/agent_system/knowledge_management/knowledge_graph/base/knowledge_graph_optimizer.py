@@ -1,7 +1,7 @@
 """Knowledge Graph Optimizer Module"""
 
 import networkx as nx
-from typing import Dict, Any, List, Set
+from typing import Dict, Any, List, Set, Tuple
 import logging
 
 class KnowledgeGraphOptimizer:
@@ -18,6 +18,31 @@ class KnowledgeGraphOptimizer:
         self.analyzer = analyzer
         self.logger = logging.getLogger(__name__)
         
+    @staticmethod
+    def _normalize_name(name: Any) -> str:
+        """规范化节点名称：去除首尾空白、合并连续空白并忽略大小写"""
+        if not isinstance(name, str):
+            return ""
+        return " ".join(name.split()).casefold()
+        
+    def _blocking_keys(self, node: Dict[str, Any]) -> List[Tuple[str, str, str]]:
+        """生成节点的分块键，只有分块键相同的节点才可能相似
+        
+        Args:
+            node: 节点
+            
+        Returns:
+            List[Tuple[str, str, str]]: (节点类型, 名称来源, 规范化名称) 列表
+        """
+        keys = []
+        name = self._normalize_name(node.get("name", ""))
+        if name:
+            keys.append((node["type"], "name", name))
+        property_name = self._normalize_name(node.get("properties", {}).get("name", ""))
+        if property_name:
+            keys.append((node["type"], "properties.name", property_name))
+        return keys
+        
     def _are_nodes_similar(self, node1: Dict[str, Any], node2: Dict[str, Any]) -> bool:
         """判断两个节点是否相似
         
@@ -28,23 +53,44 @@ class KnowledgeGraphOptimizer:
         Returns:
             bool: 是否相似
         """
-        # 检查节点类型
-        if node1["type"] != node2["type"]:
-            return False
-            
-        # 检查节点名称
-        name1 = node1.get("name", "")
-        name2 = node2.get("name", "")
-        if name1 and name2 and name1 == name2:
-            return True
-            
-        # 检查节点属性
-        name1 = node1["properties"].get("name", "")
-        name2 = node2["properties"].get("name", "")
-        if name1 and name2 and name1 == name2:
-            return True
+        return bool(set(self._blocking_keys(node1)) & set(self._blocking_keys(node2)))
+        
+    def find_duplicate_clusters(self) -> List[List[str]]:
+        """查找重复节点簇
+        
+        按分块键分桶，只在桶内比较，用并查集合并共享任一分块键的节点，
+        复杂度与节点数近似线性。
+        
+        Returns:
+            List[List[str]]: 重复节点簇列表，每个簇至少包含两个节点，簇内按节点顺序排列
+        """
+        parent: Dict[str, str] = {}
+        
+        def find(node_id: str) -> str:
+            root = node_id
+            while parent[root] != root:
+                root = parent[root]
+            # 路径压缩
+            while parent[node_id] != root:
+                parent[node_id], node_id = root, parent[node_id]
+            return root
             
-        return False
+        buckets: Dict[Tuple[str, str, str], str] = {}
+        for node in self.builder.graph["nodes"]:
+            node_id = node["id"]
+            parent.setdefault(node_id, node_id)
+            for key in self._blocking_keys(node):
+                if key in buckets:
+                    root1, root2 = find(buckets[key]), find(node_id)
+                    if root1 != root2:
+                        parent[root2] = root1
+                else:
+                    buckets[key] = node_id
+                    
+        clusters: Dict[str, List[str]] = {}
+        for node in self.builder.graph["nodes"]:
+            clusters.setdefault(find(node["id"]), []).append(node["id"])
+        return [members for members in clusters.values() if len(members) > 1]
         
     def merge_duplicate_nodes(self, node_ids: List[str]) -> str:
         """合并重复节点
@@ -57,48 +103,58 @@ class KnowledgeGraphOptimizer:
         """
         if not node_ids:
             return ""
+        return self.merge_duplicate_clusters([node_ids])[0]
+        
+    def merge_duplicate_clusters(self, clusters: List[List[str]]) -> List[str]:
+        """批量合并重复节点簇
+        
+        先确定每个簇的基础节点并合并属性，再通过邻接索引一次性重连
+        所有被合并节点的边，最后一次性删除被合并的节点。
+        
+        Args:
+            clusters: 重复节点簇列表
             
-        # 选择重要性最高的节点作为基础节点
-        base_node = max(
-            [self.builder.get_node(node_id) for node_id in node_ids],
-            key=lambda x: x["properties"].get("importance", 0)
-        )
-        base_node_id = base_node["id"]
+        Returns:
+            List[str]: 各簇合并后的基础节点ID
+        """
+        base_node_ids = []
+        replacements: Dict[str, str] = {}
         
-        # 合并其他节点的属性
-        for node_id in node_ids:
-            if node_id == base_node_id:
-                continue
-                
-            node = self.builder.get_node(node_id)
-            for key, value in node["properties"].items():
-                if key not in base_node["properties"]:
-                    base_node["properties"][key] = value
+        for node_ids in clusters:
+            # 选择重要性最高的节点作为基础节点
+            base_node = max(
+                [self.builder.get_node(node_id) for node_id in node_ids],
+                key=lambda x: x["properties"].get("importance", 0)
+            )
+            base_node_id = base_node["id"]
+            base_node_ids.append(base_node_id)
+            
+            # 合并其他节点的属性
+            for node_id in node_ids:
+                if node_id == base_node_id:
+                    continue
                     
-        # 更新边的连接
-        for node_id in node_ids:
-            if node_id == base_node_id:
-                continue
+                node = self.builder.get_node(node_id)
+                for key, value in node["properties"].items():
+                    if key not in base_node["properties"]:
+                        base_node["properties"][key] = value
+                replacements[node_id] = base_node_id
                 
-            # 获取与当前节点相连的边
-            edges_to_update = []
-            for edge in self.builder.graph["edges"]:
-                if edge["source"] == node_id:
-                    edges_to_update.append((edge, "source"))
-                elif edge["target"] == node_id:
-                    edges_to_update.append((edge, "target"))
-                    
-            # 更新边的连接
-            for edge, direction in edges_to_update:
-                if direction == "source":
-                    edge["source"] = base_node_id
-                else:
-                    edge["target"] = base_node_id
-                    
-            # 删除原节点
-            self.builder.remove_node(node_id)
+        # 一次遍历被合并节点的关联边，更新边的连接
+        edge_ids = set()
+        for node_id in replacements:
+            edge_ids.update(self.builder.incident_edges.get(node_id, ()))
+        for edge_id in edge_ids:
+            edge = self.builder.edges[edge_id]
+            self.builder.reconnect_edge(
+                edge_id,
+                source=replacements.get(edge["source"]),
+                target=replacements.get(edge["target"])
+            )
             
-        return base_node_id
+        # 删除原节点
+        self.builder.remove_nodes(replacements)
+        return base_node_ids
         
     def prune_weak_connections(self, threshold: float = 0.3) -> List[Dict[str, Any]]:
         """剪枝弱连接
@@ -110,16 +166,13 @@ class KnowledgeGraphOptimizer:
             List[Dict[str, Any]]: 被删除的边列表
         """
         removed_edges = []
-        edges_to_remove = []
         
         for edge in self.builder.graph["edges"]:
             weight = edge["properties"].get("weight", 0)
             if weight < threshold:
-                edges_to_remove.append(edge)
+                removed_edges.append(edge)
                 
-        for edge in edges_to_remove:
-            self.builder.graph["edges"].remove(edge)
-            removed_edges.append(edge)
+        self.builder.remove_edges(edge["id"] for edge in removed_edges)
             
         return removed_edges
         
@@ -131,25 +184,14 @@ class KnowledgeGraphOptimizer:
         """
         try:
             # 合并重复节点
-            merged_nodes = []
-            nodes_to_merge = {}
-            
-            for node1 in self.builder.graph["nodes"]:
-                if node1["id"] in nodes_to_merge:
-                    continue
-                    
-                similar_nodes = []
-                for node2 in self.builder.graph["nodes"]:
-                    if node2["id"] in nodes_to_merge:
-                        continue
-                        
-                    if self._are_nodes_similar(node1, node2):
-                        similar_nodes.append(node2["id"])
-                        nodes_to_merge[node2["id"]] = True
-                        
-                if len(similar_nodes) > 1:
-                    base_node_id = self.merge_duplicate_nodes(similar_nodes)
-                    merged_nodes.extend([node_id for node_id in similar_nodes if node_id != base_node_id])
+            clusters = self.find_duplicate_clusters()
+            base_node_ids = self.merge_duplicate_clusters(clusters)
+            merged_nodes = [
+                node_id
+                for node_ids, base_node_id in zip(clusters, base_node_ids)
+                for node_id in node_ids if node_id != base_node_id
+            ]
+            self.logger.info(f"合并重复节点: {len(clusters)} 个簇, {len(merged_nodes)} 个节点")
                     
             self.logger.info(f"After merging nodes: {[(node['id'], node['name']) for node in self.builder.graph['nodes']]}")
             self.logger.info(f"After merging edges: {[(edge['source'], edge['target'], edge['type'], edge['properties'].get('weight', 0)) for edge in self.builder.graph['edges']]}")
@@ -184,10 +226,11 @@ class KnowledgeGraphOptimizer:
                     
                     # 删除其他边
                     for edge in type_edges:
-                        if edge != best_edge:
-                            self.builder.graph["edges"].remove(edge)
+                        if edge is not best_edge:
                             removed_edges.append(edge)
                             
+            self.builder.remove_edges(edge["id"] for edge in removed_edges)
+                            
             self.logger.info(f"After removing redundant edges: {[(edge['source'], edge['target'], edge['type'], edge['properties'].get('weight', 0)) for edge in self.builder.graph['edges']]}")
             
             # 剪枝弱连接
@@ -207,19 +250,16 @@ class KnowledgeGraphOptimizer:
                                 edges.sort(key=lambda x: x["properties"].get("weight", 0))
                                 edges_to_remove.append(edges[0])
                                 
-            for edge in edges_to_remove:
-                if edge in self.builder.graph["edges"]:
-                    self.builder.graph["edges"].remove(edge)
-                    removed_edges.append(edge)
+            transitive_edges = {edge["id"]: edge for edge in edges_to_remove if edge["id"] in self.builder.edges}
+            self.builder.remove_edges(transitive_edges)
+            removed_edges.extend(transitive_edges.values())
                     
             self.logger.info(f"After removing transitive edges: {[(edge['source'], edge['target'], edge['type'], edge['properties'].get('weight', 0)) for edge in self.builder.graph['edges']]}")
             
             # 删除孤立节点
-            isolated_nodes = []
-            for node in self.builder.graph["nodes"]:
-                if not any(edge["source"] == node["id"] or edge["target"] == node["id"] for edge in self.builder.graph["edges"]):
-                    self.builder.graph["nodes"].remove(node)
-                    isolated_nodes.append(node["id"])
+            isolated_nodes = [node["id"] for node in self.builder.graph["nodes"]
+                              if not self.builder.incident_edges.get(node["id"])]
+            self.builder.remove_nodes(isolated_nodes)
                     
             self.logger.info(f"After removing isolated nodes: {[(node['id'], node['name']) for node in self.builder.graph['nodes']]}")
             self.logger.info(f"Final edges: {[(edge['source'], edge['target'], edge['type'], edge['properties'].get('weight', 0)) for edge in self.builder.graph['edges']]}")
@@ -1,131 +1,315 @@
 """文献分类器模块
+
+分类关键词由可配置的分类体系（taxonomy）给出，所有维度的关键词由一个多模式匹配器统一扫描，
+每篇论文的标题和摘要只转换小写并扫描一次，即可得到学科、主题和类型的分类结果。
 """
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterable, Tuple
 import logging
+import re
+
+# 默认分类体系：维度 -> {default: 未命中时的类别, exact_fields: 按整词匹配的字段, labels: {类别: 关键词}}
+DEFAULT_TAXONOMY: Dict[str, Dict[str, Any]] = {
+    "discipline": {
+        "default": "Unknown",
+        "exact_fields": ["keywords"],
+        "labels": {
+            "Computer Science": ["computer science", "machine learning", "artificial intelligence",
+                                 "deep learning", "neural networks", "computer vision"]
+        }
+    },
+    "topic": {
+        "default": "Unknown",
+        "exact_fields": ["keywords"],
+        "labels": {
+            "Deep Learning": ["deep learning", "neural networks", "cnn", "rnn", "lstm"]
+        }
+    },
+    "type": {
+        "default": "Research",
+        "exact_fields": ["type"],
+        "labels": {
+            "Review": ["review", "survey", "overview"]
+        }
+    }
+}
+
+# 未命中任何关键词时的置信度
+DEFAULT_CONFIDENCE = 0.5
+
+# 关键词数量不超过该值时逐个做子串查找（CPython 的子串查找比正则逐位置匹配更快），
+# 超过时使用组合正则，扫描开销不再随关键词数量线性增长
+SUBSTRING_SCAN_LIMIT = 32
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """将关键词构造为前缀树形式的正则，共享前缀只匹配一次，同一位置优先匹配较长的关键词"""
+    trie: Dict[str, Any] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+class KeywordMatcher:
+    """分类体系中所有关键词的多模式匹配器
+
+    每个关键词对应一个二进制位，扫描结果以整数位掩码表示。
+    """
+
+    def __init__(self, taxonomy: Dict[str, Dict[str, Any]]):
+        """
+        初始化匹配器
+
+        Args:
+            taxonomy: 分类体系，格式见 DEFAULT_TAXONOMY
+
+        Raises:
+            ValueError: 当分类体系格式无效时
+        """
+        if not taxonomy or not isinstance(taxonomy, dict):
+            raise ValueError("Invalid taxonomy")
+
+        # (维度, 类别) -> 关键词位掩码
+        self.label_masks: Dict[Tuple[str, str], int] = {}
+        self.bits: Dict[str, int] = {}
+        for dimension, spec in taxonomy.items():
+            labels = spec.get("labels") if isinstance(spec, dict) else None
+            if not isinstance(labels, dict):
+                raise ValueError(f"Invalid taxonomy dimension: {dimension}")
+            for label, keywords in labels.items():
+                mask = 0
+                for keyword in keywords:
+                    keyword = keyword.strip().lower()
+                    if keyword:
+                        mask |= self.bits.setdefault(keyword, 1 << len(self.bits))
+                self.label_masks[(dimension, label)] = mask
+        self.keywords = list(self.bits)
+        self._bit_items = tuple(self.bits.items())
+
+        # 匹配到较长关键词时，作为其子串的关键词同样命中
+        self.implied: Dict[str, int] = {}
+        for keyword in self.keywords:
+            mask = 0
+            for other in self.keywords:
+                if other in keyword:
+                    mask |= self.bits[other]
+            self.implied[keyword] = mask
+
+        self.pattern = None
+        if len(self.keywords) > SUBSTRING_SCAN_LIMIT:
+            pattern = _trie_pattern(self.keywords)
+            # 某个关键词的后缀是另一个关键词的前缀时，匹配可能重叠，需要用零宽前瞻逐位置匹配
+            if self._has_overlaps():
+                pattern = f"(?=({pattern}))"
+            self.pattern = re.compile(pattern)
+
+    def _has_overlaps(self) -> bool:
+        for keyword in self.keywords:
+            for other in self.keywords:
+                if other in keyword:
+                    continue
+                if any(keyword.endswith(other[:i]) for i in range(1, min(len(keyword), len(other)))):
+                    return True
+        return False
+
+    def scan(self, text: str) -> int:
+        """返回小写文本中出现的关键词位掩码"""
+        mask = 0
+        if not text:
+            return mask
+        if self.pattern is None:
+            for keyword, bit in self._bit_items:
+                if keyword in text:
+                    mask |= bit
+            return mask
+        for keyword in set(self.pattern.findall(text)):
+            mask |= self.implied[keyword]
+        return mask
+
+    def exact(self, values: Iterable[Any]) -> int:
+        """返回与字段值完全相同（忽略大小写）的关键词位掩码"""
+        mask = 0
+        for value in values:
+            mask |= self.bits.get(str(value).strip().lower(), 0)
+        return mask
 
 class LiteratureClassifier:
-    def __init__(self):
+    def __init__(self, taxonomy: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        初始化文献分类器
+
+        Args:
+            taxonomy: 分类体系，默认为 DEFAULT_TAXONOMY
+        """
         self.logger = logging.getLogger(__name__)
-        
+        self.taxonomy = taxonomy or DEFAULT_TAXONOMY
+        self.matcher = KeywordMatcher(self.taxonomy)
+        # 各维度的关键词位掩码
+        self.dimension_masks = {
+            dimension: sum(self.matcher.label_masks[(dimension, label)] for label in spec["labels"])
+            for dimension, spec in self.taxonomy.items()
+        }
+        self._plan = [(dimension, tuple(spec.get("exact_fields", [])), self.dimension_masks[dimension])
+                      for dimension, spec in self.taxonomy.items()]
+        # (维度, 命中位掩码) -> (类别, 置信度)，命中组合有限，判定结果可以复用
+        self._decisions: Dict[Tuple[str, int], Tuple[str, float]] = {}
+
+    def _field_mask(self, field: str, value: Any) -> int:
+        """按整词匹配字段值，字符串形式的关键词字段按子串匹配"""
+        if not value:
+            return 0
+        if isinstance(value, str):
+            return self.matcher.scan(value.lower()) if field == "keywords" else self.matcher.exact((value,))
+        if isinstance(value, (list, tuple, set)):
+            return self.matcher.exact(value)
+        return self.matcher.exact((value,))
+
+    def _match(self, paper_data: Dict[str, Any]) -> Dict[str, int]:
+        """扫描一篇论文，返回 {维度: 命中的关键词位掩码}"""
+        # 标题和摘要之间用换行分隔，避免关键词跨字段匹配
+        text = f"{paper_data.get('title') or ''}\n{paper_data.get('abstract') or ''}".lower()
+        scanned = self.matcher.scan(text)
+
+        hits = {}
+        field_masks: Dict[str, int] = {}
+        for dimension, fields, dimension_mask in self._plan:
+            mask = scanned
+            for field in fields:
+                if field not in field_masks:
+                    field_masks[field] = self._field_mask(field, paper_data.get(field))
+                mask |= field_masks[field]
+            hits[dimension] = mask & dimension_mask
+        return hits
+
+    def _decide(self, dimension: str, mask: int) -> Tuple[str, float]:
+        """根据命中的关键词确定某个维度的类别和置信度
+
+        命中关键词最多的类别胜出（数量相同时取分类体系中靠前的类别）。
+        置信度为 min(0.99, 0.7 + 0.1 * 命中数) 乘以该类别命中数占该维度总命中数的比例，
+        未命中时为 DEFAULT_CONFIDENCE。
+        """
+        key = (dimension, mask)
+        decision = self._decisions.get(key)
+        if decision is not None:
+            return decision
+
+        spec = self.taxonomy[dimension]
+        counts = {label: bin(mask & self.matcher.label_masks[(dimension, label)]).count("1")
+                  for label in spec["labels"]}
+        total = sum(counts.values())
+        if total == 0:
+            decision = (spec.get("default", "Unknown"), DEFAULT_CONFIDENCE)
+        else:
+            label = max(counts, key=counts.get)
+            hits = counts[label]
+            decision = (label, min(0.99, 0.7 + 0.1 * hits) * hits / total)
+
+        self._decisions[key] = decision
+        return decision
+
+    def _classify_dimension(self, paper_data: Dict[str, Any], dimension: str) -> str:
+        if not paper_data or not isinstance(paper_data, dict):
+            raise ValueError("Invalid paper data")
+        label, _ = self._decide(dimension, self._match(paper_data)[dimension])
+        return label
+
     def classify_by_discipline(self, paper_data: Dict[str, Any]) -> str:
         """根据论文数据进行学科分类"""
         try:
-            if not paper_data or not isinstance(paper_data, dict):
-                raise ValueError("Invalid paper data")
-                
-            # 简单的分类逻辑
-            keywords = paper_data.get("keywords", [])
-            title = paper_data.get("title", "").lower()
-            abstract = paper_data.get("abstract", "").lower()
-            
-            # 计算机科学相关关键词
-            cs_keywords = ["computer science", "machine learning", "artificial intelligence",
-                         "deep learning", "neural networks", "computer vision"]
-                         
-            # 检查是否包含计算机科学关键词
-            for keyword in cs_keywords:
-                if (keyword in keywords or 
-                    keyword in title or 
-                    keyword in abstract):
-                    return "Computer Science"
-                    
-            return "Unknown"
-            
+            return self._classify_dimension(paper_data, "discipline")
         except Exception as e:
             self.logger.error(f"Error in discipline classification: {e}")
             raise
-            
+
     def classify_by_topic(self, paper_data: Dict[str, Any]) -> str:
         """根据论文数据进行主题分类"""
         try:
-            if not paper_data or not isinstance(paper_data, dict):
-                raise ValueError("Invalid paper data")
-                
-            # 简单的主题分类逻辑
-            keywords = paper_data.get("keywords", [])
-            title = paper_data.get("title", "").lower()
-            abstract = paper_data.get("abstract", "").lower()
-            
-            # 深度学习相关关键词
-            dl_keywords = ["deep learning", "neural networks", "cnn", "rnn", "lstm"]
-            
-            # 检查是否包含深度学习关键词
-            for keyword in dl_keywords:
-                if (keyword in keywords or 
-                    keyword in title or 
-                    keyword in abstract):
-                    return "Deep Learning"
-                    
-            return "Unknown"
-            
+            return self._classify_dimension(paper_data, "topic")
         except Exception as e:
             self.logger.error(f"Error in topic classification: {e}")
             raise
-            
+
     def classify_by_type(self, paper_data: Dict[str, Any]) -> str:
         """根据论文数据进行类型分类"""
         try:
-            if not paper_data or not isinstance(paper_data, dict):
-                raise ValueError("Invalid paper data")
-                
-            # 获取论文类型
-            paper_type = paper_data.get("type", "").lower()
-            title = paper_data.get("title", "").lower()
-            abstract = paper_data.get("abstract", "").lower()
-            
-            # 检查是否为综述论文
-            review_keywords = ["review", "survey", "overview"]
-            for keyword in review_keywords:
-                if (keyword == paper_type or 
-                    keyword in title or 
-                    keyword in abstract):
-                    return "Review"
-                    
-            return "Research"
-            
+            return self._classify_dimension(paper_data, "type")
         except Exception as e:
             self.logger.error(f"Error in type classification: {e}")
             raise
-            
+
+    def classify_batch(self, papers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """批量分类论文，每篇论文只扫描一次
+
+        Args:
+            papers (List[Dict[str, Any]]): 论文数据列表
+
+        Returns:
+            List[Dict[str, Any]]: 与输入顺序一致的结果列表，每项包含 classification
+                （各维度的类别）和 confidence（各维度的置信度）；无效的论文数据对应 None
+        """
+        results: List[Optional[Dict[str, Any]]] = []
+        invalid = 0
+        for paper_data in papers:
+            if not paper_data or not isinstance(paper_data, dict):
+                results.append(None)
+                invalid += 1
+                continue
+            hits = self._match(paper_data)
+            classification, confidence = {}, {}
+            for dimension in self.taxonomy:
+                classification[dimension], confidence[dimension] = self._decide(dimension, hits[dimension])
+            results.append({"classification": classification, "confidence": confidence})
+
+        if invalid:
+            self.logger.warning(f"批量分类时跳过 {invalid} 条无效的论文数据")
+        return results
+
     def classify_paper(self, paper_data: Dict[str, Any]) -> Dict[str, str]:
         """对论文进行多重分类
-        
+
         Args:
             paper_data (Dict[str, Any]): 论文数据，必须包含 title 和 abstract 字段
-            
+
         Returns:
             Dict[str, str]: 分类结果，包含 discipline、topic 和 type
-            
+
         Raises:
             ValueError: 当输入数据无效或缺少必要字段时
         """
         if not paper_data or not isinstance(paper_data, dict):
             raise ValueError("Invalid paper data")
-            
+
         if "title" not in paper_data or "abstract" not in paper_data:
             raise ValueError("Paper data must contain title and abstract")
-            
-        return {
-            "discipline": self.classify_by_discipline(paper_data),
-            "topic": self.classify_by_topic(paper_data),
-            "type": self.classify_by_type(paper_data)
-        }
-        
+
+        return self.classify_batch([paper_data])[0]["classification"]
+
     def classify_with_confidence(self, paper_data: Dict[str, Any]) -> Dict[str, Any]:
         """对论文进行分类并返回置信度
-        
+
         Args:
             paper_data (Dict[str, Any]): 论文数据
-            
+
         Returns:
-            Dict[str, Any]: 分类结果和置信度
+            Dict[str, Any]: 分类结果和置信度（以学科维度的置信度为准）
         """
-        classification = self.classify_paper(paper_data)
-        
-        # 简单的置信度计算
-        confidence = 0.8 if classification["discipline"] != "Unknown" else 0.5
-        
+        if not paper_data or not isinstance(paper_data, dict):
+            raise ValueError("Invalid paper data")
+
+        if "title" not in paper_data or "abstract" not in paper_data:
+            raise ValueError("Paper data must contain title and abstract")
+
+        result = self.classify_batch([paper_data])[0]
+
         return {
-            "classification": classification,
-            "confidence": confidence
-        } 
\ No newline at end of file
+            "classification": result["classification"],
+            "confidence": result["confidence"].get("discipline", DEFAULT_CONFIDENCE)
+        }
@@ -2,8 +2,13 @@ from typing import List, Dict, Optional, Any, Tuple, Union
 from dataclasses import dataclass
 import logging
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 import json
 import os
+import re
+import threading
+import time
+from .store import LiteratureStore
 
 @dataclass
 class LiteratureMetadata:
@@ -47,33 +52,196 @@ class LiteratureSource(ABC):
 class LiteratureCollector:
     """文献收集器类"""
     
-    def __init__(self):
+    def __init__(self, max_workers: int = 8, source_timeout: Optional[float] = None,
+                 store: Optional[LiteratureStore] = None):
+        """
+        初始化文献收集器
+        
+        Args:
+            max_workers: 同时查询的文献来源数量上限
+            source_timeout: 来源查询的默认超时时间（秒），从提交查询时计算，None 表示不限制
+            store: 文献存储，默认使用 LITERATURE_STORE_PATH 指定的数据库
+        """
         self.sources: Dict[str, LiteratureSource] = {}
-        self.collected_papers: Dict[str, List[Dict[str, Any]]] = {}
+        self.store = store or LiteratureStore()
         self.logger = logging.getLogger(__name__)
+        self.max_workers = max_workers
+        self.source_timeout = source_timeout
+        self.source_stats: Dict[str, Dict[str, Any]] = {}
+        self.last_collection: Dict[str, Any] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
     
     def add_source(self, name: str, source: LiteratureSource) -> None:
         """添加文献来源"""
         self.sources[name] = source
         self.logger.info(f"Added literature source: {name}")
     
-    def collect_papers(self, query: str, year_range: Tuple[int, int], sources: Optional[List[str]] = None) -> List[Dict[str, Any]]:
-        """收集文献"""
+    def collect_papers(self, query: str, year_range: Tuple[int, int], sources: Optional[List[str]] = None,
+                       timeout: Optional[float] = None, deduplicate: bool = True) -> List[Dict[str, Any]]:
+        """收集文献
+        
+        并发查询各文献来源，总耗时取决于最慢的来源而不是各来源耗时之和。
+        
+        Args:
+            query: 查询关键词
+            year_range: 年份范围元组 (start_year, end_year)
+            sources: 要查询的来源名称，默认查询所有来源
+            timeout: 来源查询的超时时间（秒），从提交查询时计算，默认使用 source_timeout
+            deduplicate: 是否按DOI/标题跨来源去重
+            
+        Returns:
+            List[Dict[str, Any]]: 文献列表，各来源的状态记录在 last_collection 中
+        """
         if not query:
             raise ValueError("Query cannot be empty")
             
         if year_range[0] > year_range[1]:
             raise ValueError("Invalid year range")
             
-        papers = []
-        source_list = sources if sources else list(self.sources.keys())
+        source_list = [name for name in (sources if sources else list(self.sources.keys()))
+                       if name in self.sources]
+        timeout = self.source_timeout if timeout is None else timeout
+        results = self._fan_out(source_list, query, year_range, timeout)
         
+        # 按来源顺序合并，部分来源失败或超时时返回其余来源的结果
+        papers = []
         for source_name in source_list:
-            if source_name in self.sources:
-                source_papers = self.sources[source_name].search(query, year_range)
-                papers.extend([self._metadata_to_dict(p) for p in source_papers])
+            papers.extend(self._metadata_to_dict(p) for p in results.get(source_name, []))
         
-        return papers
+        return self.deduplicate_papers(papers) if deduplicate else papers
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="literature-source")
+            return self._executor
+    
+    def _retire_executor(self, executor: ThreadPoolExecutor) -> None:
+        """停止向仍有超时来源占用线程的线程池提交任务，之后的查询使用新的线程池
+        
+        已提交的任务继续执行，被占用的线程在来源返回后退出。
+        """
+        with self._executor_lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+    
+    def _fan_out(self, source_list: List[str], query: str, year_range: Tuple[int, int],
+                 timeout: Optional[float]) -> Dict[str, List[LiteratureMetadata]]:
+        """并发查询各文献来源
+        
+        所有来源共用一个从提交时开始计算的截止时间：截止时仍在排队的来源被取消，
+        正在查询的来源被放弃（线程无法强制终止，会在后台结束），其线程池不再复用；
+        抛出异常的来源记录错误后跳过。
+        
+        Returns:
+            Dict[str, List[LiteratureMetadata]]: 成功返回的来源及其结果
+        """
+        started_at: Dict[str, float] = {}
+        
+        def run(source_name: str) -> List[LiteratureMetadata]:
+            started_at[source_name] = time.monotonic()
+            return self.sources[source_name].search(query, year_range)
+            
+        executor = self._get_executor()
+        submitted_at = time.monotonic()
+        deadline = submitted_at + timeout if timeout is not None else None
+        futures: Dict[Future, str] = {executor.submit(run, name): name for name in source_list}
+        results: Dict[str, List[LiteratureMetadata]] = {}
+        report = {"succeeded": [], "failed": {}, "timed_out": []}
+        pending = set(futures)
+        
+        while pending:
+            wait_timeout = max(deadline - time.monotonic(), 0) if deadline is not None else None
+            done, pending = wait(pending, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                name = futures[future]
+                latency = time.monotonic() - started_at.get(name, submitted_at)
+                try:
+                    results[name] = list(future.result())
+                    report["succeeded"].append(name)
+                    self._record_source_stat(name, latency, "success")
+                except Exception as e:
+                    report["failed"][name] = str(e)
+                    self._record_source_stat(name, latency, "error")
+                    self.logger.error(f"Error collecting papers from {name}: {str(e)}")
+                    
+            if deadline is not None and pending and time.monotonic() >= deadline:
+                now = time.monotonic()
+                abandoned = False
+                for future in [f for f in futures if f in pending]:
+                    name = futures[future]
+                    # 已开始查询的来源无法取消，其线程仍被占用
+                    abandoned |= not future.cancel()
+                    report["timed_out"].append(name)
+                    self._record_source_stat(name, now - started_at.get(name, submitted_at), "timeout")
+                    self.logger.warning(f"Literature source {name} timed out after {timeout}s")
+                pending = set()
+                if abandoned:
+                    self._retire_executor(executor)
+                        
+        self.last_collection = report
+        return results
+    
+    def _record_source_stat(self, source_name: str, latency: float, status: str) -> None:
+        with self._stats_lock:
+            stats = self.source_stats.setdefault(source_name, {
+                "calls": 0, "success": 0, "error": 0, "timeout": 0,
+                "total_latency": 0.0, "max_latency": 0.0
+            })
+            stats["calls"] += 1
+            stats[status] += 1
+            stats["total_latency"] += latency
+            stats["max_latency"] = max(stats["max_latency"], latency)
+            
+    def get_source_statistics(self) -> Dict[str, Dict[str, Any]]:
+        """获取各文献来源的调用次数、失败/超时次数与延迟统计（秒）"""
+        with self._stats_lock:
+            return {
+                name: {**stats, "avg_latency": stats["total_latency"] / stats["calls"] if stats["calls"] else 0.0}
+                for name, stats in self.source_stats.items()
+            }
+    
+    @staticmethod
+    def _dedup_key(paper: Dict[str, Any]) -> Optional[str]:
+        """去重键：优先使用规范化的DOI，否则使用规范化的标题"""
+        doi = (paper.get("doi") or "").strip().lower()
+        doi = re.sub(r"^(https?://)?(dx\.)?doi\.org/|^doi:\s*", "", doi)
+        if doi:
+            return f"doi:{doi}"
+        title = re.sub(r"[\W_]+", "", (paper.get("title") or "").casefold())
+        return f"title:{title}" if title else None
+    
+    def deduplicate_papers(self, papers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """按DOI/标题跨来源去重
+        
+        保留首次出现的文献，并用重复项补全其缺失的字段。DOI不同但标题相同的文献
+        同样视为重复。
+        
+        Args:
+            papers: 文献列表
+            
+        Returns:
+            List[Dict[str, Any]]: 去重后的文献列表
+        """
+        merged: List[Dict[str, Any]] = []
+        by_key: Dict[str, Dict[str, Any]] = {}
+        for paper in papers:
+            keys = [key for key in (self._dedup_key(paper), self._dedup_key({"title": paper.get("title")})) if key]
+            existing = next((by_key[key] for key in keys if key in by_key), None)
+            if existing is None:
+                existing = dict(paper)
+                merged.append(existing)
+            else:
+                for field, value in paper.items():
+                    if existing.get(field) in (None, "", []) and value not in (None, "", []):
+                        existing[field] = value
+            for key in keys:
+                by_key.setdefault(key, existing)
+        return merged
     
     def filter_papers(self, papers: List[Dict[str, Any]], min_citations: Optional[int] = None) -> List[Dict[str, Any]]:
         """过滤文献"""
@@ -86,39 +254,18 @@ class LiteratureCollector:
     
     def save_papers(self, query: str, papers: List[Dict[str, Any]]) -> None:
         """保存文献"""
-        self.collected_papers[query] = papers
+        self.store.save_collection(query, papers)
         
     def load_papers(self, query: str) -> List[Dict[str, Any]]:
         """加载文献"""
-        if query not in self.collected_papers:
+        papers = self.store.load_collection(query)
+        if papers is None:
             raise ValueError(f"No papers found for query: {query}")
-        return self.collected_papers[query]
+        return papers
     
     def get_collection_statistics(self, query: str) -> Dict[str, Any]:
-        """获取收集统计信息"""
-        if query not in self.collected_papers:
-            return {}
-            
-        papers = self.collected_papers[query]
-        
-        # 计算年份分布
-        year_distribution = {}
-        for paper in papers:
-            year = paper.get("year")
-            if year:
-                year_distribution[year] = year_distribution.get(year, 0) + 1
-                
-        # 计算引用分布
-        citation_distribution = {}
-        for paper in papers:
-            citations = paper.get("citations", 0)
-            citation_distribution[citations] = citation_distribution.get(citations, 0) + 1
-            
-        return {
-            "total_papers": len(papers),
-            "year_distribution": year_distribution,
-            "citation_distribution": citation_distribution
-        }
+        """获取收集统计信息（年份分布和引用分布由数据库聚合计算）"""
+        return self.store.collection_statistics(query) or {}
     
     def _metadata_to_dict(self, metadata: LiteratureMetadata) -> Dict[str, Any]:
         """将元数据转换为字典"""
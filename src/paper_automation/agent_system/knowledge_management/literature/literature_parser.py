@@ -3,11 +3,14 @@
 """
 from typing import Dict, List, Any, Optional, Tuple, Union
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 import os
 import PyPDF2
 import json
 from .collector import LiteratureMetadata
+from .pdf_extraction import PDFExtractionCache, parse_first_page
+from .search_index import LiteratureIndex
+from .store import LiteratureStore
 
 @dataclass
 class ParsedPaper:
@@ -20,18 +23,27 @@ class ParsedPaper:
 class LiteratureParser:
     """文献解析器类，用于解析PDF文献并提取相关信息"""
     
-    def __init__(self, base_dir: Optional[str] = None, min_year: int = 1900):
+    def __init__(self, base_dir: Optional[str] = None, min_year: int = 1900,
+                 cache_dir: Optional[str] = None, max_workers: Optional[int] = None,
+                 store: Optional[LiteratureStore] = None):
         """
         初始化文献解析器
         
         Args:
             base_dir: PDF文件存储的基础目录
             min_year: 最小年份限制
+            cache_dir: PDF提取结果与检索索引的缓存目录，默认为 base_dir 下的 .pdf_cache
+            max_workers: 并行提取PDF的进程数，默认为CPU核数
+            store: 解析结果的存储，默认使用 LITERATURE_STORE_PATH 指定的数据库
         """
         self.base_dir = base_dir
         self.logger = logging.getLogger(__name__)
-        self.parsed_papers: Dict[str, ParsedPaper] = {}
+        self.store = store or LiteratureStore()
         self.min_year = min_year
+        if cache_dir is None and base_dir:
+            cache_dir = os.path.join(base_dir, ".pdf_cache")
+        self.pdf_cache = PDFExtractionCache(cache_dir, max_workers) if cache_dir else None
+        self.search_index = LiteratureIndex(os.path.join(cache_dir, "search_index.db")) if cache_dir else None
         
     def _is_valid_paper(self, paper_data: Dict[str, Any]) -> bool:
         """检查论文是否有效
@@ -121,8 +133,8 @@ class LiteratureParser:
                 keywords=keywords
             )
             
-            # 缓存解析结果
-            self.parsed_papers[paper_data["title"]] = parsed_paper
+            # 保存解析结果
+            self.store.save_parsed(paper_data["title"], asdict(parsed_paper))
             
             return parsed_paper
             
@@ -217,7 +229,7 @@ class LiteratureParser:
         if not paper or not isinstance(paper, ParsedPaper):
             raise ValueError("Invalid parsed paper")
             
-        self.parsed_papers[paper_id] = paper
+        self.store.save_parsed(paper_id, asdict(paper))
         
     def load_parsed_paper(self, paper_id: str) -> Optional[ParsedPaper]:
         """加载解析后的论文
@@ -234,7 +246,8 @@ class LiteratureParser:
         if not paper_id or not isinstance(paper_id, str):
             raise ValueError("Invalid paper ID")
             
-        return self.parsed_papers.get(paper_id)
+        data = self.store.load_parsed(paper_id)
+        return ParsedPaper(**data) if data is not None else None
         
     def analyze_paper(self, paper_data: Dict[str, Any]) -> Dict[str, Any]:
         """分析论文数据
@@ -294,34 +307,42 @@ class LiteratureParser:
             return []
             
         try:
-            results = []
-            for filename in os.listdir(self.base_dir):
-                if not filename.endswith(".pdf"):
-                    continue
-                    
-                metadata = self._extract_metadata_from_pdf(
-                    os.path.join(self.base_dir, filename)
-                )
-                if not metadata:
-                    continue
-                    
-                if year_range:
-                    if metadata["year"] < year_range[0] or metadata["year"] > year_range[1]:
-                        continue
-                        
-                if (query.lower() in metadata["title"].lower() or 
-                    query.lower() in metadata["abstract"].lower()):
-                    results.append(metadata)
-                    
-                if len(results) >= limit:
-                    break
-                    
-            return results
+            self.update_search_index()
+            return [metadata for metadata, _ in self.search_index.search(query, year_range, limit)]
             
         except Exception as e:
             self.logger.error(f"Error searching local PDFs: {str(e)}")
             return []
             
+    def update_search_index(self) -> int:
+        """增量更新本地PDF的检索索引
+        
+        只有新增或变化的PDF会被重新提取和索引，已删除的PDF从索引中移除。
+        
+        Returns:
+            int: 重新索引的PDF数量
+        """
+        metadata_by_path = self.pdf_cache.sync_directory(self.base_dir)
+        indexed = self.search_index.get_signatures()
+        
+        removed = [path for path in indexed if path not in metadata_by_path]
+        if removed:
+            self.search_index.remove_documents(removed)
+            
+        def changed_documents():
+            for path, metadata in metadata_by_path.items():
+                signature = self.pdf_cache.get_signature(path)
+                if indexed.get(path) == signature:
+                    continue
+                document = dict(metadata)
+                document["full_text"] = self.pdf_cache.get_full_text(path) or ""
+                yield path, document, signature
+                
+        count = self.search_index.add_documents(changed_documents())
+        if count or removed:
+            self.logger.info(f"检索索引已更新: 新增或更新 {count} 篇, 删除 {len(removed)} 篇")
+        return count
+            
     def get_pdf_full_text(self, metadata: Dict[str, Any]) -> Optional[str]:
         """获取PDF文件的完整文本内容
         
@@ -335,12 +356,12 @@ class LiteratureParser:
             return None
             
         try:
+            if self.pdf_cache is not None:
+                return self.pdf_cache.get_full_text(metadata["pdf_path"])
+                
             with open(metadata["pdf_path"], "rb") as f:
                 reader = PyPDF2.PdfReader(f)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text()
-                return text
+                return "".join(page.extract_text() or "" for page in reader.pages)
                 
         except Exception as e:
             self.logger.error(f"Error getting PDF full text: {str(e)}")
@@ -358,43 +379,7 @@ class LiteratureParser:
         try:
             with open(pdf_path, "rb") as f:
                 reader = PyPDF2.PdfReader(f)
-                first_page = reader.pages[0]
-                text = first_page.extract_text()
-                
-                # 提取标题
-                title = ""
-                for line in text.split("\n"):
-                    if line.strip():
-                        title = line.strip()
-                        break
-                        
-                # 提取作者
-                authors = []
-                for line in text.split("\n"):
-                    if line.strip() and title not in line:
-                        authors.append(line.strip())
-                        
-                # 提取年份
-                year = 0
-                for line in text.split("\n"):
-                    if line.strip() and line.strip().isdigit():
-                        year = int(line.strip())
-                        break
-                        
-                # 提取摘要
-                abstract = ""
-                for line in text.split("\n"):
-                    if "abstract" in line.lower() or "摘要" in line:
-                        abstract = line.strip()
-                        break
-                        
-                return {
-                    "title": title,
-                    "authors": authors,
-                    "year": year,
-                    "abstract": abstract,
-                    "pdf_path": pdf_path
-                }
+                return parse_first_page(reader.pages[0].extract_text(), pdf_path)
                 
         except Exception as e:
             self.logger.error(f"Error extracting metadata from PDF: {str(e)}")
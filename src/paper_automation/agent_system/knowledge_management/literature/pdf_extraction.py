@@ -0,0 +1,238 @@
+"""
+PDF文本提取流水线，用于批量提取PDF首页元数据与全文并缓存到磁盘。
+
+缓存以 (路径, 修改时间, 文件大小) 判断文件是否变化，只重新提取新增或变化的文件，
+批量提取时使用进程池并行解析。
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import threading
+import PyPDF2
+
+logger = logging.getLogger(__name__)
+
+# 待提取文件数不超过该值时在当前进程中顺序提取，避免进程池启动开销
+PARALLEL_THRESHOLD = 4
+
+def parse_first_page(text: str, pdf_path: str) -> Dict[str, Any]:
+    """从PDF首页文本中提取元数据
+
+    Args:
+        text: 首页文本
+        pdf_path: PDF文件路径
+
+    Returns:
+        Dict[str, Any]: 元数据字典
+    """
+    lines = [line.strip() for line in text.split("\n") if line.strip()]
+
+    # 提取标题
+    title = lines[0] if lines else ""
+
+    # 提取作者
+    authors = [line for line in lines if title not in line]
+
+    # 提取年份
+    year = next((int(line) for line in lines if line.isdigit()), 0)
+
+    # 提取摘要
+    abstract = next((line for line in lines if "abstract" in line.lower() or "摘要" in line), "")
+
+    return {
+        "title": title,
+        "authors": authors,
+        "year": year,
+        "abstract": abstract,
+        "pdf_path": pdf_path
+    }
+
+def extract_pdf(pdf_path: str, text_path: str) -> Dict[str, Any]:
+    """打开一次PDF，提取首页元数据并将全文写入 text_path
+
+    该函数在进程池的工作进程中执行。
+
+    Args:
+        pdf_path: PDF文件路径
+        text_path: 全文缓存文件路径
+
+    Returns:
+        Dict[str, Any]: {"metadata": 元数据或None, "error": 错误信息或None}
+    """
+    try:
+        with open(pdf_path, "rb") as f:
+            reader = PyPDF2.PdfReader(f)
+            pages = [page.extract_text() or "" for page in reader.pages]
+
+        tmp_path = f"{text_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("".join(pages))
+        os.replace(tmp_path, text_path)
+
+        return {"metadata": parse_first_page(pages[0] if pages else "", pdf_path), "error": None}
+
+    except Exception as e:
+        return {"metadata": None, "error": str(e)}
+
+class PDFExtractionCache:
+    """以 (路径, 修改时间, 文件大小) 为键的PDF提取结果磁盘缓存"""
+
+    INDEX_FILE = "index.json"
+    TEXT_DIR = "texts"
+
+    def __init__(self, cache_dir: str, max_workers: Optional[int] = None):
+        """
+        初始化提取缓存
+
+        Args:
+            cache_dir: 缓存目录，索引保存在 index.json，全文保存在 texts/ 下
+            max_workers: 并行提取的进程数，默认为CPU核数
+        """
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.text_dir = os.path.join(cache_dir, self.TEXT_DIR)
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+
+    @staticmethod
+    def _file_signature(pdf_path: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(pdf_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _text_path(self, pdf_path: str) -> str:
+        key = hashlib.sha1(pdf_path.encode("utf-8")).hexdigest()
+        return os.path.join(self.text_dir, f"{key}.txt")
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            self._entries = {}
+            index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+            if os.path.exists(index_path):
+                try:
+                    with open(index_path, "r", encoding="utf-8") as f:
+                        self._entries = json.load(f).get("files", {})
+                except (OSError, ValueError) as e:
+                    logger.warning(f"读取PDF提取缓存索引失败，将重新提取: {str(e)}")
+        return self._entries
+
+    def _save_index(self) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self._entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, index_path)
+
+    def _is_fresh(self, entry: Optional[Dict[str, Any]], signature: Optional[Tuple[int, int]]) -> bool:
+        return (entry is not None and signature is not None
+                and (entry["mtime_ns"], entry["size"]) == signature)
+
+    def _extract_many(self, pdf_paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """提取多个PDF，数量较多时使用进程池"""
+        os.makedirs(self.text_dir, exist_ok=True)
+        text_paths = [self._text_path(path) for path in pdf_paths]
+        if len(pdf_paths) <= PARALLEL_THRESHOLD:
+            results = map(extract_pdf, pdf_paths, text_paths)
+            return dict(zip(pdf_paths, results))
+
+        workers = self.max_workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunksize = max(1, len(pdf_paths) // (workers * 4))
+            results = executor.map(extract_pdf, pdf_paths, text_paths, chunksize=chunksize)
+            return dict(zip(pdf_paths, results))
+
+    def _update(self, signatures: Dict[str, Tuple[int, int]]) -> None:
+        """提取 signatures 中的文件并写入索引"""
+        results = self._extract_many(list(signatures))
+        for pdf_path, result in results.items():
+            if result["error"]:
+                logger.error(f"Error extracting PDF {pdf_path}: {result['error']}")
+            mtime_ns, size = signatures[pdf_path]
+            # 提取失败的文件同样记录，文件未变化时不再重复解析
+            self._entries[pdf_path] = {
+                "mtime_ns": mtime_ns,
+                "size": size,
+                "metadata": result["metadata"],
+                "error": result["error"]
+            }
+
+    def sync_directory(self, base_dir: str) -> Dict[str, Dict[str, Any]]:
+        """同步目录下的PDF，只提取新增或变化的文件
+
+        Args:
+            base_dir: PDF目录
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 按文件名排序的 {PDF绝对路径: 元数据}，不含提取失败的文件
+        """
+        base_dir = os.path.abspath(base_dir)
+        with self._lock:
+            entries = self._load_index()
+
+            signatures = {}
+            with os.scandir(base_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(".pdf") and entry.is_file():
+                        stat = entry.stat()
+                        signatures[entry.path] = (stat.st_mtime_ns, stat.st_size)
+
+            stale = {path: sig for path, sig in signatures.items()
+                     if not self._is_fresh(entries.get(path), sig)}
+            removed = [path for path in entries
+                       if os.path.dirname(path) == base_dir and path not in signatures]
+
+            if stale:
+                logger.info(f"提取PDF: {len(stale)} 个新增或变化的文件（共 {len(signatures)} 个）")
+                self._update(stale)
+            for path in removed:
+                entries.pop(path, None)
+                text_path = self._text_path(path)
+                if os.path.exists(text_path):
+                    os.remove(text_path)
+            if stale or removed:
+                self._save_index()
+
+            return {
+                path: entries[path]["metadata"]
+                for path in sorted(signatures)
+                if entries[path]["metadata"] is not None
+            }
+
+    def get_signature(self, pdf_path: str) -> Optional[str]:
+        """获取缓存中记录的文件版本 "mtime_ns:size"，不访问文件系统"""
+        with self._lock:
+            entry = self._load_index().get(os.path.abspath(pdf_path))
+        return f"{entry['mtime_ns']}:{entry['size']}" if entry else None
+
+    def get_metadata(self, pdf_path: str) -> Optional[Dict[str, Any]]:
+        """获取单个PDF的首页元数据，缓存失效时重新提取"""
+        entry = self._get_entry(pdf_path)
+        return entry["metadata"] if entry else None
+
+    def get_full_text(self, pdf_path: str) -> Optional[str]:
+        """获取单个PDF的全文，缓存失效时重新提取"""
+        entry = self._get_entry(pdf_path)
+        if not entry or entry["error"]:
+            return None
+        with open(self._text_path(os.path.abspath(pdf_path)), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def _get_entry(self, pdf_path: str) -> Optional[Dict[str, Any]]:
+        pdf_path = os.path.abspath(pdf_path)
+        signature = self._file_signature(pdf_path)
+        if signature is None:
+            return None
+        with self._lock:
+            entries = self._load_index()
+            entry = entries.get(pdf_path)
+            if not self._is_fresh(entry, signature) or (
+                    not entry["error"] and not os.path.exists(self._text_path(pdf_path))):
+                self._update({pdf_path: signature})
+                self._save_index()
+            return entries[pdf_path]
@@ -0,0 +1,225 @@
+"""
+文献检索索引模块，提供持久化倒排索引与BM25排序检索。
+
+中文按字二元组（bigram）切分，英文和数字按单词切分，标题、关键词、摘要和全文
+按不同权重计入词频。索引保存在SQLite中，文献可以逐篇增量加入或删除，
+检索时只读取查询词的倒排列表。
+"""
+from typing import Dict, List, Any, Optional, Tuple, Iterable
+from collections import Counter
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+
+_TOKEN_PATTERN = re.compile(r"[\u4e00-\u9fff]+|[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    """切分文本：连续中文按字二元组切分（单字保留），英文和数字按单词切分
+
+    Args:
+        text: 文本
+
+    Returns:
+        List[str]: 词项列表
+    """
+    if not text:
+        return []
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(text.lower()):
+        if run[0] >= "\u4e00":
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+def _field_text(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(item) for item in value)
+    return str(value) if value else ""
+
+def _parse_year(value: Any) -> Optional[int]:
+    try:
+        return int(str(value).strip()[:4])
+    except (TypeError, ValueError):
+        return None
+
+class LiteratureIndex:
+    """基于SQLite的文献倒排索引"""
+
+    # 各字段词频权重
+    FIELD_WEIGHTS = {"title": 3.0, "keywords": 2.0, "abstract": 1.5, "full_text": 1.0}
+
+    def __init__(self, db_path: str, k1: float = 1.5, b: float = 0.75):
+        """
+        初始化文献索引
+
+        Args:
+            db_path: 索引数据库路径
+            k1: BM25词频饱和参数
+            b: BM25文档长度归一化参数
+        """
+        self.db_path = db_path
+        self.k1 = k1
+        self.b = b
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id INTEGER PRIMARY KEY,
+                key TEXT UNIQUE NOT NULL,
+                year INTEGER,
+                length REAL NOT NULL,
+                signature TEXT,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                doc_id INTEGER NOT NULL,
+                tf REAL NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings (doc_id);
+        """)
+
+        # 文档年份和长度常驻内存，用于过滤和长度归一化
+        self._doc_info: Dict[int, Tuple[Optional[int], float]] = {
+            doc_id: (year, length)
+            for doc_id, year, length in self._conn.execute("SELECT doc_id, year, length FROM documents")
+        }
+        self._total_length = sum(length for _, length in self._doc_info.values())
+
+    def __len__(self) -> int:
+        return len(self._doc_info)
+
+    def _term_frequencies(self, document: Dict[str, Any]) -> Counter:
+        frequencies = Counter()
+        for field, weight in self.FIELD_WEIGHTS.items():
+            for token in tokenize(_field_text(document.get(field))):
+                frequencies[token] += weight
+        return frequencies
+
+    def _delete(self, key: str) -> None:
+        row = self._conn.execute("SELECT doc_id FROM documents WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return
+        doc_id = row[0]
+        self._conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        self._conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+        _, length = self._doc_info.pop(doc_id)
+        self._total_length -= length
+
+    def add_documents(self, documents: Iterable[Tuple[str, Dict[str, Any], Optional[str]]]) -> int:
+        """批量加入或替换文献，在一个事务中完成
+
+        Args:
+            documents: (文献键, 文献数据, 版本签名) 迭代器。文献数据可包含 title、keywords、
+                abstract、full_text、year 等字段，full_text 只用于建立索引，不保存
+
+        Returns:
+            int: 加入的文献数量
+        """
+        count = 0
+        with self._lock, self._conn:
+            for key, document, signature in documents:
+                self._delete(key)
+                frequencies = self._term_frequencies(document)
+                length = sum(frequencies.values())
+                year = _parse_year(document.get("year"))
+                data = {field: value for field, value in document.items() if field != "full_text"}
+                cursor = self._conn.execute(
+                    "INSERT INTO documents (key, year, length, signature, data) VALUES (?, ?, ?, ?, ?)",
+                    (key, year, length, signature, json.dumps(data, ensure_ascii=False, default=str))
+                )
+                doc_id = cursor.lastrowid
+                self._conn.executemany(
+                    "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                    ((term, doc_id, tf) for term, tf in frequencies.items())
+                )
+                self._doc_info[doc_id] = (year, length)
+                self._total_length += length
+                count += 1
+        return count
+
+    def add_document(self, key: str, document: Dict[str, Any], signature: Optional[str] = None) -> None:
+        """加入或替换单篇文献"""
+        self.add_documents([(key, document, signature)])
+
+    def remove_documents(self, keys: Iterable[str]) -> None:
+        """删除文献"""
+        with self._lock, self._conn:
+            for key in keys:
+                self._delete(key)
+
+    def get_signatures(self) -> Dict[str, Optional[str]]:
+        """获取所有文献的版本签名，用于判断文献是否需要重新索引"""
+        with self._lock:
+            return dict(self._conn.execute("SELECT key, signature FROM documents"))
+
+    def get_documents(self) -> List[Dict[str, Any]]:
+        """按加入顺序返回所有文献数据"""
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM documents ORDER BY doc_id").fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def search(self, query: str, year_range: Optional[Tuple[int, int]] = None,
+               limit: int = 10) -> List[Tuple[Dict[str, Any], float]]:
+        """BM25检索
+
+        Args:
+            query: 查询文本
+            year_range: 年份范围元组 (start_year, end_year)
+            limit: 返回结果数量
+
+        Returns:
+            List[Tuple[Dict[str, Any], float]]: 按得分降序排列的 (文献数据, 得分) 列表
+        """
+        terms = set(tokenize(query))
+        if not terms or limit <= 0:
+            return []
+
+        with self._lock:
+            total = len(self._doc_info)
+            if total == 0:
+                return []
+            average_length = self._total_length / total or 1.0
+
+            scores: Dict[int, float] = {}
+            for term in terms:
+                postings = self._conn.execute("SELECT doc_id, tf FROM postings WHERE term = ?", (term,)).fetchall()
+                if not postings:
+                    continue
+                idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings:
+                    year, length = self._doc_info[doc_id]
+                    if year_range and (year is None or year < year_range[0] or year > year_range[1]):
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            if not top:
+                return []
+            placeholders = ",".join("?" * len(top))
+            data = dict(self._conn.execute(
+                f"SELECT doc_id, data FROM documents WHERE doc_id IN ({placeholders})",
+                [doc_id for doc_id, _ in top]
+            ))
+        return [(json.loads(data[doc_id]), score) for doc_id, score in top]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,260 @@
+"""
+文献存储模块，提供基于SQLite的持久化文献存储。
+
+检索结果按查询保存，解析后的论文按论文ID保存，DOI、标题和年份建有索引。
+内存中只保留一个按字节预算淘汰的LRU缓存，长期运行的进程内存占用不会随查询数量增长。
+"""
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+import copy
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+# 默认存储路径
+DEFAULT_STORE_PATH = os.getenv("LITERATURE_STORE_PATH", os.path.join("data", "literature", "store.db"))
+# 默认内存缓存预算（字节）
+DEFAULT_CACHE_BYTES = int(os.getenv("LITERATURE_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+def _scalar(value: Any) -> Any:
+    """索引列只保存标量值"""
+    return value if isinstance(value, (int, float, str)) or value is None else None
+
+class ByteBudgetLRU:
+    """按序列化字节数计算容量的LRU缓存"""
+
+    def __init__(self, max_bytes: int):
+        """
+        初始化缓存
+
+        Args:
+            max_bytes: 缓存条目的字节总预算，单个条目超过预算时不缓存
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[Any, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Optional[Any]:
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key: Any, value: Any, size: int) -> None:
+        with self._lock:
+            self._discard(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+
+    def invalidate(self, key: Any) -> None:
+        with self._lock:
+            self._discard(key)
+
+    def _discard(self, key: Any) -> None:
+        if key in self._entries:
+            _, size = self._entries.pop(key)
+            self.current_bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+class LiteratureStore:
+    """基于SQLite的文献存储"""
+
+    def __init__(self, db_path: str = DEFAULT_STORE_PATH, cache_bytes: int = DEFAULT_CACHE_BYTES):
+        """
+        初始化文献存储
+
+        Args:
+            db_path: 数据库路径，":memory:" 表示仅在内存中保存
+            cache_bytes: 内存LRU缓存的字节预算
+        """
+        self.db_path = db_path
+        self.cache = ByteBudgetLRU(cache_bytes)
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path) if db_path != ":memory:" else ""
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS collected_papers (
+                id INTEGER PRIMARY KEY,
+                query TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                title TEXT,
+                doi TEXT,
+                year,
+                citations,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_collected_query ON collected_papers (query, position);
+            CREATE INDEX IF NOT EXISTS idx_collected_doi ON collected_papers (doi);
+            CREATE INDEX IF NOT EXISTS idx_collected_title ON collected_papers (title);
+            CREATE INDEX IF NOT EXISTS idx_collected_year ON collected_papers (year);
+            CREATE TABLE IF NOT EXISTS collections (
+                query TEXT PRIMARY KEY,
+                paper_count INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS parsed_papers (
+                paper_id TEXT PRIMARY KEY,
+                title TEXT,
+                doi TEXT,
+                year,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_parsed_doi ON parsed_papers (doi);
+            CREATE INDEX IF NOT EXISTS idx_parsed_title ON parsed_papers (title);
+            CREATE INDEX IF NOT EXISTS idx_parsed_year ON parsed_papers (year);
+        """)
+
+    def save_collection(self, query: str, papers: List[Dict[str, Any]]) -> None:
+        """保存某个查询的文献列表（覆盖已有结果）
+
+        Args:
+            query: 查询
+            papers: 文献列表
+        """
+        rows = []
+        size = 0
+        for position, paper in enumerate(papers):
+            data = json.dumps(paper, ensure_ascii=False, default=str)
+            size += len(data)
+            rows.append((query, position, _scalar(paper.get("title")), _scalar(paper.get("doi")),
+                         _scalar(paper.get("year")), _scalar(paper.get("citations", 0)), data))
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM collected_papers WHERE query = ?", (query,))
+            self._conn.executemany(
+                "INSERT INTO collected_papers (query, position, title, doi, year, citations, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.execute("INSERT OR REPLACE INTO collections (query, paper_count) VALUES (?, ?)",
+                               (query, len(rows)))
+        self.cache.put(("collection", query), copy.deepcopy(papers), size)
+
+    def has_collection(self, query: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM collections WHERE query = ?", (query,)).fetchone() is not None
+
+    def load_collection(self, query: str) -> Optional[List[Dict[str, Any]]]:
+        """读取某个查询的文献列表
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: 文献列表（副本），查询未保存时返回None
+        """
+        papers = self.cache.get(("collection", query))
+        if papers is None:
+            if not self.has_collection(query):
+                return None
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT data FROM collected_papers WHERE query = ? ORDER BY position", (query,)
+                ).fetchall()
+            papers = [json.loads(data) for data, in rows]
+            self.cache.put(("collection", query), papers, sum(len(data) for data, in rows))
+        return copy.deepcopy(papers)
+
+    def delete_collection(self, query: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM collected_papers WHERE query = ?", (query,))
+            self._conn.execute("DELETE FROM collections WHERE query = ?", (query,))
+        self.cache.invalidate(("collection", query))
+
+    def collection_statistics(self, query: str) -> Optional[Dict[str, Any]]:
+        """通过SQL聚合计算某个查询的文献统计
+
+        Returns:
+            Optional[Dict[str, Any]]: 文献总数、年份分布和引用分布，查询未保存时返回None
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT paper_count FROM collections WHERE query = ?", (query,)).fetchone()
+            if row is None:
+                return None
+            year_rows = self._conn.execute(
+                "SELECT year, COUNT(*) FROM collected_papers "
+                "WHERE query = ? AND year IS NOT NULL AND year != 0 AND year != '' "
+                "GROUP BY year ORDER BY MIN(position)", (query,)
+            ).fetchall()
+            citation_rows = self._conn.execute(
+                "SELECT citations, COUNT(*) FROM collected_papers WHERE query = ? "
+                "GROUP BY citations ORDER BY MIN(position)", (query,)
+            ).fetchall()
+        return {
+            "total_papers": row[0],
+            "year_distribution": dict(year_rows),
+            "citation_distribution": dict(citation_rows)
+        }
+
+    def find_papers(self, doi: Optional[str] = None, title: Optional[str] = None,
+                    year_range: Optional[Tuple[int, int]] = None) -> List[Dict[str, Any]]:
+        """按DOI、标题和年份范围查找已收集的文献（使用索引列）"""
+        conditions, params = [], []
+        if doi is not None:
+            conditions.append("doi = ?")
+            params.append(doi)
+        if title is not None:
+            conditions.append("title = ?")
+            params.append(title)
+        if year_range is not None:
+            conditions.append("year BETWEEN ? AND ?")
+            params.extend(year_range)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT data FROM collected_papers {where} ORDER BY id", params).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def save_parsed(self, paper_id: str, paper: Dict[str, Any]) -> None:
+        """保存解析后的论文
+
+        Args:
+            paper_id: 论文ID
+            paper: 解析后的论文数据，包含 metadata 等字段
+        """
+        data = json.dumps(paper, ensure_ascii=False, default=str)
+        metadata = paper.get("metadata", {})
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parsed_papers (paper_id, title, doi, year, data) VALUES (?, ?, ?, ?, ?)",
+                (paper_id, _scalar(metadata.get("title")), _scalar(metadata.get("doi")),
+                 _scalar(metadata.get("year")), data)
+            )
+        self.cache.put(("parsed", paper_id), copy.deepcopy(paper), len(data))
+
+    def load_parsed(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        """读取解析后的论文，不存在时返回None"""
+        paper = self.cache.get(("parsed", paper_id))
+        if paper is None:
+            with self._lock:
+                row = self._conn.execute("SELECT data FROM parsed_papers WHERE paper_id = ?", (paper_id,)).fetchone()
+            if row is None:
+                return None
+            paper = json.loads(row[0])
+            self.cache.put(("parsed", paper_id), paper, len(row[0]))
+        return copy.deepcopy(paper)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -5,6 +5,7 @@
 2. 规则验证器 (validator.py) - 提供规则验证功能
 3. 规则定义器 (definer.py) - 提供规则定义功能
 4. 规则应用器 (applier.py) - 提供规则应用功能
+5. 规则条件 (condition.py) - 将条件编译为白名单运算的闭包
 """
 
 from .engine import RuleEngine
@@ -0,0 +1,258 @@
+"""Rule Condition Module
+
+将规则条件字符串解析为抽象语法树，并编译为只支持白名单运算的闭包。
+条件中的 paper.<字段> 直接从上下文字典中取值，不再做字符串替换和 eval。
+
+支持的语法：
+- 字段访问：paper.word_count、paper["word_count"]
+- 字面量：数字、字符串、True/False/None、列表、元组、集合
+- 运算：+ - * / // %、一元 + - not、and/or（不支持 **，避免超大整数运算；
+  % 只用于数值，字符串、列表、元组的重复结果长度不超过 MAX_REPEAT_LENGTH）
+- 比较：== != < <= > >= in not in is is not（支持链式比较）
+- 函数：len、abs、min、max、round
+"""
+
+import ast
+import numbers
+import operator
+from functools import lru_cache
+from typing import Any, Callable, Dict
+
+Context = Dict[str, Any]
+Evaluator = Callable[[Context], Any]
+
+# 条件中引用上下文的变量名
+CONTEXT_NAME = "paper"
+# 字符串、列表、元组重复运算结果的最大长度
+MAX_REPEAT_LENGTH = 10000
+
+_SEQUENCE_TYPES = (str, bytes, list, tuple)
+
+class ConditionError(ValueError):
+    """条件解析或求值失败"""
+
+def _multiply(left: Any, right: Any) -> Any:
+    """乘法；序列重复时限制结果长度，避免条件分配过多内存"""
+    sequence, count = (left, right) if isinstance(left, _SEQUENCE_TYPES) else (right, left)
+    if isinstance(sequence, _SEQUENCE_TYPES) and isinstance(count, int):
+        if len(sequence) * max(count, 0) > MAX_REPEAT_LENGTH:
+            raise ConditionError(f"重复运算结果超过 {MAX_REPEAT_LENGTH} 个元素")
+    return operator.mul(left, right)
+
+def _modulo(left: Any, right: Any) -> Any:
+    """取模，只支持数值（不支持字符串格式化）"""
+    if not (isinstance(left, numbers.Number) and isinstance(right, numbers.Number)):
+        raise ConditionError("取模运算只支持数值")
+    return operator.mod(left, right)
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: _multiply,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: _modulo
+}
+
+_UNARY_OPERATORS = {
+    ast.Not: operator.not_,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos
+}
+
+_COMPARE_OPERATORS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not
+}
+
+_FUNCTIONS = {
+    "len": len,
+    "abs": abs,
+    "min": min,
+    "max": max,
+    "round": round
+}
+
+# 比较运算的文本形式，用于判断条件是否包含比较
+COMPARISON_OPERATORS = (">", "<", ">=", "<=", "==", "!=")
+
+class CompiledCondition:
+    """已编译的规则条件"""
+
+    def __init__(self, source: str, evaluator: Evaluator, fields: frozenset):
+        self.source = source
+        self.fields = fields  # 条件引用的上下文字段
+        self._evaluator = evaluator
+
+    def __call__(self, context: Context) -> bool:
+        """在上下文上求值
+
+        Raises:
+            ConditionError: 缺少字段或运算出错
+        """
+        try:
+            return bool(self._evaluator(context))
+        except ConditionError:
+            raise
+        except Exception as e:
+            raise ConditionError(f"条件求值失败: {self.source}: {e}") from e
+
+    def __repr__(self) -> str:
+        return f"CompiledCondition({self.source!r})"
+
+def _field_getter(field: str) -> Evaluator:
+    def get(context: Context) -> Any:
+        try:
+            return context[field]
+        except KeyError:
+            raise ConditionError(f"上下文缺少字段: {CONTEXT_NAME}.{field}") from None
+    return get
+
+class _Compiler:
+    """将白名单内的 AST 节点编译为闭包"""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.fields = set()
+
+    def compile(self, node: ast.AST) -> Evaluator:
+        method = getattr(self, f"_compile_{type(node).__name__}", None)
+        if method is None:
+            raise ConditionError(f"条件中不支持的语法 {type(node).__name__}: {self.source}")
+        return method(node)
+
+    def _compile_Expression(self, node: ast.Expression) -> Evaluator:
+        return self.compile(node.body)
+
+    def _compile_Constant(self, node: ast.Constant) -> Evaluator:
+        value = node.value
+        return lambda context: value
+
+    def _compile_Attribute(self, node: ast.Attribute) -> Evaluator:
+        if not (isinstance(node.value, ast.Name) and node.value.id == CONTEXT_NAME):
+            raise ConditionError(f"只能访问 {CONTEXT_NAME} 的字段: {self.source}")
+        self.fields.add(node.attr)
+        return _field_getter(node.attr)
+
+    def _compile_Subscript(self, node: ast.Subscript) -> Evaluator:
+        key = node.slice
+        if isinstance(node.value, ast.Name) and node.value.id == CONTEXT_NAME:
+            if not (isinstance(key, ast.Constant) and isinstance(key.value, str)):
+                raise ConditionError(f"{CONTEXT_NAME}[...] 只支持字符串字段名: {self.source}")
+            self.fields.add(key.value)
+            return _field_getter(key.value)
+        value, index = self.compile(node.value), self.compile(key)
+        return lambda context: value(context)[index(context)]
+
+    def _compile_Name(self, node: ast.Name) -> Evaluator:
+        raise ConditionError(f"未知的变量 {node.id}，请使用 {CONTEXT_NAME}.<字段>: {self.source}")
+
+    def _compile_sequence(self, node, factory) -> Evaluator:
+        items = [self.compile(item) for item in node.elts]
+        return lambda context: factory(item(context) for item in items)
+
+    def _compile_List(self, node: ast.List) -> Evaluator:
+        return self._compile_sequence(node, list)
+
+    def _compile_Tuple(self, node: ast.Tuple) -> Evaluator:
+        return self._compile_sequence(node, tuple)
+
+    def _compile_Set(self, node: ast.Set) -> Evaluator:
+        return self._compile_sequence(node, set)
+
+    def _compile_BoolOp(self, node: ast.BoolOp) -> Evaluator:
+        values = [self.compile(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            def evaluate(context: Context) -> Any:
+                result = True
+                for value in values:
+                    result = value(context)
+                    if not result:
+                        return result
+                return result
+        else:
+            def evaluate(context: Context) -> Any:
+                result = False
+                for value in values:
+                    result = value(context)
+                    if result:
+                        return result
+                return result
+        return evaluate
+
+    def _compile_UnaryOp(self, node: ast.UnaryOp) -> Evaluator:
+        op = _UNARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise ConditionError(f"条件中不支持的运算 {type(node.op).__name__}: {self.source}")
+        operand = self.compile(node.operand)
+        return lambda context: op(operand(context))
+
+    def _compile_BinOp(self, node: ast.BinOp) -> Evaluator:
+        op = _BINARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise ConditionError(f"条件中不支持的运算 {type(node.op).__name__}: {self.source}")
+        left, right = self.compile(node.left), self.compile(node.right)
+        return lambda context: op(left(context), right(context))
+
+    def _compile_Compare(self, node: ast.Compare) -> Evaluator:
+        ops = []
+        for op_node in node.ops:
+            op = _COMPARE_OPERATORS.get(type(op_node))
+            if op is None:
+                raise ConditionError(f"条件中不支持的比较 {type(op_node).__name__}: {self.source}")
+            ops.append(op)
+        left = self.compile(node.left)
+        comparators = [self.compile(comparator) for comparator in node.comparators]
+
+        if len(ops) == 1:
+            op, right = ops[0], comparators[0]
+            return lambda context: op(left(context), right(context))
+
+        pairs = list(zip(ops, comparators))
+        def evaluate(context: Context) -> bool:
+            current = left(context)
+            for op, comparator in pairs:
+                value = comparator(context)
+                if not op(current, value):
+                    return False
+                current = value
+            return True
+        return evaluate
+
+    def _compile_Call(self, node: ast.Call) -> Evaluator:
+        if not (isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS) or node.keywords:
+            raise ConditionError(f"条件中只能调用 {', '.join(_FUNCTIONS)}: {self.source}")
+        function = _FUNCTIONS[node.func.id]
+        args = [self.compile(arg) for arg in node.args]
+        return lambda context: function(*(arg(context) for arg in args))
+
+@lru_cache(maxsize=1024)
+def compile_condition(condition: str) -> CompiledCondition:
+    """解析并编译条件，相同条件字符串只编译一次
+
+    Args:
+        condition: 条件字符串，如 "paper.word_count >= 5000 and paper.year > 2018"
+
+    Returns:
+        CompiledCondition: 可在上下文字典上求值的条件
+
+    Raises:
+        ConditionError: 条件语法错误或使用了白名单以外的语法
+    """
+    if not isinstance(condition, str) or not condition.strip():
+        raise ConditionError("条件不能为空")
+    try:
+        tree = ast.parse(condition.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ConditionError(f"条件语法错误: {condition}: {e.msg}") from e
+    compiler = _Compiler(condition)
+    evaluator = compiler.compile(tree)
+    return CompiledCondition(condition, evaluator, frozenset(compiler.fields))
@@ -7,6 +7,7 @@ processing and applying rules to the knowledge graph.
 import logging
 from typing import Dict, Any, List, Optional
 
+from .condition import CompiledCondition, ConditionError, compile_condition, COMPARISON_OPERATORS
 from .definer import RuleDefiner
 from .validator import RuleValidator
 from .applier import RuleApplier
@@ -21,6 +22,7 @@ class RuleEngine:
         self.rule_validator = RuleValidator()
         self.rule_applier = RuleApplier()
         self.rules = {}
+        self.conditions: Dict[str, CompiledCondition] = {}  # 规则ID -> 已编译的条件
     
     def define_rule(self, rule_id: str, rule_data: Dict[str, Any]) -> bool:
         """定义规则
@@ -42,17 +44,22 @@ class RuleEngine:
             if not rule_data or not isinstance(rule_data, dict):
                 raise ValueError("Rule data must be a non-empty dictionary")
                 
+            # 编译条件，条件无效时拒绝定义
+            condition = compile_condition(rule_data["condition"]) if "condition" in rule_data else None
+                
             # 定义规则
-            rule = self.rule_definer.define_rule(rule_data)
-            if not rule:
-                return False
+            self.rule_definer.define_rule(rule_id, rule_data)
+            rule = self.rule_definer.get_rule(rule_id)
                 
             # 验证规则
-            if not self.rule_validator.validate_rule(rule):
+            if not self.rule_definer.validate_rule(rule_id):
+                self.rule_definer.remove_rule(rule_id)
+                self.logger.error(f"Rule rejected by validation: {rule_id}")
                 return False
                 
             # 存储规则
             self.rules[rule_id] = rule
+            self._set_condition(rule_id, condition)
             
             self.logger.info(f"Defined rule: {rule_id}")
             return True
@@ -93,6 +100,10 @@ class RuleEngine:
             raise ValueError(f"规则不存在: {rule_id}")
             
         del self.rules[rule_id]
+        self.conditions.pop(rule_id, None)
+        # 通过 define_rule 定义的规则同时保存在定义器中
+        if rule_id in self.rule_definer.rules:
+            self.rule_definer.remove_rule(rule_id)
         self.logger.info(f"规则已删除: {rule_id}")
         return True
     
@@ -185,16 +196,32 @@ class RuleEngine:
             self.logger.error(f"无效的规则类型: {rule['type']}")
             raise ValueError(f"无效的规则类型: {rule['type']}")
             
-        # 验证条件
+        # 验证并编译条件
         if not self._is_valid_condition(rule["condition"]):
             self.logger.error(f"无效的条件: {rule['condition']}")
             raise ValueError(f"无效的条件: {rule['condition']}")
             
         # 添加规则
         self.rules[rule["id"]] = rule
+        self._set_condition(rule["id"], compile_condition(rule["condition"]))
         self.logger.info(f"添加规则: {rule['id']}")
         return True
     
+    def _set_condition(self, rule_id: str, condition: Optional[CompiledCondition]) -> None:
+        if condition is None:
+            self.conditions.pop(rule_id, None)
+        else:
+            self.conditions[rule_id] = condition
+    
+    def _get_condition(self, rule_id: str) -> CompiledCondition:
+        """获取规则的已编译条件，规则条件被直接修改过时重新编译"""
+        condition = self.conditions.get(rule_id)
+        source = self.rules[rule_id]["condition"]
+        if condition is None or condition.source != source:
+            condition = compile_condition(source)
+            self.conditions[rule_id] = condition
+        return condition
+    
     def _is_valid_condition(self, condition: str) -> bool:
         """检查条件是否有效
         
@@ -202,10 +229,16 @@ class RuleEngine:
             condition: 条件字符串
             
         Returns:
-            bool: 条件是否有效
+            bool: 条件是否有效（能够编译且包含比较运算）
         """
-        valid_operators = [">", "<", ">=", "<=", "==", "!="]
-        return any(op in condition for op in valid_operators)
+        if not isinstance(condition, str) or not any(op in condition for op in COMPARISON_OPERATORS):
+            return False
+        try:
+            compile_condition(condition)
+        except ConditionError as e:
+            self.logger.warning(str(e))
+            return False
+        return True
     
     def evaluate_rules(self, context: Dict[str, Any]) -> bool:
         """评估所有规则
@@ -215,14 +248,51 @@ class RuleEngine:
             
         Returns:
             bool: 是否所有规则都满足条件
+            
+        Raises:
+            ValueError: 条件评估失败
         """
         for rule_id, rule in self.rules.items():
-            condition = rule["condition"]
-            if not self._evaluate_condition(condition, context):
+            if "condition" not in rule:
+                continue
+            if not self._get_condition(rule_id)(context):
                 self.logger.warning(f"规则 {rule_id} 条件不满足")
                 return False
         return True
     
+    def evaluate_rules_batch(self, contexts: List[Dict[str, Any]],
+                             rule_ids: Optional[List[str]] = None) -> List[Dict[str, bool]]:
+        """批量评估规则
+        
+        每条规则的条件只取一次编译结果，按规则逐个遍历全部上下文。
+        单个上下文求值失败（如缺少字段）时该规则记为不满足，不影响其他上下文。
+        
+        Args:
+            contexts: 上下文数据列表
+            rule_ids: 要评估的规则ID，默认评估所有带条件的规则
+            
+        Returns:
+            List[Dict[str, bool]]: 与 contexts 对应的 {规则ID: 是否满足} 列表
+        """
+        if rule_ids is None:
+            rule_ids = [rule_id for rule_id, rule in self.rules.items() if "condition" in rule]
+            
+        results = [{} for _ in contexts]
+        for rule_id in rule_ids:
+            if rule_id not in self.rules:
+                raise ValueError(f"Rule not found: {rule_id}")
+            condition = self._get_condition(rule_id)
+            failures = 0
+            for result, context in zip(results, contexts):
+                try:
+                    result[rule_id] = condition(context)
+                except ConditionError:
+                    result[rule_id] = False
+                    failures += 1
+            if failures:
+                self.logger.warning(f"规则 {rule_id} 在 {failures} 个上下文中评估失败")
+        return results
+    
     def _evaluate_condition(self, condition: str, context: Dict[str, Any]) -> bool:
         """评估条件
         
@@ -237,14 +307,7 @@ class RuleEngine:
             ValueError: 条件评估失败
         """
         try:
-            # 替换上下文变量
-            for key, value in context.items():
-                condition = condition.replace(f"paper.{key}", str(value))
-                
-            # 评估条件
-            result = eval(condition, {"__builtins__": {}}, {})
-            return bool(result)
-            
-        except Exception as e:
+            return compile_condition(condition)(context)
+        except ConditionError as e:
             self.logger.error(f"评估条件时出错: {e}")
-            raise ValueError(f"条件评估失败: {e}") 
\ No newline at end of file
+            raise ValueError(f"条件评估失败: {e}")
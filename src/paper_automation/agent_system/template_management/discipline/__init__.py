@@ -1,10 +1,14 @@
 from .template_lib import TemplateLibrary
 from .template_mapper import TemplateMapper
 from .analyzer import TemplateAnalyzer, DisciplineAnalyzer
+from .feature_cache import DisciplineFeatureCache
+from .template_index import TemplateIndex
 
 __all__ = [
     'TemplateLibrary',
     'TemplateMapper',
     'TemplateAnalyzer',
-    'DisciplineAnalyzer'
+    'DisciplineAnalyzer',
+    'DisciplineFeatureCache',
+    'TemplateIndex'
 ] 
\ No newline at end of file
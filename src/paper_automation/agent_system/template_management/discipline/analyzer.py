@@ -1,10 +1,14 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import logging
 from paper_automation.agent_system.template_management.base.template import Template
-from ...knowledge_management.knowledge_graph.base.knowledge_graph_analyzer import GraphAnalyzer
+from ...knowledge_management.knowledge_graph.base.knowledge_graph_analyzer import KnowledgeGraphAnalyzer
 from ...knowledge_management.knowledge_graph.base.builder import GraphBuilder
+from .feature_cache import DisciplineGraph, DisciplineFeatureCache, get_feature_cache
 import networkx as nx
 
+# 学科特征分析逻辑的版本，修改 _analyze_* 等特征计算方法时递增，使已缓存（包括已持久化）的旧特征失效
+FEATURE_VERSION = 1
+
 class TemplateAnalyzer:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
@@ -202,11 +206,17 @@ class TemplateAnalyzer:
 class DisciplineAnalyzer:
     """学科分析器类"""
     
-    def __init__(self):
-        """初始化学科分析器"""
+    def __init__(self, feature_cache: Optional[DisciplineFeatureCache] = None):
+        """初始化学科分析器
+        
+        Args:
+            feature_cache: 学科特征缓存，默认使用进程内共享的缓存（设置 DISCIPLINE_FEATURE_CACHE_PATH 时持久化）
+        """
         self.logger = logging.getLogger(__name__)
         self.builder = GraphBuilder()
-        self.graph_analyzer = GraphAnalyzer(self.builder)
+        self.graph_analyzer = KnowledgeGraphAnalyzer(self.builder)
+        self.feature_cache = feature_cache if feature_cache is not None else get_feature_cache()
+        self._graph_index: Optional[DisciplineGraph] = None
         
     def analyze_discipline(self, discipline: str) -> Dict[str, Any]:
         """分析学科特征
@@ -253,6 +263,12 @@ class DisciplineAnalyzer:
             Dict[str, Any]: 结构特征字典
         """
         try:
+            # 图谱未变化时直接使用缓存的特征
+            graph_key = self._feature_cache_key()
+            cached = self.feature_cache.get(discipline, "structure", graph_key)
+            if cached is not None:
+                return cached
+                
             # 分析章节模式
             chapter_patterns = self._analyze_chapter_patterns(discipline)
             
@@ -276,6 +292,7 @@ class DisciplineAnalyzer:
                 "element_patterns": element_patterns,
                 "metrics": metrics
             }
+            features = self.feature_cache.put(discipline, "structure", graph_key, features)
             
             self.logger.info(f"Successfully analyzed structure features for discipline: {discipline}")
             return features
@@ -286,17 +303,17 @@ class DisciplineAnalyzer:
             
     def _analyze_chapter_patterns(self, discipline: str) -> Dict[str, Any]:
         """分析章节模式"""
-        # 获取学科知识图谱
-        graph = self._get_discipline_graph(discipline)
+        # 获取学科知识图谱及其类型索引
+        index = self._get_graph_index()
         
         # 分析章节类型
-        chapter_types = self._analyze_chapter_types(graph)
+        chapter_types = self._analyze_chapter_types(index)
         
         # 分析章节顺序
-        chapter_order = self._analyze_chapter_order(graph)
+        chapter_order = self._analyze_chapter_order(index)
         
         # 分析章节依赖
-        chapter_dependencies = self._analyze_chapter_dependencies(graph)
+        chapter_dependencies = self._analyze_chapter_dependencies(index)
         
         return {
             "types": chapter_types,
@@ -306,17 +323,17 @@ class DisciplineAnalyzer:
         
     def _analyze_section_patterns(self, discipline: str) -> Dict[str, Any]:
         """分析板块模式"""
-        # 获取学科知识图谱
-        graph = self._get_discipline_graph(discipline)
+        # 获取学科知识图谱及其类型索引
+        index = self._get_graph_index()
         
         # 分析板块类型
-        section_types = self._analyze_section_types(graph)
+        section_types = self._analyze_section_types(index)
         
         # 分析板块关系
-        section_relationships = self._analyze_section_relationships(graph)
+        section_relationships = self._analyze_section_relationships(index)
         
         # 分析板块层次
-        section_hierarchy = self._analyze_section_hierarchy(graph)
+        section_hierarchy = self._analyze_section_hierarchy(index)
         
         return {
             "types": section_types,
@@ -326,17 +343,17 @@ class DisciplineAnalyzer:
         
     def _analyze_paragraph_patterns(self, discipline: str) -> Dict[str, Any]:
         """分析段落模式"""
-        # 获取学科知识图谱
-        graph = self._get_discipline_graph(discipline)
+        # 获取学科知识图谱及其类型索引
+        index = self._get_graph_index()
         
         # 分析段落类型
-        paragraph_types = self._analyze_paragraph_types(graph)
+        paragraph_types = self._analyze_paragraph_types(index)
         
         # 分析段落结构
-        paragraph_structures = self._analyze_paragraph_structures(graph)
+        paragraph_structures = self._analyze_paragraph_structures(index)
         
         # 分析段落转换
-        paragraph_transitions = self._analyze_paragraph_transitions(graph)
+        paragraph_transitions = self._analyze_paragraph_transitions(index)
         
         return {
             "types": paragraph_types,
@@ -346,17 +363,17 @@ class DisciplineAnalyzer:
         
     def _analyze_element_patterns(self, discipline: str) -> Dict[str, Any]:
         """分析元素模式"""
-        # 获取学科知识图谱
-        graph = self._get_discipline_graph(discipline)
+        # 获取学科知识图谱及其类型索引
+        index = self._get_graph_index()
         
         # 分析元素类型
-        element_types = self._analyze_element_types(graph)
+        element_types = self._analyze_element_types(index)
         
         # 分析元素关系
-        element_relationships = self._analyze_element_relationships(graph)
+        element_relationships = self._analyze_element_relationships(index)
         
         # 分析元素约束
-        element_constraints = self._analyze_element_constraints(graph)
+        element_constraints = self._analyze_element_constraints(index)
         
         return {
             "types": element_types,
@@ -366,23 +383,23 @@ class DisciplineAnalyzer:
         
     def _calculate_structural_metrics(self, discipline: str) -> Dict[str, Any]:
         """计算结构指标"""
-        # 获取学科知识图谱
-        graph = self._get_discipline_graph(discipline)
+        # 获取学科知识图谱及其类型索引
+        index = self._get_graph_index()
         
         # 分析图结构
         graph_analysis = self.graph_analyzer.analyze_structure()
         
         # 计算章节指标
-        chapter_metrics = self._calculate_chapter_metrics(graph)
+        chapter_metrics = self._calculate_chapter_metrics(index)
         
         # 计算板块指标
-        section_metrics = self._calculate_section_metrics(graph)
+        section_metrics = self._calculate_section_metrics(index)
         
         # 计算段落指标
-        paragraph_metrics = self._calculate_paragraph_metrics(graph)
+        paragraph_metrics = self._calculate_paragraph_metrics(index)
         
         # 计算元素指标
-        element_metrics = self._calculate_element_metrics(graph)
+        element_metrics = self._calculate_element_metrics(index)
         
         return {
             "graph": graph_analysis,
@@ -392,6 +409,27 @@ class DisciplineAnalyzer:
             "elements": element_metrics
         }
         
+    def _get_graph_index(self) -> DisciplineGraph:
+        """获取学科知识图谱及其类型索引
+        
+        图谱在图构建器的每个版本下只构建一次；直接修改节点属性而不经过构建器的增删方法时，
+        版本号不变，图谱不会重建。
+        
+        Returns:
+            DisciplineGraph: 学科知识图谱及其类型索引
+        """
+        try:
+            if self._graph_index is None or self._graph_index.version != self.builder.version:
+                self._graph_index = DisciplineGraph(self.builder.nodes, self.builder.edges, self.builder.version)
+            return self._graph_index
+        except Exception as e:
+            self.logger.error(f"Error getting discipline graph: {e}")
+            raise
+            
+    def _feature_cache_key(self) -> str:
+        """特征缓存键，由特征分析逻辑的版本和学科知识图谱的指纹组成"""
+        return f"v{FEATURE_VERSION}:{self._get_graph_index().fingerprint}"
+            
     def _get_discipline_graph(self, discipline: str) -> nx.Graph:
         """获取学科知识图谱
         
@@ -401,39 +439,25 @@ class DisciplineAnalyzer:
         Returns:
             nx.Graph: 学科知识图谱
         """
-        try:
-            # 创建一个新的图谱
-            graph = nx.Graph()
-            
-            # 从 builder 中获取节点和边
-            for node_id, node_data in self.builder.nodes.items():
-                graph.add_node(node_id, **node_data)
-                
-            for edge_id, edge_data in self.builder.edges.items():
-                graph.add_edge(edge_data["source"], edge_data["target"], **edge_data)
-                
-            return graph
-        except Exception as e:
-            self.logger.error(f"Error getting discipline graph: {e}")
-            raise
+        return self._get_graph_index().graph
         
-    def _analyze_chapter_types(self, graph: nx.Graph) -> Dict[str, List[str]]:
+    def _analyze_chapter_types(self, index: DisciplineGraph) -> Dict[str, List[str]]:
         """分析章节类型
         
         Args:
-            graph: 学科知识图谱
+            index: 学科知识图谱及其类型索引
             
         Returns:
             Dict[str, List[str]]: 章节类型分析结果
         """
         try:
             # 获取所有章节节点
-            chapter_nodes = [node for node, data in graph.nodes(data=True) if data['type'] == 'chapter']
+            chapter_nodes = list(index.nodes_of('chapter'))
             
             # 分析每个章节的类型
             chapter_types = {}
             for node in chapter_nodes:
-                node_type = graph.nodes[node]['type']
+                node_type = index.graph.nodes[node]['type']
                 if node_type not in chapter_types:
                     chapter_types[node_type] = []
                 chapter_types[node_type].append(node)
@@ -443,18 +467,18 @@ class DisciplineAnalyzer:
             self.logger.error(f"Error analyzing chapter types: {e}")
             raise
             
-    def _analyze_chapter_order(self, graph: nx.Graph) -> List[Dict[str, Any]]:
+    def _analyze_chapter_order(self, index: DisciplineGraph) -> List[Dict[str, Any]]:
         """分析章节顺序
         
         Args:
-            graph: 学科知识图谱
+            index: 学科知识图谱及其类型索引
             
         Returns:
             List[Dict[str, Any]]: 章节顺序分析结果
         """
         try:
             # 获取章节间的顺序关系
-            order_edges = [edge for edge in graph.edges(data=True) if edge[2]['type'] == 'sequential']
+            order_edges = index.edges_of('sequential')
             
             # 构建顺序列表
             chapter_order = []
@@ -470,18 +494,18 @@ class DisciplineAnalyzer:
             self.logger.error(f"Error analyzing chapter order: {e}")
             raise
             
-    def _analyze_chapter_dependencies(self, graph: nx.Graph) -> List[Dict[str, Any]]:
+    def _analyze_chapter_dependencies(self, index: DisciplineGraph) -> List[Dict[str, Any]]:
         """分析章节依赖
         
         Args:
-            graph: 学科知识图谱
+            index: 学科知识图谱及其类型索引
             
         Returns:
             List[Dict[str, Any]]: 章节依赖分析结果
         """
         try:
             # 获取章节间的依赖关系
-            dependency_edges = [edge for edge in graph.edges(data=True) if edge[2]['type'] == 'dependency']
+            dependency_edges = index.edges_of('dependency')
             
             # 构建依赖列表
             dependencies = []
@@ -497,23 +521,23 @@ class DisciplineAnalyzer:
             self.logger.error(f"Error analyzing chapter dependencies: {e}")
             raise
             
-    def _analyze_section_types(self, graph: nx.Graph) -> Dict[str, List[str]]:
+    def _analyze_section_types(self, index: DisciplineGraph) -> Dict[str, List[str]]:
         """分析板块类型
         
         Args:
-            graph: 学科知识图谱
+            index: 学科知识图谱及其类型索引
             
         Returns:
             Dict[str, List[str]]: 板块类型分析结果
         """
         try:
             # 获取所有板块节点
-            section_nodes = [node for node, data in graph.nodes(data=True) if data['type'] == 'section']
+            section_nodes = list(index.nodes_of('section'))
             
             # 分析每个板块的类型
             section_types = {}
             for node in section_nodes:
-                node_type = graph.nodes[node]['type']
+                node_type = index.graph.nodes[node]['type']
                 if node_type not in section_types:
                     section_types[node_type] = []
                 section_types[node_type].append(node)
@@ -523,18 +547,18 @@ class DisciplineAnalyzer:
             self.logger.error(f"Error analyzing section types: {e}")
             raise
             
-    def _analyze_section_relationships(self, graph: nx.Graph) -> List[Dict[str, Any]]:
+    def _analyze_section_relationships(self, index: DisciplineGraph) -> List[Dict[str, Any]]:
         """分析板块关系
         
         Args:
-            graph: 学科知识图谱
+            index: 学科知识图谱及其类型索引
             
         Returns:
             List[Dict[str, Any]]: 板块关系分析结果
         """
         try:
             # 获取板块间的关系
-            relationship_edges = [edge for edge in graph.edges(data=True) if edge[2]['type'] == 'relationship']
+            relationship_edges = index.edges_of('relationship')
             
             # 构建关系列表
             relationships = []
@@ -550,18 +574,18 @@ class DisciplineAnalyzer:
             self.logger.error(f"Error analyzing section relationships: {e}")
             raise
             
-    def _analyze_section_hierarchy(self, graph: nx.Graph) -> Dict[str, List[str]]:
+    def _analyze_section_hierarchy(self, index: DisciplineGraph) -> Dict[str, List[str]]:
         """分析板块层次
         
         Args:
-            graph: 学科知识图谱
+            index: 学科知识图谱及其类型索引
             
         Returns:
             Dict[str, List[str]]: 板块层次分析结果
         """
         try:
             # 获取板块的层次关系
-            hierarchy_edges = [edge for edge in graph.edges(data=True) if edge[2]['type'] == 'hierarchy']
+            hierarchy_edges = index.edges_of('hierarchy')
             
             # 构建层次结构
             hierarchy = {}
@@ -577,23 +601,23 @@ class DisciplineAnalyzer:
             self.logger.error(f"Error analyzing section hierarchy: {e}")
             raise
             
-    def _analyze_paragraph_types(self, graph: nx.Graph) -> Dict[str, List[str]]:
+    def _analyze_paragraph_types(self, index: DisciplineGraph) -> Dict[str, List[str]]:
         """分析段落类型
         
         Args:
-            graph: 学科知识图谱
+            index: 学科知识图谱及其类型索引
             
         Returns:
             Dict[str, List[str]]: 段落类型分析结果
         """
         try:
             # 获取所有段落节点
-            paragraph_nodes = [node for node, data in graph.nodes(data=True) if data['type'] == 'paragraph']
+            paragraph_nodes = list(index.nodes_of('paragraph'))
             
             # 分析每个段落的类型
             paragraph_types = {}
             for node in paragraph_nodes:
-                node_type = graph.nodes[node]['type']
+                node_type = index.graph.nodes[node]['type']
                 if node_type not in paragraph_types:
                     paragraph_types[node_type] = []
                 paragraph_types[node_type].append(node)
@@ -603,26 +627,26 @@ class DisciplineAnalyzer:
             self.logger.error(f"Error analyzing paragraph types: {e}")
             raise
     
-    def _analyze_paragraph_structures(self, graph: nx.Graph) -> Dict[str, Dict[str, Any]]:
+    def _analyze_paragraph_structures(self, index: DisciplineGraph) -> Dict[str, Dict[str, Any]]:
         """分析段落结构
         
         Args:
-            graph: 学科知识图谱
+            index: 学科知识图谱及其类型索引
             
         Returns:
             Dict[str, Dict[str, Any]]: 段落结构分析结果
         """
         try:
             # 获取所有段落节点
-            paragraph_nodes = [node for node, data in graph.nodes(data=True) if data['type'] == 'paragraph']
+            paragraph_nodes = list(index.nodes_of('paragraph'))
             
             # 分析每个段落的结构
             paragraph_structures = {}
             for node in paragraph_nodes:
                 paragraph_structures[node] = {
-                    "topic_sentence": graph.nodes[node].get('topic_sentence', ''),
-                    "supporting_points": graph.nodes[node].get('supporting_points', []),
-                    "conclusion": graph.nodes[node].get('conclusion', '')
+                    "topic_sentence": index.graph.nodes[node].get('topic_sentence', ''),
+                    "supporting_points": index.graph.nodes[node].get('supporting_points', []),
+                    "conclusion": index.graph.nodes[node].get('conclusion', '')
                 }
                 
             return paragraph_structures
@@ -630,18 +654,18 @@ class DisciplineAnalyzer:
             self.logger.error(f"Error analyzing paragraph structures: {e}")
             raise
             
-    def _analyze_paragraph_transitions(self, graph: nx.Graph) -> List[Dict[str, Any]]:
+    def _analyze_paragraph_transitions(self, index: DisciplineGraph) -> List[Dict[str, Any]]:
         """分析段落转换
         
         Args:
-            graph: 学科知识图谱
+            index: 学科知识图谱及其类型索引
             
         Returns:
             List[Dict[str, Any]]: 段落转换分析结果
         """
         try:
             # 获取段落间的转换关系
-            transition_edges = [edge for edge in graph.edges(data=True) if edge[2]['type'] == 'transition']
+            transition_edges = index.edges_of('transition')
             
             # 构建转换列表
             transitions = []
@@ -657,23 +681,23 @@ class DisciplineAnalyzer:
             self.logger.error(f"Error analyzing paragraph transitions: {e}")
             raise
             
-    def _analyze_element_types(self, graph: nx.Graph) -> Dict[str, List[str]]:
+    def _analyze_element_types(self, index: DisciplineGraph) -> Dict[str, List[str]]:
         """分析元素类型
         
         Args:
-            graph: 学科知识图谱
+            index: 学科知识图谱及其类型索引
             
         Returns:
             Dict[str, List[str]]: 元素类型分析结果
         """
         try:
             # 获取所有元素节点
-            element_nodes = [node for node, data in graph.nodes(data=True) if data['type'] == 'element']
+            element_nodes = list(index.nodes_of('element'))
             
             # 分析每个元素的类型
             element_types = {}
             for node in element_nodes:
-                node_type = graph.nodes[node]['type']
+                node_type = index.graph.nodes[node]['type']
                 if node_type not in element_types:
                     element_types[node_type] = []
                 element_types[node_type].append(node)
@@ -683,18 +707,18 @@ class DisciplineAnalyzer:
             self.logger.error(f"Error analyzing element types: {e}")
             raise
             
-    def _analyze_element_relationships(self, graph: nx.Graph) -> List[Dict[str, Any]]:
+    def _analyze_element_relationships(self, index: DisciplineGraph) -> List[Dict[str, Any]]:
         """分析元素关系
         
         Args:
-            graph: 学科知识图谱
+            index: 学科知识图谱及其类型索引
             
         Returns:
             List[Dict[str, Any]]: 元素关系分析结果
         """
         try:
             # 获取元素间的关系
-            relationship_edges = [edge for edge in graph.edges(data=True) if edge[2]['type'] == 'element_relationship']
+            relationship_edges = index.edges_of('element_relationship')
             
             # 构建关系列表
             relationships = []
@@ -710,27 +734,27 @@ class DisciplineAnalyzer:
             self.logger.error(f"Error analyzing element relationships: {e}")
             raise
             
-    def _analyze_element_constraints(self, graph: nx.Graph) -> Dict[str, Dict[str, Any]]:
+    def _analyze_element_constraints(self, index: DisciplineGraph) -> Dict[str, Dict[str, Any]]:
         """分析元素约束
         
         Args:
-            graph: 学科知识图谱
+            index: 学科知识图谱及其类型索引
             
         Returns:
             Dict[str, Dict[str, Any]]: 元素约束分析结果
         """
         try:
             # 获取所有元素节点
-            element_nodes = [node for node, data in graph.nodes(data=True) if data['type'] == 'element']
+            element_nodes = list(index.nodes_of('element'))
             
             # 分析每个元素的约束
             element_constraints = {}
             for node in element_nodes:
                 element_constraints[node] = {
-                    "min_length": graph.nodes[node].get('min_length', 0),
-                    "max_length": graph.nodes[node].get('max_length', float("inf")),
-                    "required": graph.nodes[node].get('required', False),
-                    "format": graph.nodes[node].get('format', 'text')
+                    "min_length": index.graph.nodes[node].get('min_length', 0),
+                    "max_length": index.graph.nodes[node].get('max_length', float("inf")),
+                    "required": index.graph.nodes[node].get('required', False),
+                    "format": index.graph.nodes[node].get('format', 'text')
                 }
                 
             return element_constraints
@@ -738,24 +762,24 @@ class DisciplineAnalyzer:
             self.logger.error(f"Error analyzing element constraints: {e}")
             raise
             
-    def _calculate_chapter_metrics(self, graph: nx.Graph) -> Dict[str, Any]:
+    def _calculate_chapter_metrics(self, index: DisciplineGraph) -> Dict[str, Any]:
         """计算章节指标
         
         Args:
-            graph: 学科知识图谱
+            index: 学科知识图谱及其类型索引
             
         Returns:
             Dict[str, Any]: 章节指标计算结果
         """
         try:
             # 获取章节节点
-            chapter_nodes = [node for node, data in graph.nodes(data=True) if data['type'] == 'chapter']
+            chapter_nodes = list(index.nodes_of('chapter'))
             
             # 计算指标
             metrics = {
                 "total_chapters": len(chapter_nodes),
-                "required_chapters": len([n for n in chapter_nodes if graph.nodes[n].get('required', False)]),
-                "average_sections": sum(len(list(graph.adj[n])) for n in chapter_nodes) / len(chapter_nodes) if chapter_nodes else 0
+                "required_chapters": len([n for n in chapter_nodes if index.graph.nodes[n].get('required', False)]),
+                "average_sections": sum(len(list(index.graph.adj[n])) for n in chapter_nodes) / len(chapter_nodes) if chapter_nodes else 0
             }
             
             return metrics
@@ -763,24 +787,24 @@ class DisciplineAnalyzer:
             self.logger.error(f"Error calculating chapter metrics: {e}")
             raise
             
-    def _calculate_section_metrics(self, graph: nx.Graph) -> Dict[str, Any]:
+    def _calculate_section_metrics(self, index: DisciplineGraph) -> Dict[str, Any]:
         """计算板块指标
         
         Args:
-            graph: 学科知识图谱
+            index: 学科知识图谱及其类型索引
             
         Returns:
             Dict[str, Any]: 板块指标计算结果
         """
         try:
             # 获取板块节点
-            section_nodes = [node for node, data in graph.nodes(data=True) if data['type'] == 'section']
+            section_nodes = list(index.nodes_of('section'))
             
             # 计算指标
             metrics = {
                 "total_sections": len(section_nodes),
-                "required_sections": len([n for n in section_nodes if graph.nodes[n].get('required', False)]),
-                "average_paragraphs": sum(len(list(graph.adj[n])) for n in section_nodes) / len(section_nodes) if section_nodes else 0
+                "required_sections": len([n for n in section_nodes if index.graph.nodes[n].get('required', False)]),
+                "average_paragraphs": sum(len(list(index.graph.adj[n])) for n in section_nodes) / len(section_nodes) if section_nodes else 0
             }
             
             return metrics
@@ -788,24 +812,24 @@ class DisciplineAnalyzer:
             self.logger.error(f"Error calculating section metrics: {e}")
             raise
             
-    def _calculate_paragraph_metrics(self, graph: nx.Graph) -> Dict[str, Any]:
+    def _calculate_paragraph_metrics(self, index: DisciplineGraph) -> Dict[str, Any]:
         """计算段落指标
         
         Args:
-            graph: 学科知识图谱
+            index: 学科知识图谱及其类型索引
             
         Returns:
             Dict[str, Any]: 段落指标计算结果
         """
         try:
             # 获取段落节点
-            paragraph_nodes = [node for node, data in graph.nodes(data=True) if data['type'] == 'paragraph']
+            paragraph_nodes = list(index.nodes_of('paragraph'))
             
             # 计算指标
             metrics = {
                 "total_paragraphs": len(paragraph_nodes),
-                "required_paragraphs": len([n for n in paragraph_nodes if graph.nodes[n].get('required', False)]),
-                "average_elements": sum(len(list(graph.adj[n])) for n in paragraph_nodes) / len(paragraph_nodes) if paragraph_nodes else 0
+                "required_paragraphs": len([n for n in paragraph_nodes if index.graph.nodes[n].get('required', False)]),
+                "average_elements": sum(len(list(index.graph.adj[n])) for n in paragraph_nodes) / len(paragraph_nodes) if paragraph_nodes else 0
             }
             
             return metrics
@@ -813,24 +837,24 @@ class DisciplineAnalyzer:
             self.logger.error(f"Error calculating paragraph metrics: {e}")
             raise
             
-    def _calculate_element_metrics(self, graph: nx.Graph) -> Dict[str, Any]:
+    def _calculate_element_metrics(self, index: DisciplineGraph) -> Dict[str, Any]:
         """计算元素指标
         
         Args:
-            graph: 学科知识图谱
+            index: 学科知识图谱及其类型索引
             
         Returns:
             Dict[str, Any]: 元素指标计算结果
         """
         try:
             # 获取元素节点
-            element_nodes = [node for node, data in graph.nodes(data=True) if data['type'] == 'element']
+            element_nodes = list(index.nodes_of('element'))
             
             # 计算指标
             metrics = {
                 "total_elements": len(element_nodes),
-                "required_elements": len([n for n in element_nodes if graph.nodes[n].get('required', False)]),
-                "element_types": len(set(graph.nodes[n]['type'] for n in element_nodes))
+                "required_elements": len([n for n in element_nodes if index.graph.nodes[n].get('required', False)]),
+                "element_types": len(set(index.graph.nodes[n]['type'] for n in element_nodes))
             }
             
             return metrics
@@ -873,13 +897,19 @@ class DisciplineAnalyzer:
             Dict[str, Any]: 语言特征数据
         """
         try:
+            graph_key = self._feature_cache_key()
+            cached = self.feature_cache.get(discipline, "language", graph_key)
+            if cached is not None:
+                return cached
+                
             # TODO: 实现语言特征分析逻辑
-            return {
+            features = {
                 "vocabulary": {},
                 "grammar": {},
                 "style": {},
                 "conventions": {}
             }
+            return self.feature_cache.put(discipline, "language", graph_key, features)
         except Exception as e:
             self.logger.error(f"Error analyzing language features: {e}")
             return {} 
\ No newline at end of file
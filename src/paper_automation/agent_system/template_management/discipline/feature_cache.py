@@ -0,0 +1,244 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+import copy
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import networkx as nx
+
+# 特征数据库路径，未设置或为空字符串时只在进程内缓存
+FEATURE_CACHE_PATH = os.getenv("DISCIPLINE_FEATURE_CACHE_PATH", "")
+# 进程内缓存的条目数
+FEATURE_CACHE_SIZE = int(os.getenv("DISCIPLINE_FEATURE_CACHE_SIZE", "256"))
+
+def _json_default(value: Any) -> Any:
+    # numpy 标量等带 item() 的值转为 Python 原生类型
+    item = getattr(value, "item", None)
+    if callable(item):
+        return item()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+def graph_fingerprint(nodes: Dict[str, Dict[str, Any]], edges: Dict[str, Dict[str, Any]]) -> str:
+    """计算图谱内容的指纹
+
+    Args:
+        nodes: 节点ID到节点数据的映射
+        edges: 边ID到边数据的映射
+
+    Returns:
+        str: 节点和边内容的 SHA-256（十六进制）；边ID由构建器随机生成，不参与计算
+    """
+    digest = hashlib.sha256()
+    edge_items = [{key: value for key, value in edge.items() if key != "id"} for edge in edges.values()]
+    for items in (list(nodes.items()), edge_items):
+        digest.update(json.dumps(items, ensure_ascii=False, sort_keys=True,
+                                 separators=(",", ":"), default=_json_default).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+class DisciplineGraph:
+    """学科知识图谱及其按类型的节点、边索引
+
+    图谱在图构建器的某一版本下只构建一次，各分析方法按类型直接取节点和边，无需再扫描整个图。
+    指纹在创建时计算；networkx 图和类型索引在首次使用时构建，特征缓存命中时不会构建。
+    """
+
+    def __init__(self, nodes: Dict[str, Dict[str, Any]], edges: Dict[str, Dict[str, Any]], version: int):
+        """初始化学科图谱
+
+        Args:
+            nodes: 节点ID到节点数据的映射
+            edges: 边ID到边数据的映射
+            version: 创建时图构建器的版本号
+        """
+        self.version = version
+        self.fingerprint = graph_fingerprint(nodes, edges)
+        self._nodes = nodes
+        self._edges = edges
+        self._graph: Optional[nx.Graph] = None
+        self._nodes_by_type: Dict[str, List[str]] = {}
+        self._edges_by_type: Dict[str, List[Tuple[str, str, Dict[str, Any]]]] = {}
+
+    @property
+    def graph(self) -> nx.Graph:
+        """学科知识图谱"""
+        if self._graph is None:
+            graph = nx.Graph()
+            for node_id, node_data in self._nodes.items():
+                graph.add_node(node_id, **node_data)
+            for edge_data in self._edges.values():
+                graph.add_edge(edge_data["source"], edge_data["target"], **edge_data)
+
+            for node, data in graph.nodes(data=True):
+                self._nodes_by_type.setdefault(data["type"], []).append(node)
+            for edge in graph.edges(data=True):
+                self._edges_by_type.setdefault(edge[2]["type"], []).append(edge)
+            self._graph = graph
+        return self._graph
+
+    def nodes_of(self, node_type: str) -> List[str]:
+        """指定类型的节点ID列表"""
+        if self._graph is None:
+            self.graph
+        return self._nodes_by_type.get(node_type, [])
+
+    def edges_of(self, edge_type: str) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """指定类型的边列表，元素为 (端点, 端点, 边数据)"""
+        if self._graph is None:
+            self.graph
+        return self._edges_by_type.get(edge_type, [])
+
+class DisciplineFeatureCache:
+    """学科特征缓存
+
+    特征按 (学科, 特征类别, 缓存键) 缓存，缓存键由分析器给出，包含特征分析逻辑的版本和图指纹（见 graph_fingerprint），
+    内容相同的图谱在不同分析器实例和进程中命中同一条目。设置数据库路径（DISCIPLINE_FEATURE_CACHE_PATH）时
+    特征同时保存到 SQLite，其他进程无需重新遍历图谱；默认只在进程内缓存。
+    无论是否命中，返回的都是特征经 JSON 序列化再解析后的副本。
+    """
+
+    def __init__(self, db_path: Optional[str] = FEATURE_CACHE_PATH, cache_size: int = FEATURE_CACHE_SIZE):
+        """初始化特征缓存
+
+        Args:
+            db_path: 特征数据库路径，为空时只在进程内缓存
+            cache_size: 进程内缓存的条目数
+        """
+        self.db_path = db_path or None
+        self.cache_size = cache_size
+        self.logger = logging.getLogger(__name__)
+        self._memory: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """按需打开特征数据库，打开失败时退回进程内缓存"""
+        if self._conn is None and self.db_path:
+            try:
+                directory = os.path.dirname(self.db_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                conn.executescript("""
+                    PRAGMA journal_mode=WAL;
+                    CREATE TABLE IF NOT EXISTS discipline_features (
+                        discipline TEXT NOT NULL,
+                        kind TEXT NOT NULL,
+                        graph_key TEXT NOT NULL,
+                        data TEXT NOT NULL,
+                        updated_at TEXT,
+                        PRIMARY KEY (discipline, kind, graph_key)
+                    ) WITHOUT ROWID;
+                """)
+                self._conn = conn
+            except sqlite3.Error as e:
+                self.logger.warning(f"无法打开学科特征数据库 {self.db_path}: {e}")
+                self.db_path = None
+        return self._conn
+
+    def _remember(self, key: Tuple[str, str, str], features: Dict[str, Any]) -> None:
+        self._memory[key] = features
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.cache_size:
+            self._memory.popitem(last=False)
+
+    def get(self, discipline: str, kind: str, graph_key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存的特征
+
+        Args:
+            discipline: 学科名称
+            kind: 特征类别，如 structure、language
+            graph_key: 缓存键，包含特征版本和图谱指纹
+
+        Returns:
+            Optional[Dict[str, Any]]: 特征的副本，未缓存时返回None
+        """
+        key = (discipline, kind, graph_key)
+        with self._lock:
+            features = self._memory.get(key)
+            if features is not None:
+                self._memory.move_to_end(key)
+                return copy.deepcopy(features)
+
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(
+                    "SELECT data FROM discipline_features WHERE discipline = ? AND kind = ? AND graph_key = ?",
+                    key
+                ).fetchone()
+            except sqlite3.Error as e:
+                self.logger.warning(f"读取学科特征缓存失败: {e}")
+                return None
+            if row is None:
+                return None
+            features = json.loads(row[0])
+            self._remember(key, features)
+            return copy.deepcopy(features)
+
+    def put(self, discipline: str, kind: str, graph_key: str, features: Dict[str, Any]) -> Dict[str, Any]:
+        """保存特征
+
+        Args:
+            discipline: 学科名称
+            kind: 特征类别
+            graph_key: 缓存键，包含特征版本和图谱指纹
+            features: 特征数据，需可序列化为JSON
+
+        Returns:
+            Dict[str, Any]: 保存的特征的副本，与之后命中缓存时 get 返回的数据相同
+        """
+        key = (discipline, kind, graph_key)
+        data = json.dumps(features, ensure_ascii=False, default=_json_default)
+        normalized = json.loads(data)
+        with self._lock:
+            self._remember(key, normalized)
+            conn = self._connect()
+            if conn is None:
+                return copy.deepcopy(normalized)
+            try:
+                with conn:
+                    # 同一学科和类别只保留最新图谱和特征版本的特征
+                    conn.execute("DELETE FROM discipline_features WHERE discipline = ? AND kind = ? AND graph_key != ?",
+                                 key)
+                    conn.execute(
+                        "INSERT OR REPLACE INTO discipline_features (discipline, kind, graph_key, data, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?)", key + (data, datetime.now().isoformat())
+                    )
+            except sqlite3.Error as e:
+                self.logger.warning(f"保存学科特征缓存失败: {e}")
+        return copy.deepcopy(normalized)
+
+    def clear(self) -> None:
+        """清空缓存（包括持久化的特征）"""
+        with self._lock:
+            self._memory.clear()
+            conn = self._connect()
+            if conn is not None:
+                with conn:
+                    conn.execute("DELETE FROM discipline_features")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+_shared_caches: Dict[Optional[str], DisciplineFeatureCache] = {}
+_shared_lock = threading.Lock()
+
+def get_feature_cache(db_path: Optional[str] = FEATURE_CACHE_PATH) -> DisciplineFeatureCache:
+    """获取指定路径的共享特征缓存，同一进程内的分析器共用一个实例"""
+    key = db_path or None
+    with _shared_lock:
+        cache = _shared_caches.get(key)
+        if cache is None:
+            cache = _shared_caches[key] = DisciplineFeatureCache(key)
+        return cache
@@ -0,0 +1,428 @@
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import zlib
+import numpy as np
+from ..base.template import Template
+from .analyzer import TemplateAnalyzer
+
+# 元素类型直方图的桶数
+TYPE_BUCKETS = int(os.getenv("TEMPLATE_INDEX_TYPE_BUCKETS", "16"))
+# 矩阵初始行数，容量不足时按倍数扩展
+INITIAL_CAPACITY = 1024
+# 共享索引的文件路径（.npz），未设置或为空字符串时只在进程内保存
+TEMPLATE_INDEX_PATH = os.getenv("TEMPLATE_INDEX_PATH", "")
+# 操作日志累计达到该条数时写入一次索引快照并清空日志
+INDEX_SNAPSHOT_INTERVAL = int(os.getenv("TEMPLATE_INDEX_SNAPSHOT_INTERVAL", "1000"))
+
+# 特征向量中的计数特征，按顺序排列在类型直方图之前
+COUNT_FEATURES = ("element_complexity", "relation_complexity", "total_complexity",
+                  "chapter_count", "section_count")
+
+def _chapter_sections(chapter: Dict[str, Any]) -> List[Any]:
+    sections = chapter.get("sections", []) if isinstance(chapter, dict) else []
+    return sections if isinstance(sections, list) else []
+
+def _label(node: Any) -> str:
+    """章节或小节在签名中的标识：优先取类型，其次标题和ID"""
+    if isinstance(node, dict):
+        for key in ("type", "title", "id"):
+            value = node.get(key)
+            if value:
+                return str(value)
+        return ""
+    return str(node)
+
+def section_signature(template: Template) -> str:
+    """计算模板的章节顺序签名
+
+    签名只取决于章节及其小节的顺序和标识，结构相同的模板签名相同。
+
+    Args:
+        template: 模板对象
+
+    Returns:
+        str: 签名（SHA-1 前 16 位十六进制），模板没有章节时为空字符串
+    """
+    chapters = template.chapters if isinstance(template.structure, dict) else []
+    if not chapters:
+        return ""
+    outline = [[_label(chapter), [_label(section) for section in _chapter_sections(chapter)]]
+               for chapter in chapters]
+    raw = json.dumps(outline, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+def feature_vector(counts: Dict[str, float], element_types: Iterable[str]) -> np.ndarray:
+    """由计数特征和元素类型构造特征向量
+
+    计数特征取 log1p，元素类型按 CRC32 散列到 TYPE_BUCKETS 个桶并归一化为比例。
+
+    Args:
+        counts: 计数特征，键见 COUNT_FEATURES，缺少的按 0 计
+        element_types: 元素类型序列
+
+    Returns:
+        np.ndarray: float32 特征向量
+    """
+    vector = np.zeros(len(COUNT_FEATURES) + TYPE_BUCKETS, dtype=np.float32)
+    for i, name in enumerate(COUNT_FEATURES):
+        vector[i] = math.log1p(max(float(counts.get(name, 0) or 0), 0.0))
+    total = 0
+    for element_type in element_types:
+        bucket = zlib.crc32(str(element_type).encode("utf-8")) % TYPE_BUCKETS
+        vector[len(COUNT_FEATURES) + bucket] += 1
+        total += 1
+    if total:
+        vector[len(COUNT_FEATURES):] /= total
+    return vector
+
+class TemplateIndex:
+    """模板推荐索引
+
+    模板加入时提取一次特征（学科、论文类型、章节顺序签名和特征向量），特征向量按行保存在一个矩阵中，
+    学科、论文类型和签名编码为整数列。检索时先按整数列过滤候选行，再对候选行做一次矩阵运算取前 k 个。
+    索引只保存模板ID和特征，推荐时由调用方（TemplateLibrary.find_template、
+    TemplateVersionControl.load_template 等）按ID读取模板。
+
+    设置了索引文件路径时，每次加入或移除模板向操作日志（<路径>.log）追加一条记录，日志累计
+    INDEX_SNAPSHOT_INTERVAL 条时写入一次快照（.npz）并清空日志；加载时读取快照后重放日志。
+    """
+
+    # 按整数编码过滤的列
+    LABEL_COLUMNS = ("discipline", "paper_type", "signature")
+
+    def __init__(self, path: Optional[str] = None):
+        """初始化推荐索引
+
+        Args:
+            path: 索引文件路径（.npz），设置时加载已有的快照和操作日志，并记录之后的修改
+        """
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self.analyzer = TemplateAnalyzer()
+        self._lock = threading.RLock()
+        self._log_count = 0
+        self._reset(INITIAL_CAPACITY)
+        if path and (os.path.exists(path) or os.path.exists(self._log_file(path))):
+            self.load(path)
+
+    def _reset(self, capacity: int) -> None:
+        dim = len(COUNT_FEATURES) + TYPE_BUCKETS
+        self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self._sqnorms = np.zeros(capacity, dtype=np.float32)
+        self._codes = {column: np.zeros(capacity, dtype=np.int32) for column in self.LABEL_COLUMNS}
+        self._labels: Dict[str, Dict[str, int]] = {column: {} for column in self.LABEL_COLUMNS}
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._features: List[Dict[str, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, template_id: str) -> bool:
+        return template_id in self._rows
+
+    def _encode(self, column: str, value: str) -> int:
+        labels = self._labels[column]
+        if value not in labels:
+            labels[value] = len(labels)
+        return labels[value]
+
+    def _grow(self, size: int) -> None:
+        capacity = len(self._sqnorms)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        matrix = np.zeros((capacity, self._matrix.shape[1]), dtype=np.float32)
+        matrix[:len(self._ids)] = self._matrix[:len(self._ids)]
+        self._matrix = matrix
+        self._sqnorms = np.resize(self._sqnorms, capacity)
+        for column in self.LABEL_COLUMNS:
+            self._codes[column] = np.resize(self._codes[column], capacity)
+
+    def featurize(self, template: Template, discipline: Optional[str] = None,
+                  paper_type: Optional[str] = None) -> Dict[str, Any]:
+        """提取模板特征
+
+        Args:
+            template: 模板对象
+            discipline: 学科名称，默认取 template.discipline
+            paper_type: 论文类型，默认取模板元数据或结构中的 paper_type
+
+        Returns:
+            Dict[str, Any]: 特征字典，包含 template_id、discipline、paper_type、signature、
+                complexity（analyze_complexity 的结果）、counts 和 vector
+
+        Raises:
+            ValueError: 当模板无效时
+        """
+        complexity = self.analyzer.analyze_complexity(template)
+        chapters = template.chapters if isinstance(template.structure, dict) else []
+        counts = dict(complexity)
+        counts["chapter_count"] = len(chapters)
+        counts["section_count"] = sum(len(_chapter_sections(chapter)) for chapter in chapters)
+        element_types = [element.get("element_type", element.get("type", ""))
+                         for element in template.elements.values() if isinstance(element, dict)]
+
+        if paper_type is None:
+            paper_type = template.metadata.get("paper_type") or template.structure.get("paper_type") or ""
+        return {
+            "template_id": template.template_id,
+            "discipline": discipline if discipline is not None else (template.discipline or ""),
+            "paper_type": paper_type,
+            "signature": section_signature(template),
+            "complexity": complexity,
+            "counts": counts,
+            "vector": feature_vector(counts, element_types)
+        }
+
+    def add(self, template: Template, discipline: Optional[str] = None,
+            paper_type: Optional[str] = None) -> Dict[str, Any]:
+        """加入或更新模板，模板修改后需重新加入
+
+        Args:
+            template: 模板对象
+            discipline: 学科名称
+            paper_type: 论文类型
+
+        Returns:
+            Dict[str, Any]: 模板特征
+        """
+        features = self.featurize(template, discipline, paper_type)
+        with self._lock:
+            self._put(features)
+            self._append_log({"type": "add", "features": features})
+        self.logger.info(f"模板已加入推荐索引: {template.template_id}")
+        return features
+
+    def add_version(self, template_id: str, template_data: Dict[str, Any],
+                    metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """以版本的模板数据加入或更新模板，供创建版本（TemplateVersionControl.create_version）的调用方使用
+
+        Args:
+            template_id: 模板ID
+            template_data: 版本的模板数据
+            metadata: 版本元数据，其中的 discipline 和 paper_type 在模板数据未给出时使用
+
+        Returns:
+            Dict[str, Any]: 模板特征
+        """
+        metadata = metadata or {}
+        template_metadata = template_data.get("metadata")
+        template = Template(
+            template_id=template_id,
+            name=template_data.get("name") or template_id,
+            metadata=template_metadata if isinstance(template_metadata, dict) else {},
+            template_data=template_data,
+            discipline=template_data.get("discipline") or metadata.get("discipline") or ""
+        )
+        return self.add(template, paper_type=metadata.get("paper_type"))
+
+    def remove(self, template_id: str) -> bool:
+        """移除模板
+
+        Returns:
+            bool: 模板是否在索引中
+        """
+        with self._lock:
+            if not self._delete(template_id):
+                return False
+            self._append_log({"type": "remove", "template_id": template_id})
+            return True
+
+    def _put(self, features: Dict[str, Any]) -> None:
+        """按特征写入一行，调用方需持有 _lock"""
+        template_id = features["template_id"]
+        row = self._rows.get(template_id)
+        if row is None:
+            row = len(self._ids)
+            self._grow(row + 1)
+            self._ids.append(template_id)
+            self._features.append(features)
+            self._rows[template_id] = row
+        else:
+            self._features[row] = features
+        self._matrix[row] = features["vector"]
+        self._sqnorms[row] = float(self._matrix[row] @ self._matrix[row])
+        for column in self.LABEL_COLUMNS:
+            self._codes[column][row] = self._encode(column, features[column])
+
+    def _delete(self, template_id: str) -> bool:
+        """删除一行，最后一行移到被删除的位置；调用方需持有 _lock"""
+        row = self._rows.pop(template_id, None)
+        if row is None:
+            return False
+        last = len(self._ids) - 1
+        if row != last:
+            moved = self._ids[last]
+            self._ids[row] = moved
+            self._features[row] = self._features[last]
+            self._rows[moved] = row
+            self._matrix[row] = self._matrix[last]
+            self._sqnorms[row] = self._sqnorms[last]
+            for column in self.LABEL_COLUMNS:
+                self._codes[column][row] = self._codes[column][last]
+        self._ids.pop()
+        self._features.pop()
+        return True
+
+    @staticmethod
+    def _log_file(path: str) -> str:
+        return f"{path}.log"
+
+    def _append_log(self, record: Dict[str, Any]) -> None:
+        """设置了索引文件路径时追加一条操作日志，累计 INDEX_SNAPSHOT_INTERVAL 条时写入快照；调用方需持有 _lock"""
+        if not self.path:
+            return
+        if "features" in record:
+            record = dict(record, features=dict(record["features"], vector=record["features"]["vector"].tolist()))
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self._log_file(self.path), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self._log_count += 1
+        if self._log_count >= INDEX_SNAPSHOT_INTERVAL:
+            self.save()
+
+    def get_features(self, template_id: str) -> Optional[Dict[str, Any]]:
+        """获取已索引模板的特征，不在索引中时返回None"""
+        with self._lock:
+            row = self._rows.get(template_id)
+            return None if row is None else self._features[row]
+
+    def search(self, vector: np.ndarray, top_k: int = 5, discipline: Optional[str] = None,
+               paper_type: Optional[str] = None, signature: Optional[str] = None,
+               exclude: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """检索与特征向量最相似的模板
+
+        相似度为 1 / (1 + 欧氏距离)。过滤条件为 None 时不过滤该列。
+
+        Args:
+            vector: 查询特征向量，见 feature_vector
+            top_k: 返回的模板数量
+            discipline: 学科名称
+            paper_type: 论文类型
+            signature: 章节顺序签名
+            exclude: 要排除的模板ID
+
+        Returns:
+            List[Tuple[str, float]]: (模板ID, 相似度)，按相似度从高到低排序
+        """
+        if top_k <= 0:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            size = len(self._ids)
+            mask = np.ones(size, dtype=bool)
+            for column, value in (("discipline", discipline), ("paper_type", paper_type), ("signature", signature)):
+                if value is None:
+                    continue
+                code = self._labels[column].get(value)
+                if code is None:
+                    return []
+                mask &= self._codes[column][:size] == code
+            for template_id in exclude or ():
+                row = self._rows.get(template_id)
+                if row is not None:
+                    mask[row] = False
+
+            rows = np.flatnonzero(mask)
+            if not len(rows):
+                return []
+            # ||x - q||² = ||x||² - 2x·q + ||q||²
+            distances = self._sqnorms[rows] - 2.0 * (self._matrix[rows] @ query) + float(query @ query)
+            if top_k < len(rows):
+                selected = np.argpartition(distances, top_k - 1)[:top_k]
+            else:
+                selected = np.arange(len(rows))
+            selected = selected[np.lexsort((rows[selected], distances[selected]))]
+            return [
+                (self._ids[rows[i]], float(1.0 / (1.0 + math.sqrt(max(float(distances[i]), 0.0)))))
+                for i in selected
+            ]
+
+    def save(self, path: Optional[str] = None) -> None:
+        """保存索引快照（模板ID、特征和特征矩阵）
+
+        保存到索引自身的路径时同时清空操作日志。
+
+        Args:
+            path: 索引文件路径，默认使用初始化时的路径
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError("Index path is not set")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            size = len(self._ids)
+            features = [{key: value for key, value in item.items() if key != "vector"} for item in self._features]
+            meta = {"ids": self._ids, "features": features}
+            tmp_path = f"{path}.tmp.npz"
+            np.savez_compressed(tmp_path, matrix=self._matrix[:size],
+                                meta=np.array(json.dumps(meta, ensure_ascii=False, default=str)))
+            os.replace(tmp_path, path)
+            if path == self.path:
+                with open(self._log_file(path), "w", encoding="utf-8"):
+                    pass
+                self._log_count = 0
+
+    def load(self, path: Optional[str] = None) -> int:
+        """加载索引快照并重放操作日志，替换当前内容
+
+        Returns:
+            int: 加载的模板数量
+        """
+        path = path or self.path
+        with self._lock:
+            self._reset(INITIAL_CAPACITY)
+            if os.path.exists(path):
+                with np.load(path, allow_pickle=False) as data:
+                    matrix = data["matrix"]
+                    meta = json.loads(str(data["meta"]))
+                if matrix.shape[1] != self._matrix.shape[1]:
+                    raise ValueError(f"Index feature dimension {matrix.shape[1]} does not match {self._matrix.shape[1]}")
+                self._grow(len(meta["ids"]))
+                for row, features in enumerate(meta["features"]):
+                    features["vector"] = matrix[row]
+                    self._put(features)
+
+            log_count = 0
+            if os.path.exists(self._log_file(path)):
+                with open(self._log_file(path), "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            # 写入中断的最后一行
+                            self.logger.warning(f"推荐索引日志中有无法解析的记录: {path}")
+                            continue
+                        if record.get("type") == "add":
+                            features = record["features"]
+                            features["vector"] = np.asarray(features["vector"], dtype=np.float32)
+                            self._put(features)
+                        elif record.get("type") == "remove":
+                            self._delete(record["template_id"])
+                        log_count += 1
+            if path == self.path:
+                self._log_count = log_count
+            return len(self._ids)
+
+_shared_indexes: Dict[Optional[str], TemplateIndex] = {}
+_shared_lock = threading.Lock()
+
+def get_template_index(path: Optional[str] = TEMPLATE_INDEX_PATH) -> TemplateIndex:
+    """获取指定路径的共享推荐索引，同一进程内的模板库、版本控制和模板生成器共用一个实例"""
+    key = path or None
+    with _shared_lock:
+        index = _shared_indexes.get(key)
+        if index is None:
+            index = _shared_indexes[key] = TemplateIndex(key)
+        return index
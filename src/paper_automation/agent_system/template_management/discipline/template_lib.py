@@ -1,12 +1,26 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import logging
 import json
 from ..base.template import Template
+from .template_index import TemplateIndex, get_template_index
 
 class TemplateLibrary:
-    def __init__(self):
+    def __init__(self, template_index: Optional[TemplateIndex] = None):
+        """初始化模板库
+
+        Args:
+            template_index: 模板推荐索引，默认使用进程内共享的索引（见 get_template_index）
+        """
         self.logger = logging.getLogger(__name__)
         self.templates: Dict[str, Template] = {}
+        self.template_index = template_index if template_index is not None else get_template_index()
+        
+    def _index_template(self, discipline: str, template: Template) -> None:
+        """将模板加入推荐索引，索引失败不影响模板库"""
+        try:
+            self.template_index.add(template, discipline)
+        except Exception as e:
+            self.logger.warning(f"Error indexing template {template.template_id}: {e}")
         
     def add_template(self, discipline: str, template: Template) -> bool:
         """添加学科模板"""
@@ -17,7 +31,10 @@ class TemplateLibrary:
                 
             if discipline in self.templates:
                 self.logger.warning(f"Template for discipline {discipline} already exists")
+                if self.templates[discipline].template_id != template.template_id:
+                    self.template_index.remove(self.templates[discipline].template_id)
             self.templates[discipline] = template
+            self._index_template(discipline, template)
             self.logger.info(f"Added template for discipline: {discipline}")
             return True
         except Exception as e:
@@ -32,6 +49,13 @@ class TemplateLibrary:
             self.logger.error(f"Error getting template: {e}")
             return None
 
+    def find_template(self, template_id: str) -> Optional[Template]:
+        """按模板ID查找模板，可作为 TemplateGenerator 的 template_loader"""
+        for template in self.templates.values():
+            if template.template_id == template_id:
+                return template
+        return None
+
     def save_library(self, file_path: str) -> bool:
         """保存模板库到文件"""
         try:
@@ -50,6 +74,7 @@ class TemplateLibrary:
             with open(file_path, 'w', encoding='utf-8') as f:
                 json.dump(library_data, f, indent=2, ensure_ascii=False)
             self.logger.info(f"Saved template library to: {file_path}")
+            
             return True
         except Exception as e:
             self.logger.error(f"Error saving library: {e}")
@@ -86,6 +111,7 @@ class TemplateLibrary:
                 template.relations = template_data.get('relations', {})
                 
                 self.templates[discipline] = template
+                self._index_template(discipline, template)
                 
             return True
             
@@ -111,5 +137,6 @@ class TemplateLibrary:
         if template_id not in self.templates:
             raise ValueError(f"Template {template_id} not found")
             
-        del self.templates[template_id]
+        template = self.templates.pop(template_id)
+        self.template_index.remove(template.template_id)
         return True 
\ No newline at end of file
@@ -5,17 +5,38 @@ This module implements paper template editing functionality, including content e
 
 from typing import Dict, List, Any, Optional, Callable, Tuple, Union
 from datetime import datetime
+import atexit
 import logging
 import os
 import json
 import tempfile
+import threading
 import uuid
+import weakref
 from dataclasses import dataclass, asdict
 from .base.template import Template
+from .base.template import Template as BaseTemplate
+from .generation.validator import TemplateValidator, ValidationState
 import copy
 
 VALID_OPERATION_TYPES = ["modify", "add", "delete", "move", "copy"]
 
+_MISSING = object()
+
+# 操作日志累计达到该条数时写入一次会话快照并清空日志
+SNAPSHOT_INTERVAL = int(os.getenv("TEMPLATE_SESSION_SNAPSHOT_INTERVAL", "200"))
+# 后台写入操作日志和快照的间隔（秒），不大于 0 时在每次编辑后同步写入
+FLUSH_INTERVAL = float(os.getenv("TEMPLATE_SESSION_FLUSH_INTERVAL", "0.5"))
+
+# 未关闭的编辑器，进程退出时写入其缓冲的日志；弱引用不阻止编辑器被回收
+_open_editors: "weakref.WeakSet[TemplateEditor]" = weakref.WeakSet()
+
+def _close_open_editors() -> None:
+    for editor in list(_open_editors):
+        editor.close()
+
+atexit.register(_close_open_editors)
+
 @dataclass
 class EditOperation:
     """编辑操作"""
@@ -30,6 +51,11 @@ class EditOperation:
     metadata: Dict[str, Any] = None
     old_data: Dict[str, Any] = None
     new_data: Dict[str, Any] = None
+    # 操作日志：路径上的旧值、旧值是否存在，以及编辑时新建的第一个中间节点在路径中的位置。
+    # old_exists 为 None 表示旧格式的操作，撤销和重做使用 old_data/new_data 中的完整快照
+    old_value: Any = None
+    old_exists: Optional[bool] = None
+    created_index: Optional[int] = None
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -71,6 +97,96 @@ class DateTimeEncoder(json.JSONEncoder):
             return obj.to_dict()
         return str(obj)  # 如果无法序列化，转换为字符串
 
+def _normalize_path(data: Dict[str, Any], path: List[Any]) -> List[Any]:
+    """将路径中作用于字典的非字符串键转换为 JSON 中对应的字符串键
+
+    会话快照和操作日志以 JSON 保存，字典的整数等键会变成字符串。编辑时就按字符串键写入，
+    恢复后的数据才与日志中操作的路径一致。
+
+    Args:
+        data: 模板数据
+        path: 路径
+
+    Returns:
+        List[Any]: 转换后的路径；列表上的整数下标保持不变
+
+    Raises:
+        ValueError: 字典键无法表示为 JSON 键时
+    """
+    normalized = []
+    target = data
+    for i, key in enumerate(path):
+        if isinstance(target, dict) or target is _MISSING:
+            if not isinstance(key, str):
+                if key is not None and not isinstance(key, (int, float)):
+                    raise ValueError(f"Invalid dictionary key in path: {key!r}")
+                key = json.dumps(key)
+            # 缺少的节点由 _set_path 创建为字典
+            target = target.get(key, _MISSING) if isinstance(target, dict) else _MISSING
+        else:
+            try:
+                target = target[key]
+            except (IndexError, KeyError, TypeError):
+                # 路径无效，由 _set_path 报错
+                normalized.extend(path[i:])
+                break
+        normalized.append(key)
+    return normalized
+
+def _set_path(data: Dict[str, Any], path: List[Any], value: Any) -> Tuple[bool, Any, Optional[int]]:
+    """将 value 写入 data 中的 path，路径上缺少的字典节点自动创建
+
+    Args:
+        data: 模板数据
+        path: 路径，整数键在列表上表示下标
+        value: 新值（调用方负责复制）
+
+    Returns:
+        Tuple[bool, Any, Optional[int]]: 旧值是否存在、旧值、新建的第一个中间节点在路径中的位置
+
+    Raises:
+        Exception: 路径无效时，已新建的中间节点会被移除
+    """
+    if not path:
+        return False, None, None
+
+    created_index = None
+    target = data
+    try:
+        for i, key in enumerate(path[:-1]):
+            if isinstance(key, int) and not isinstance(target, dict):
+                target = target[key]
+            else:
+                if key not in target:
+                    target[key] = {}
+                    if created_index is None:
+                        created_index = i
+                target = target[key]
+
+        last = path[-1]
+        if isinstance(target, dict):
+            old_exists = last in target
+            old_value = target.get(last)
+        else:
+            old_value = target[last]
+            old_exists = True
+        target[last] = value
+    except Exception:
+        if created_index is not None:
+            _delete_path(data, path[:created_index + 1])
+        raise
+
+    if created_index is not None:
+        old_exists, old_value = False, None
+    return old_exists, old_value, created_index
+
+def _delete_path(data: Dict[str, Any], path: List[Any]) -> None:
+    """删除 data 中 path 指向的字典键"""
+    target = data
+    for key in path[:-1]:
+        target = target[key]
+    del target[path[-1]]
+
 @dataclass
 class EditSession:
     """编辑会话"""
@@ -256,23 +372,54 @@ class SessionData:
 class TemplateEditor:
     """模板编辑器
 
+    编辑操作先追加到内存中的日志缓冲区，由后台线程每隔 flush_interval 秒批量写入各会话的
+    操作日志文件，日志累计 SNAPSHOT_INTERVAL 条时由后台线程合并为一次快照；编辑请求本身不做文件读写。
+    进程异常退出时最多丢失最近 flush_interval 秒内的编辑，启动时从快照和日志恢复未关闭的会话。
+
     Attributes:
         temp_dir: 临时目录
         sessions: 会话字典
     """
     
-    def __init__(self, temp_dir: Optional[str] = None):
+    def __init__(self, temp_dir: Optional[str] = None, flush_interval: float = FLUSH_INTERVAL,
+                 recover: bool = False):
         """初始化
 
         Args:
             temp_dir: 临时目录
+            flush_interval: 后台写入间隔（秒），不大于 0 时同步写入
+            recover: 是否从临时目录恢复所有未关闭的会话；单个会话可以通过 load_session 按需恢复
         """
         self.temp_dir = temp_dir or os.path.join(os.getcwd(), "temp")
         self.sessions = {}
+        self.logger = logging.getLogger(__name__)
+        self.flush_interval = flush_interval
+        
+        # 各会话操作日志的最新序号和自上次快照以来的日志条数
+        self._log_seq: Dict[str, int] = {}
+        self._log_counts: Dict[str, int] = {}
+        # 尚未写入文件的日志行，以及等待写入快照的会话
+        self._pending: Dict[str, List[str]] = {}
+        self._snapshot_due: set = set()
+        
+        # _lock 保护会话数据与日志序号的一致性，_io_lock 保证同一时间只有一次写入；
+        # 需要同时持有时先取 _io_lock
+        self._lock = threading.RLock()
+        self._io_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        
+        # 各会话的增量验证状态，编辑时按路径标记修改过的元素和关系
+        self.validator: Optional[TemplateValidator] = None
+        self._validation_states: Dict[str, ValidationState] = {}
         
         # 确保临时目录存在
         os.makedirs(self.temp_dir, exist_ok=True)
         
+        if recover:
+            self.recover_sessions()
+        _open_editors.add(self)
+        
     def create_session(self, template_id: str, template_data: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None) -> str:
         """创建会话(兼容旧接口)"""
         return self.create_edit_session(template_id, template_data, metadata)
@@ -303,23 +450,14 @@ class TemplateEditor:
         session = EditSession(
             session_id=session_id,
             template_id=template_id,
-            template_data=template_obj.to_dict(),  # 存储字典形式
+            # 存储字典形式；经 JSON 往返去掉 to_dict 结果中的共享引用，保证按路径的逆操作只影响该路径
+            template_data=json.loads(json.dumps(template_obj.to_dict(), ensure_ascii=False, cls=DateTimeEncoder)),
             metadata=metadata.copy() if metadata else {}
         )
         
         # 保存会话
         self.sessions[session_id] = session
-        
-        # 将会话转换为字典
-        session_dict = session.to_dict()
-        
-        # 确保临时目录存在
-        os.makedirs(self.temp_dir, exist_ok=True)
-        
-        # 保存会话文件
-        session_file = os.path.join(self.temp_dir, f"{session_id}.json")
-        with open(session_file, "w", encoding="utf-8") as f:
-            json.dump(session_dict, f, ensure_ascii=False, indent=2, cls=DateTimeEncoder)
+        self.save_session(session_id)
             
         return session_id
         
@@ -335,13 +473,19 @@ class TemplateEditor:
         if session_id not in self.sessions:
             raise ValueError(f"Session {session_id} not found")
         
-        # 从内存中移除
-        del self.sessions[session_id]
-        
-        # 删除会话文件
-        session_file = os.path.join(self.temp_dir, f"{session_id}.json")
-        if os.path.exists(session_file):
-            os.remove(session_file)
+        # 从内存中移除，丢弃尚未写入的日志
+        with self._io_lock, self._lock:
+            del self.sessions[session_id]
+            self._log_seq.pop(session_id, None)
+            self._log_counts.pop(session_id, None)
+            self._pending.pop(session_id, None)
+            self._snapshot_due.discard(session_id)
+            self._validation_states.pop(session_id, None)
+            
+            # 删除会话快照和操作日志
+            for path in (self._session_file(session_id), self._log_file(session_id)):
+                if os.path.exists(path):
+                    os.remove(path)
 
     def get_edit_session(self, session_id: str) -> Dict[str, Any]:
         """获取编辑会话"""
@@ -388,34 +532,35 @@ class TemplateEditor:
         
         session = self.sessions[session_id]
         
-        # 更新模板结构
-        template_data = session.template_data
-        template_data['structure'] = content
-        
-        # 创建编辑操作
-        operation = EditOperation(
-            operation_id=str(uuid.uuid4()),
-            operation_type='update_content',
-            target_path='structure',
-            value=content,
-            timestamp=datetime.now(),
-            description='更新模板内容',
-            old_data=session.template_data.get('structure', {}),
-            new_data=content
-        )
+        with self._lock:
+            # 更新模板结构
+            old_exists, old_value, created_index = _set_path(session.template_data, ['structure'], copy.deepcopy(content))
         
-        # 添加到历史记录
-        session.history.append(operation)
-        session.current_version = len(session.history)
+            # 创建编辑操作
+            operation = EditOperation(
+                operation_id=str(uuid.uuid4()),
+                operation_type='update_content',
+                target_path=['structure'],
+                value=content,
+                timestamp=datetime.now(),
+                description='更新模板内容',
+                old_value=old_value,
+                old_exists=old_exists,
+                created_index=created_index
+            )
         
-        # 保存会话
-        self.save_session(session_id)
+            # 添加到历史记录并写入操作日志
+            session.add_history(operation)
+            self._append_log(session_id, {"type": "edit", "operation": operation.to_dict()})
+        self._schedule_flush(session_id)
 
-    def import_session(self, data: Dict[str, Any]) -> str:
+    def import_session(self, data: Dict[str, Any], recover: bool = False) -> str:
         """导入会话
 
         Args:
-            data: 包含template_id和template_data的字典
+            data: 包含template_id和template_data的字典，导入时创建新会话
+            recover: 为True或数据中没有template_data时，按数据中的 session_id 从内存或临时目录中的
+                快照和操作日志恢复该会话，忽略数据中的其他字段
 
         Returns:
             str: 会话ID
@@ -425,6 +570,11 @@ class TemplateEditor:
         """
         if not isinstance(data, dict):
             raise ValueError("Data must be a dictionary")
+        
+        session_id = data.get("session_id")
+        if (recover or "template_data" not in data) and session_id and (
+                session_id in self.sessions or os.path.exists(self._session_file(session_id))):
+            return self.load_session(session_id).session_id
             
         if "template_id" not in data or "template_data" not in data:
             raise ValueError("Data must contain template_id and template_data")
@@ -443,14 +593,18 @@ class TemplateEditor:
         session = self.sessions[session_id]
         
         # 只更新提供的元数据字段,不添加默认字段
-        session.metadata.update(metadata)
-        
-        # 保存会话
-        self.save_session(session_id)
+        with self._lock:
+            session.metadata.update(metadata)
+            # 元数据不写入操作日志，由后台线程写入快照
+            self._snapshot_due.add(session_id)
+        self._schedule_flush(session_id)
 
     def validate_template(self, session_id: str) -> Dict[str, Any]:
         """验证模板
 
+        除名称和结构外，通过 TemplateValidator 验证元素和关系。会话的验证状态在多次验证之间保留，
+        自上次验证以来未被编辑的元素沿用之前的检查结果，关系索引按编辑过的关系增量更新。
+
         Args:
             session_id: 会话ID
 
@@ -463,56 +617,114 @@ class TemplateEditor:
         session = self.sessions.get(session_id)
         if not session:
             raise ValueError(f"Session {session_id} not found")
-            
-        # 更新元数据
-        session.metadata["updated_at"] = datetime.now()
-        session.metadata["status"] = "validated"
         
-        # 处理字典中的 Template 对象
-        def process_dict(d):
-            if isinstance(d, dict):
-                return {k: process_dict(v) for k, v in d.items()}
-            elif isinstance(d, list):
-                return [process_dict(item) for item in d]
-            elif isinstance(d, Template):
-                return d.to_dict()
-            elif isinstance(d, datetime):
-                return d.isoformat()
-            return d
-            
-        metadata = process_dict(session.metadata)
+        if self.validator is None:
+            self.validator = TemplateValidator()
         
-        # 验证模板
-        is_valid = True
-        errors = []
-        
-        # 检查必要字段
-        if isinstance(session.template_data, Template):
-            template = session.template_data
-            if not template.structure:
-                is_valid = False
-                errors.append("模板缺少必要结构")
-            if not template.name:
-                is_valid = False
-                errors.append("模板缺少名称")
-        else:
-            template_dict = session.template_data
+        with self._lock:
+            # 更新元数据
+            session.metadata["updated_at"] = datetime.now()
+            session.metadata["status"] = "validated"
+            
+            # 处理字典中的 Template 对象
+            def process_dict(d):
+                if isinstance(d, dict):
+                    return {k: process_dict(v) for k, v in d.items()}
+                elif isinstance(d, list):
+                    return [process_dict(item) for item in d]
+                elif isinstance(d, Template):
+                    return d.to_dict()
+                elif isinstance(d, datetime):
+                    return d.isoformat()
+                return d
+                
+            metadata = process_dict(session.metadata)
+            
+            # 验证模板
+            is_valid = True
+            errors = []
+            warnings = []
+            
+            # 检查必要字段
+            template_dict = session.template_data.to_dict() if isinstance(session.template_data, Template) else session.template_data
             if not template_dict.get('structure'):
                 is_valid = False
                 errors.append("模板缺少必要结构")
             if not template_dict.get('name'):
                 is_valid = False
                 errors.append("模板缺少名称")
-        
-        # 保存会话
-        self.save_session(session_id)
+            
+            # 验证元素和关系，模板对象直接引用会话数据
+            state = self.get_validation_state(session_id)
+            if not isinstance(session.template_data, dict):
+                state.invalidate()
+            try:
+                template = BaseTemplate(
+                    template_id=session.template_id,
+                    name=template_dict.get('name') or session.template_id,
+                    metadata=template_dict.get('metadata') if isinstance(template_dict.get('metadata'), dict) else {},
+                    template_data=template_dict
+                )
+                result = self.validator.validate_template(template, state)
+                if not result["is_valid"]:
+                    is_valid = False
+                errors.extend(result["errors"])
+                warnings.extend(result["warnings"])
+            except Exception as e:
+                self.logger.error(f"Error validating session {session_id}: {e}")
+                state.invalidate()
+                is_valid = False
+                errors.append(f"模板验证失败: {e}")
+            
+            # 元数据的修改由后台线程写入快照
+            self._snapshot_due.add(session_id)
+        self._schedule_flush(session_id)
         
         return {
             "template_id": session.template_id,
             "metadata": metadata,
             "is_valid": is_valid,
-            "errors": errors
+            "errors": errors,
+            "warnings": warnings
         }
+    
+    def get_validation_state(self, session_id: str) -> ValidationState:
+        """获取会话的验证状态
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            ValidationState: 验证状态，其中 result 为上一次验证的结果，dirty_elements 和
+                dirty_relations 为此后编辑过的元素和关系（为 None 时表示需要全部重新检查）
+
+        Raises:
+            ValueError: 如果会话不存在
+        """
+        if session_id not in self.sessions:
+            raise ValueError(f"Session {session_id} not found")
+        with self._lock:
+            state = self._validation_states.get(session_id)
+            if state is None:
+                state = self._validation_states[session_id] = ValidationState()
+            return state
+    
+    def _mark_validation_dirty(self, session_id: str, operation: EditOperation) -> None:
+        """根据操作路径标记修改过的元素和关系，调用方需持有 _lock"""
+        state = self._validation_states.get(session_id)
+        if state is None:
+            return
+        path = operation.target_path
+        if operation.old_exists is None or not path:
+            # 旧格式操作替换整个模板数据
+            state.invalidate()
+        elif path[0] in ("elements", "relations"):
+            if len(path) == 1:
+                state.invalidate()
+            elif path[0] == "elements":
+                state.mark_dirty(element_ids=[path[1]])
+            else:
+                state.mark_dirty(relation_ids=[path[1]])
         
     def export_template(self, session_id: str) -> Dict[str, Any]:
         """导出模板
@@ -566,20 +778,228 @@ class TemplateEditor:
         Raises:
             ValueError: 如果会话不存在
         """
-        session = self.sessions.get(session_id)
-        if not session:
+        if session_id not in self.sessions:
             raise ValueError(f"Session {session_id} not found")
+        
+        with self._lock:
+            self._snapshot_due.add(session_id)
+        self.flush([session_id])
+    
+    def flush(self, session_ids: Optional[List[str]] = None) -> None:
+        """将缓冲的操作日志写入文件，并为到期的会话写入快照
+
+        Args:
+            session_ids: 要写入的会话ID，默认为所有会话
+        """
+        with self._io_lock:
+            with self._lock:
+                targets = set(self._pending) | self._snapshot_due
+                if session_ids is not None:
+                    targets &= set(session_ids)
+                
+                # 在同一锁内取出日志行和快照内容，快照恰好包含已取出的全部日志
+                batches = []
+                for session_id in targets:
+                    lines = self._pending.pop(session_id, [])
+                    session = self.sessions.get(session_id)
+                    if session is None:
+                        self._snapshot_due.discard(session_id)
+                        continue
+                    snapshot = None
+                    if session_id in self._snapshot_due:
+                        self._snapshot_due.discard(session_id)
+                        snapshot = session.to_dict()
+                        snapshot["log_seq"] = self._log_seq.get(session_id, 0)
+                        self._log_counts[session_id] = 0
+                    batches.append((session_id, lines, snapshot))
             
-        # 确保temp_dir目录存在
-        os.makedirs(self.temp_dir, exist_ok=True)
+            os.makedirs(self.temp_dir, exist_ok=True)
+            for session_id, lines, snapshot in batches:
+                if snapshot is not None:
+                    self._write_snapshot(session_id, snapshot)
+                elif lines:
+                    with open(self._log_file(session_id), "a", encoding="utf-8") as f:
+                        f.writelines(lines)
+    
+    def _write_snapshot(self, session_id: str, snapshot: Dict[str, Any]) -> None:
+        """原子地写入会话快照，之后清空已包含在快照中的操作日志"""
+        session_file = self._session_file(session_id)
+        tmp_file = f"{session_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False, cls=DateTimeEncoder)
+        os.replace(tmp_file, session_file)
+        
+        log_file = self._log_file(session_id)
+        if os.path.exists(log_file):
+            os.remove(log_file)
+    
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.error(f"Failed to flush edit sessions: {e}")
+            # 没有待写入的内容时退出，线程不再持有编辑器；再次编辑时由 _schedule_flush 重新启动
+            with self._lock:
+                if not self._pending and not self._snapshot_due:
+                    self._flusher = None
+                    return
+    
+    def _schedule_flush(self, session_id: str) -> None:
+        """交给后台线程写入；同步模式下立即写入。调用时不能持有 _lock"""
+        if self.flush_interval <= 0:
+            self.flush([session_id])
+            return
+        with self._lock:
+            _open_editors.add(self)
+            if self._flusher is None or not self._flusher.is_alive():
+                self._stop.clear()
+                self._flusher = threading.Thread(target=self._flush_loop, name="template-editor-flusher", daemon=True)
+                self._flusher.start()
+    
+    def close(self) -> None:
+        """停止后台写入线程并写入所有缓冲的操作日志"""
+        self._stop.set()
+        flusher = self._flusher
+        if flusher is not None and flusher is not threading.current_thread():
+            flusher.join()
+        self._flusher = None
+        self.flush()
+        _open_editors.discard(self)
+    
+    def recover_sessions(self) -> List[str]:
+        """从临时目录中的快照和操作日志恢复所有未关闭的会话
+
+        Returns:
+            List[str]: 恢复的会话ID
+        """
+        recovered = []
+        for name in sorted(os.listdir(self.temp_dir)):
+            session_id, ext = os.path.splitext(name)
+            if ext != ".json" or session_id in self.sessions:
+                continue
+            try:
+                self.load_session(session_id)
+                recovered.append(session_id)
+            except Exception as e:
+                self.logger.warning(f"Failed to recover session {session_id}: {e}")
+        if recovered:
+            self.logger.info(f"Recovered {len(recovered)} edit sessions from {self.temp_dir}")
+        return recovered
+    
+    def _session_file(self, session_id: str) -> str:
+        return os.path.join(self.temp_dir, f"{session_id}.json")
+    
+    def _log_file(self, session_id: str) -> str:
+        return os.path.join(self.temp_dir, f"{session_id}.log")
+    
+    def _append_log(self, session_id: str, record: Dict[str, Any]) -> None:
+        """向会话的日志缓冲区追加一条记录，日志累计 SNAPSHOT_INTERVAL 条时安排写入快照
+        
+        调用方需持有 _lock，使记录序号与会话数据的修改顺序一致，释放锁后调用 _schedule_flush。
+        
+        Args:
+            session_id: 会话ID
+            record: 日志记录，type 为 edit、undo 或 redo
+        """
+        seq = self._log_seq.get(session_id, 0) + 1
+        self._log_seq[session_id] = seq
+        record["seq"] = seq
+        record["updated_at"] = self.sessions[session_id].metadata.get("updated_at")
+        self._pending.setdefault(session_id, []).append(
+            json.dumps(record, ensure_ascii=False, cls=DateTimeEncoder) + "\n")
+        
+        self._log_counts[session_id] = self._log_counts.get(session_id, 0) + 1
+        if self._log_counts[session_id] >= SNAPSHOT_INTERVAL:
+            self._snapshot_due.add(session_id)
+    
+    def _apply_operation(self, session: EditSession, operation: EditOperation) -> None:
+        """(重新)应用一个操作"""
+        if operation.old_exists is None:
+            # 旧格式操作保存的是完整快照
+            session.template_data = copy.deepcopy(operation.new_data)
+            return
+        _set_path(session.template_data, operation.target_path, copy.deepcopy(operation.value))
+    
+    def _revert_operation(self, session: EditSession, operation: EditOperation) -> None:
+        """应用操作的逆操作"""
+        if operation.old_exists is None:
+            session.template_data = copy.deepcopy(operation.old_data)
+            return
+        path = operation.target_path
+        if not path:
+            return
+        if operation.created_index is not None:
+            _delete_path(session.template_data, path[:operation.created_index + 1])
+        elif operation.old_exists:
+            _set_path(session.template_data, path, copy.deepcopy(operation.old_value))
+        else:
+            _delete_path(session.template_data, path)
+    
+    def load_session(self, session_id: str) -> EditSession:
+        """从会话快照和操作日志恢复会话
+        
+        Args:
+            session_id: 会话ID
+            
+        Returns:
+            EditSession: 恢复的会话
+            
+        Raises:
+            ValueError: 如果会话快照不存在
+        """
+        if session_id in self.sessions:
+            return self.sessions[session_id]
         
-        # 将会话转换为字典
-        session_dict = session.to_dict()
+        session_file = self._session_file(session_id)
+        if not os.path.exists(session_file):
+            raise ValueError(f"Session {session_id} not found")
         
-        # 保存会话文件
-        session_file = os.path.join(self.temp_dir, f"{session_id}.json")
-        with open(session_file, "w", encoding="utf-8") as f:
-            json.dump(session_dict, f, ensure_ascii=False, indent=2, cls=DateTimeEncoder)
+        with open(session_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        session = EditSession.from_dict(data)
+        seq = data.get("log_seq", 0)
+        
+        # 重放快照之后的操作日志
+        replayed = 0
+        log_file = self._log_file(session_id)
+        if os.path.exists(log_file):
+            with open(log_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # 最后一条记录可能因进程中断而不完整
+                        self.logger.warning(f"Ignoring incomplete log record in session {session_id}")
+                        break
+                    if record["seq"] <= seq:
+                        continue
+                    self._replay_record(session, record)
+                    seq = record["seq"]
+                    replayed += 1
+        
+        with self._lock:
+            self.sessions[session_id] = session
+            self._log_seq[session_id] = seq
+            self._log_counts[session_id] = replayed
+        return session
+    
+    def _replay_record(self, session: EditSession, record: Dict[str, Any]) -> None:
+        if record["type"] == "edit":
+            operation = EditOperation.from_dict(record["operation"])
+            if operation.old_exists is not None:
+                # 兼容转换之前记录的整数字典键
+                operation.target_path = _normalize_path(session.template_data, operation.target_path)
+            self._apply_operation(session, operation)
+            session.add_history(operation)
+        elif record["type"] == "undo":
+            self._revert_operation(session, session.history[session.current_version - 1])
+            session.current_version -= 1
+        elif record["type"] == "redo":
+            self._apply_operation(session, session.history[session.current_version])
+            session.current_version += 1
+        if record.get("updated_at"):
+            session.metadata["updated_at"] = record["updated_at"]
             
     def apply_edit(self, session_id: str, edit_data: Dict[str, Any]) -> None:
         """应用编辑操作"""
@@ -591,63 +1011,41 @@ class TemplateEditor:
         if not isinstance(edit_data, dict):
             raise ValueError("Edit data must be a dictionary")
         
-        # 保存当前状态
-        current_state = copy.deepcopy(session.template_data)
-        
-        try:
-            # 获取编辑路径和值
-            path = edit_data.get("path", [])
-            value = edit_data.get("value")
+        with self._lock:
+            try:
+                # 获取编辑路径和值，字典键按 JSON 中的形式保存
+                path = _normalize_path(session.template_data, list(edit_data.get("path", [])))
+                value = edit_data.get("value")
             
-            # 更新指定路径的值
-            target = session.template_data
-            for i, key in enumerate(path[:-1]):
-                if isinstance(key, int):
-                    if not isinstance(target, dict):
-                        target = target[key]
-                    else:
-                        if key not in target:
-                            target[key] = {}
-                        target = target[key]
-                else:
-                    if key not in target:
-                        target[key] = {}
-                    target = target[key]
-                    
-            if path:
-                if isinstance(path[-1], int):
-                    target[path[-1]] = value
-                else:
-                    if path[-1] not in target:
-                        target[path[-1]] = {}
-                    target[path[-1]] = value
+                # 更新指定路径的值，只记录该路径上的旧值（失败时 _set_path 会撤销已做的修改）
+                old_exists, old_value, created_index = _set_path(session.template_data, path, copy.deepcopy(value))
                 
-            # 创建编辑操作
-            operation = EditOperation(
-                operation_id=str(uuid.uuid4()),
-                operation_type=edit_data.get("type", "modify"),
-                target_path=path,
-                value=value,
-                timestamp=datetime.now(),
-                description="Apply edit",
-                old_data=current_state,
-                new_data=copy.deepcopy(session.template_data)
-            )
+                # 创建编辑操作
+                operation = EditOperation(
+                    operation_id=str(uuid.uuid4()),
+                    operation_type=edit_data.get("type", "modify"),
+                    target_path=path,
+                    value=value,
+                    timestamp=datetime.now(),
+                    description="Apply edit",
+                    old_value=old_value,
+                    old_exists=old_exists,
+                    created_index=created_index
+                )
             
-            # 添加到历史记录
-            session.history.append(operation)
-            session.current_version = len(session.history)
+            except Exception as e:
+                raise ValueError(f"Failed to apply edit: {str(e)}")
             
+            # 添加到历史记录
+            session.add_history(operation)
+            self._mark_validation_dirty(session_id, operation)
+        
             # 更新元数据
             session.metadata["updated_at"] = datetime.now().isoformat()
-            
-            # 保存会话
-            self.save_session(session_id)
-            
-        except Exception as e:
-            # 恢复原始状态
-            session.template_data = current_state
-            raise ValueError(f"Failed to apply edit: {str(e)}")
+        
+            # 追加操作日志
+            self._append_log(session_id, {"type": "edit", "operation": operation.to_dict()})
+        self._schedule_flush(session_id)
 
     def undo_edit(self, session_id: str) -> Dict[str, Any]:
         """撤销编辑操作
@@ -666,23 +1064,26 @@ class TemplateEditor:
         
         session = self.sessions[session_id]
         
-        if not session.history or session.current_version <= 0:
-            raise ValueError("No operations to undo")
+        with self._lock:
+            if not session.history or session.current_version <= 0:
+                raise ValueError("No operations to undo")
         
-        # 获取当前操作
-        operation = session.history[session.current_version - 1]
+            # 获取当前操作
+            operation = session.history[session.current_version - 1]
         
-        # 恢复旧数据
-        session.template_data = copy.deepcopy(operation.old_data)
+            # 应用逆操作
+            self._revert_operation(session, operation)
+            self._mark_validation_dirty(session_id, operation)
         
-        # 更新版本
-        session.current_version -= 1
+            # 更新版本
+            session.current_version -= 1
         
-        # 更新元数据
-        session.metadata["updated_at"] = datetime.now().isoformat()
+            # 更新元数据
+            session.metadata["updated_at"] = datetime.now().isoformat()
         
-        # 保存会话
-        self.save_session(session_id)
+            # 追加操作日志
+            self._append_log(session_id, {"type": "undo"})
+        self._schedule_flush(session_id)
         
         return {
             "session_id": session_id,
@@ -708,23 +1109,26 @@ class TemplateEditor:
         
         session = self.sessions[session_id]
         
-        if not session.history or session.current_version >= len(session.history):
-            raise ValueError("No operations to redo")
+        with self._lock:
+            if not session.history or session.current_version >= len(session.history):
+                raise ValueError("No operations to redo")
         
-        # 获取当前操作
-        operation = session.history[session.current_version]
+            # 获取当前操作
+            operation = session.history[session.current_version]
         
-        # 应用新数据
-        session.template_data = copy.deepcopy(operation.new_data)
+            # 重新应用操作
+            self._apply_operation(session, operation)
+            self._mark_validation_dirty(session_id, operation)
         
-        # 更新版本
-        session.current_version += 1
+            # 更新版本
+            session.current_version += 1
         
-        # 更新元数据
-        session.metadata["updated_at"] = datetime.now().isoformat()
+            # 更新元数据
+            session.metadata["updated_at"] = datetime.now().isoformat()
         
-        # 保存会话
-        self.save_session(session_id)
+            # 追加操作日志
+            self._append_log(session_id, {"type": "redo"})
+        self._schedule_flush(session_id)
         
         return {
             "session_id": session_id,
@@ -840,7 +1244,7 @@ class TemplateEditor:
                     'operation_id': operation.operation_id,
                     'timestamp': operation.timestamp,
                     'description': operation.description,
-                    'content': operation.new_data
+                    'content': operation.value
                 })
         
         return history
@@ -855,18 +1259,21 @@ class TemplateEditor:
         if version < 0 or version >= len(session.history):
             raise ValueError(f"Invalid version number: {version}")
         
-        # 获取目标版本的操作
-        operation = session.history[version]
-        
-        # 更新模板数据
-        if operation.operation_type == 'update_content':
-            session.template_data['structure'] = operation.new_data
-        
-        # 更新当前版本
-        session.current_version = version + 1
-        
-        # 保存会话
-        self.save_session(session_id)
+        with self._lock:
+            # 撤销或重做操作，直到目标版本的操作成为最后一个已应用的操作
+            while session.current_version > version + 1:
+                operation = session.history[session.current_version - 1]
+                self._revert_operation(session, operation)
+                self._mark_validation_dirty(session_id, operation)
+                session.current_version -= 1
+                self._append_log(session_id, {"type": "undo"})
+            while session.current_version < version + 1:
+                operation = session.history[session.current_version]
+                self._apply_operation(session, operation)
+                self._mark_validation_dirty(session_id, operation)
+                session.current_version += 1
+                self._append_log(session_id, {"type": "redo"})
+        self._schedule_flush(session_id)
 
 class Template:
     """模板类"""
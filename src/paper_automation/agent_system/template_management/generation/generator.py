@@ -3,7 +3,8 @@
 This module implements paper template generation functionality, including structure template generation, content template generation, parallel processing, and progress tracking.
 """
 
-from typing import Dict, List, Any, Optional, Callable
+from typing import Dict, List, Any, Optional, Callable, Tuple
+import heapq
 import logging
 import json
 import os
@@ -11,9 +12,10 @@ from datetime import datetime
 from pathlib import Path
 from dataclasses import dataclass
 from enum import Enum
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
 from ..base.template import Template, Chapter, Section, Paragraph, Element
 from ..discipline.analyzer import DisciplineAnalyzer
+from ..discipline.template_index import TemplateIndex, feature_vector, get_template_index
 from ...knowledge_management.rules.validator import RuleValidator
 import networkx as nx
 
@@ -46,19 +48,39 @@ class Task:
     dependencies: List[str] = None
     priority: int = 0
 
+def _run_task(func: Callable, args: tuple, kwargs: dict) -> Tuple[Any, datetime, datetime]:
+    """Run a task in a worker and return its result with start and end times"""
+    start_time = datetime.now()
+    result = func(*args, **kwargs)
+    return result, start_time, datetime.now()
+
 class TemplateGenerator:
     """Template Generator Class"""
     
-    def __init__(self, validate_schema: bool = False, checkpoint_dir: str = "checkpoints", max_workers: int = None):
+    def __init__(self, validate_schema: bool = False, checkpoint_dir: str = "checkpoints", max_workers: int = None,
+                 discipline_analyzer: Optional[DisciplineAnalyzer] = None,
+                 template_index: Optional[TemplateIndex] = None,
+                 template_loader: Optional[Callable[[str], Optional[Template]]] = None):
         """Initialize template generator
         
         Args:
             validate_schema: Whether to validate schema
             checkpoint_dir: Checkpoint storage directory
             max_workers: Maximum number of worker threads
+            discipline_analyzer: Discipline analyzer to share between generators; discipline
+                features are cached per knowledge graph either way
+            template_index: Recommendation index of historical templates; defaults to the process-wide
+                index that TemplateLibrary adds templates to (loaded from TEMPLATE_INDEX_PATH when set)
+            template_loader: Returns the template with the given ID, or None; used to load recommended
+                templates, since the index only keeps template IDs and features (e.g.
+                TemplateLibrary.find_template or TemplateVersionControl.load_template)
         """
         self.logger = logging.getLogger(__name__)
-        self.discipline_analyzer = DisciplineAnalyzer()
+        self.discipline_analyzer = discipline_analyzer if discipline_analyzer is not None else DisciplineAnalyzer()
+        self.template_index = template_index if template_index is not None else get_template_index()
+        self.template_loader = template_loader
+        # Templates registered through this generator, recommended without the loader
+        self.registered_templates: Dict[str, Template] = {}
         self.knowledge_graph = nx.Graph()
         self.rule_validator = RuleValidator()
         self.validate_schema = validate_schema
@@ -70,6 +92,7 @@ class TemplateGenerator:
         # Parallel processing
         self.max_workers = max_workers
         self.tasks: Dict[str, Task] = {}
+        self.task_results: Dict[str, Any] = {}
         
         # Progress tracking
         self.steps: Dict[str, GenerationStep] = {}
@@ -202,7 +225,7 @@ class TemplateGenerator:
             self.start_generation()
             self.add_step("structure_generation")
             
-            # Analyze discipline features
+            # Look up discipline features (cached per discipline and knowledge graph)
             discipline_features = self.discipline_analyzer.analyze_discipline(discipline)
             
             # Generate base structure
@@ -224,36 +247,86 @@ class TemplateGenerator:
             self.end_step("structure_generation", success=False, error=str(e))
             raise
             
+    def register_template(self, template: Template, discipline: Optional[str] = None,
+                          paper_type: Optional[str] = None) -> Dict[str, Any]:
+        """Add a template to the recommendation index
+        
+        The template is featurized once here; register it again after modifying it.
+        The generator keeps a reference to it so it can be recommended without a template loader.
+        
+        Args:
+            template: Template to register
+            discipline: Discipline name, defaults to template.discipline
+            paper_type: Paper type, defaults to the paper_type in the template metadata
+            
+        Returns:
+            Dict[str, Any]: Indexed template features
+        """
+        features = self.template_index.add(template, discipline, paper_type)
+        self.registered_templates[template.template_id] = template
+        return features
+        
+    def _resolve_template(self, template_id: str) -> Optional[Template]:
+        """Template for a recommended ID from the registered templates or the template loader"""
+        template = self.registered_templates.get(template_id)
+        if template is None and self.template_loader is not None:
+            try:
+                template = self.template_loader(template_id)
+            except Exception as e:
+                self.logger.warning(f"Error loading template {template_id}: {e}")
+        return template
+        
     def recommend_templates(self, discipline: str, paper_type: str, 
-                          requirements: Dict[str, Any] = None) -> List[Template]:
+                          requirements: Dict[str, Any] = None,
+                          top_k: int = 5) -> List[Template]:
         """Recommend templates
         
+        Indexed templates of the same discipline and paper type are ranked by the
+        similarity of their feature vectors to the requested structure. Templates that
+        can't be loaded (see template_loader) are skipped.
+        
         Args:
             discipline: Discipline name
             paper_type: Paper type
-            requirements: Special requirements
+            requirements: Special requirements; "template" recommends templates similar to a
+                given template (excluding itself), "element_count", "relation_count", "chapter_count",
+                "section_count" and "element_types" describe the wanted structure,
+                "section_signature" restricts to a section order and "exclude" lists
+                template IDs to skip
+            top_k: Number of templates to recommend
             
         Returns:
             List[Template]: Recommended template list
         """
         try:
             self.add_step("template_recommendation")
+            requirements = requirements or {}
             
-            # Analyze discipline features
+            # Look up discipline features (cached per discipline and knowledge graph)
             discipline_features = self.discipline_analyzer.analyze_discipline(discipline)
             
-            # Get historical template data
-            historical_templates = self._get_historical_templates(discipline, paper_type)
-            
-            # Calculate template similarity scores
-            template_scores = self._calculate_template_scores(
-                discipline_features, 
-                historical_templates,
-                requirements
-            )
-            
-            # Select best templates
-            recommended_templates = self._select_best_templates(template_scores)
+            # Query the recommendation index, filtering by discipline and paper type first
+            query = self._build_recommendation_query(discipline_features, requirements)
+            exclude = list(requirements.get("exclude") or [])
+            if isinstance(requirements.get("template"), Template):
+                exclude.append(requirements["template"].template_id)
+            recommended_templates = []
+            while len(recommended_templates) < top_k:
+                matches = self.template_index.search(
+                    query,
+                    top_k=top_k - len(recommended_templates),
+                    discipline=discipline,
+                    paper_type=paper_type,
+                    signature=requirements.get("section_signature"),
+                    exclude=exclude
+                )
+                if not matches:
+                    break
+                for template_id, _ in matches:
+                    exclude.append(template_id)
+                    template = self._resolve_template(template_id)
+                    if template is not None:
+                        recommended_templates.append(template)
             
             self.logger.info(f"Successfully recommended templates for {discipline} {paper_type}")
             self.end_step("template_recommendation", success=True)
@@ -400,11 +473,23 @@ class TemplateGenerator:
             priority=priority
         )
         
-    def execute_tasks(self) -> Dict[str, Any]:
+    def execute_tasks(self, use_processes: bool = False, resume_from: Optional[str] = None) -> Dict[str, Any]:
         """Execute all tasks in parallel
         
+        A task starts as soon as all of its dependencies have completed; among ready tasks,
+        higher priority runs first. A failed task marks all of its dependents as failed
+        without running them. Each task is tracked as a generation step named after the task.
+        
+        Args:
+            use_processes: Run tasks in a process pool instead of a thread pool
+                (task functions and arguments must be picklable)
+            resume_from: Checkpoint ID; tasks completed in that checkpoint are not run again
+            
         Returns:
-            Dict[str, Any]: Task execution results
+            Dict[str, Any]: Results of the successfully completed tasks, keyed by task name
+            
+        Raises:
+            ValueError: If a dependency is unknown or the dependencies contain a cycle
         """
         try:
             # Build task dependency graph
@@ -413,8 +498,13 @@ class TemplateGenerator:
             # Get execution order
             execution_order = self._get_execution_order(task_graph)
             
+            # Restore results of tasks completed before the checkpoint
+            completed = {}
+            if resume_from:
+                completed = self._load_completed_tasks(self.checkpoint_dir / resume_from)
+            
             # Execute tasks in parallel
-            results = self._execute_tasks_parallel(execution_order)
+            results = self._execute_tasks_parallel(execution_order, use_processes, completed)
             
             return results
             
@@ -541,30 +631,47 @@ class TemplateGenerator:
         # Implement template validation logic
         return True
         
-    def _get_historical_templates(self, discipline: str, paper_type: str) -> List[Template]:
-        """Get historical templates"""
-        # Implement historical template retrieval logic
-        return []
-        
-    def _calculate_template_scores(self, 
-                                 discipline_features: Dict[str, Any],
-                                 historical_templates: List[Template],
-                                 requirements: Dict[str, Any] = None) -> Dict[str, float]:
-        """Calculate template similarity scores"""
-        # Implement template scoring logic
-        return {}
+    def _build_recommendation_query(self, 
+                                    discipline_features: Dict[str, Any],
+                                    requirements: Dict[str, Any]) -> Any:
+        """Build the feature vector used to query the recommendation index
         
-    def _select_best_templates(self, 
-                              template_scores: Dict[str, float],
-                              top_k: int = 5) -> List[Template]:
-        """Select best templates"""
-        # Implement template selection logic
-        return []
+        Counts missing from the requirements are taken from the discipline's structure metrics.
+        """
+        template = requirements.get("template")
+        if isinstance(template, Template):
+            features = self.template_index.get_features(template.template_id)
+            if features is None:
+                features = self.template_index.featurize(template)
+            return features["vector"]
+            
+        structure = discipline_features.get("structure", {})
+        metrics = structure.get("metrics", {})
+        element_patterns = structure.get("element_patterns", {})
+        element_count = requirements.get(
+            "element_count", metrics.get("elements", {}).get("total_elements", 0))
+        relation_count = requirements.get(
+            "relation_count", len(element_patterns.get("relationships", [])))
+        counts = {
+            "element_complexity": element_count,
+            "relation_complexity": relation_count,
+            "total_complexity": element_count + relation_count,
+            "chapter_count": requirements.get("chapter_count", metrics.get("chapters", {}).get("total_chapters", 0)),
+            "section_count": requirements.get("section_count", metrics.get("sections", {}).get("total_sections", 0))
+        }
+        return feature_vector(counts, requirements.get("element_types", []))
         
     def _analyze_template_features(self, templates: List[Template]) -> List[Dict[str, Any]]:
-        """Analyze template features"""
-        # Implement template feature analysis logic
-        return []
+        """Analyze template features
+        
+        Features of registered templates are read from the recommendation index; other
+        templates are featurized on the fly.
+        """
+        features = []
+        for template in templates:
+            indexed = self.template_index.get_features(template.template_id)
+            features.append(indexed if indexed is not None else self.template_index.featurize(template))
+        return features
         
     def _fuse_features(self, 
                       features: List[Dict[str, Any]],
@@ -602,14 +709,44 @@ class TemplateGenerator:
         return Template()
         
     def _save_progress(self, path: Path):
-        """Save progress to file"""
-        # Implement progress saving logic
-        pass
+        """Save progress to file
+        
+        Results of completed tasks are saved with the progress so that execute_tasks can
+        resume from the checkpoint; results that are not JSON serializable are not saved
+        and those tasks run again on resume.
+        """
+        task_results = {}
+        for name, result in self.task_results.items():
+            try:
+                json.dumps(result)
+            except (TypeError, ValueError):
+                continue
+            task_results[name] = result
+            
+        progress = self.get_progress()
+        progress["task_results"] = task_results
+        with open(path / "progress.json", "w", encoding="utf-8") as f:
+            json.dump(progress, f, ensure_ascii=False, indent=2, default=str)
         
     def _load_progress(self, path: Path) -> Dict[str, Any]:
         """Load progress from file"""
-        # Implement progress loading logic
-        return {}
+        progress_file = path / "progress.json"
+        if not progress_file.exists():
+            return {}
+        with open(progress_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+            
+    def _load_completed_tasks(self, path: Path) -> Dict[str, Any]:
+        """Load results of tasks that completed in a checkpoint"""
+        if not path.exists():
+            raise ValueError(f"Checkpoint {path.name} not found")
+        progress = self._load_progress(path)
+        steps = progress.get("steps", {})
+        return {
+            name: result
+            for name, result in progress.get("task_results", {}).items()
+            if name in self.tasks and steps.get(name, {}).get("status") == GenerationStatus.COMPLETED.value
+        }
         
     def _save_metadata(self, metadata: Dict[str, Any], path: Path):
         """Save metadata to file"""
@@ -622,18 +759,163 @@ class TemplateGenerator:
         return {}
         
     def _build_task_graph(self) -> Dict[str, List[str]]:
-        """Build task dependency graph"""
-        # Implement task graph building logic
-        return {}
+        """Build task dependency graph
+        
+        Returns:
+            Dict[str, List[str]]: Task name -> names of the tasks that depend on it
+            
+        Raises:
+            ValueError: If a task depends on an unknown task
+        """
+        graph = {name: [] for name in self.tasks}
+        for name, task in self.tasks.items():
+            for dependency in task.dependencies or []:
+                if dependency not in graph:
+                    raise ValueError(f"Task {name} depends on unknown task {dependency}")
+                graph[dependency].append(name)
+        return graph
         
     def _get_execution_order(self, 
                            graph: Dict[str, List[str]]) -> List[List[str]]:
-        """Get task execution order"""
-        # Implement execution order calculation logic
-        return []
+        """Get task execution order
+        
+        Args:
+            graph: Task dependency graph from _build_task_graph
+            
+        Returns:
+            List[List[str]]: Levels of tasks; every task only depends on tasks in earlier levels,
+                and tasks within a level are ordered by priority
+                
+        Raises:
+            ValueError: If the dependencies contain a cycle
+        """
+        in_degree = {name: len(set(self.tasks[name].dependencies or [])) for name in graph}
+        position = {name: index for index, name in enumerate(graph)}
+        
+        def by_priority(names):
+            return sorted(names, key=lambda name: (-self.tasks[name].priority, position[name]))
+        
+        levels = []
+        level = by_priority(name for name, degree in in_degree.items() if degree == 0)
+        while level:
+            levels.append(level)
+            next_level = set()
+            for name in level:
+                for dependent in set(graph[name]):
+                    in_degree[dependent] -= 1
+                    if in_degree[dependent] == 0:
+                        next_level.add(dependent)
+            level = by_priority(next_level)
+            
+        scheduled = sum(len(level) for level in levels)
+        if scheduled < len(graph):
+            cyclic = sorted(name for name, degree in in_degree.items() if degree > 0)
+            raise ValueError(f"Task dependencies contain a cycle: {', '.join(cyclic)}")
+        return levels
         
     def _execute_tasks_parallel(self, 
-                              execution_order: List[List[str]]) -> Dict[str, Any]:
-        """Execute tasks in parallel"""
-        # Implement parallel task execution logic
-        return {} 
\ No newline at end of file
+                              execution_order: List[List[str]],
+                              use_processes: bool = False,
+                              completed: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Execute tasks in parallel
+        
+        Args:
+            execution_order: Levels of tasks from _get_execution_order
+            use_processes: Run tasks in a process pool instead of a thread pool
+            completed: Results of tasks that are already completed and are not run again
+            
+        Returns:
+            Dict[str, Any]: Results of the successfully completed tasks
+        """
+        order = [name for level in execution_order for name in level]
+        if not order:
+            return {}
+        rank = {name: index for index, name in enumerate(order)}
+        dependents: Dict[str, List[str]] = {name: [] for name in order}
+        waiting: Dict[str, int] = {}
+        for name in order:
+            dependencies = set(self.tasks[name].dependencies or [])
+            waiting[name] = len(dependencies)
+            for dependency in dependencies:
+                dependents[dependency].append(name)
+                
+        results: Dict[str, Any] = {}
+        failed: Dict[str, str] = {}
+        ready: List[Tuple[int, int, str]] = []
+        
+        def release(name: str):
+            for dependent in dependents[name]:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0 and dependent not in results:
+                    heapq.heappush(ready, (-self.tasks[dependent].priority, rank[dependent], dependent))
+                    
+        def fail(name: str, error: str):
+            # Dependents of a failed task fail without running
+            pending = [(name, error)]
+            while pending:
+                name, error = pending.pop()
+                if name in failed:
+                    continue
+                failed[name] = error
+                if name not in self.steps:
+                    self.add_step(name, details={"dependencies": list(self.tasks[name].dependencies or [])})
+                self.end_step(name, success=False, error=error)
+                pending.extend((dependent, f"Dependency {name} failed") for dependent in dependents[name])
+                
+        for name in order:
+            self.add_step(name, details={"dependencies": list(self.tasks[name].dependencies or [])})
+        for name, result in (completed or {}).items():
+            if name in rank:
+                results[name] = result
+                self.task_results[name] = result
+                self.steps[name].progress = 1.0
+                self.end_step(name, success=True)
+        for name in order:
+            if waiting[name] == 0 and name not in results:
+                heapq.heappush(ready, (-self.tasks[name].priority, rank[name], name))
+        for name in results:
+            release(name)
+                
+        if use_processes:
+            workers = self.max_workers or os.cpu_count() or 1
+            executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            workers = self.max_workers or min(32, (os.cpu_count() or 1) + 4)
+            executor = ThreadPoolExecutor(max_workers=workers)
+            
+        running = {}
+        with executor:
+            while ready or running:
+                # Only submit as many tasks as there are workers, so that priority decides
+                # which ready task runs next
+                while ready and len(running) < workers:
+                    _, _, name = heapq.heappop(ready)
+                    if name in failed:
+                        continue
+                    task = self.tasks[name]
+                    self.start_step(name)
+                    running[executor.submit(_run_task, task.func, task.args, task.kwargs)] = name
+                if not running:
+                    continue
+                    
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    step = self.steps[name]
+                    try:
+                        result, step.start_time, end_time = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Task {name} failed: {e}")
+                        fail(name, str(e))
+                        continue
+                    results[name] = result
+                    self.task_results[name] = result
+                    step.progress = 1.0
+                    self.end_step(name, success=True)
+                    step.end_time = end_time
+                    step.details["duration"] = (end_time - step.start_time).total_seconds()
+                    release(name)
+                    
+        if failed:
+            self.logger.warning(f"{len(failed)} of {len(order)} tasks failed: {', '.join(sorted(failed))}")
+        return results
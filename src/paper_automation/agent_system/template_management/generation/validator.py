@@ -1,14 +1,121 @@
 """模板验证器模块
 
 此模块实现了模板的验证功能，包括结构验证、内容验证和关系验证。
+
+关系按 source_id -> target_id 建立一次邻接索引，循环检测为迭代的深度优先搜索（O(V+E)）。
+传入 ValidationState 时，验证状态在多次验证之间保留元素检查结果和关系索引，
+再次验证时只重新检查被标记为已修改的元素和关系。
 """
 
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Optional, Iterable
 import logging
 import re
 from ..base.template import Template
 from ..discipline.analyzer import DisciplineAnalyzer
 
+class RelationIndex:
+    """关系邻接索引，支持按关系增删边"""
+
+    def __init__(self, relations: Optional[Dict[str, Any]] = None):
+        """初始化索引
+
+        Args:
+            relations: 关系字典 {关系ID: 关系}，缺少 source_id 或 target_id 的关系不建立边
+        """
+        # 关系ID -> (源元素, 目标元素)
+        self.edges: Dict[str, Tuple[Any, Any]] = {}
+        # 源元素 -> {目标元素: 边数}
+        self.adjacency: Dict[Any, Dict[Any, int]] = {}
+        for relation_id, relation in (relations or {}).items():
+            self.set_relation(relation_id, relation)
+
+    def set_relation(self, relation_id: str, relation: Any) -> Optional[Tuple[Any, Any]]:
+        """加入或更新关系对应的边
+
+        Returns:
+            Optional[Tuple[Any, Any]]: 新加入的边，关系无效时为 None
+        """
+        self.remove_relation(relation_id)
+        if not isinstance(relation, dict) or "source_id" not in relation or "target_id" not in relation:
+            return None
+        edge = (relation["source_id"], relation["target_id"])
+        try:
+            targets = self.adjacency.setdefault(edge[0], {})
+            targets[edge[1]] = targets.get(edge[1], 0) + 1
+        except TypeError:
+            # 不可哈希的ID，在关系检查中报告
+            return None
+        self.edges[relation_id] = edge
+        return edge
+
+    def remove_relation(self, relation_id: str) -> None:
+        edge = self.edges.pop(relation_id, None)
+        if edge is None:
+            return
+        targets = self.adjacency[edge[0]]
+        targets[edge[1]] -= 1
+        if not targets[edge[1]]:
+            del targets[edge[1]]
+            if not targets:
+                del self.adjacency[edge[0]]
+
+    def has_cycle(self, roots: Iterable[Any]) -> bool:
+        """判断从 roots 出发可达的部分是否存在环（迭代的三色深度优先搜索）"""
+        # 0: 在当前搜索路径上，1: 已完成
+        state: Dict[Any, int] = {}
+        for root in roots:
+            if root in state:
+                continue
+            state[root] = 0
+            stack = [(root, iter(self.adjacency.get(root, ())))]
+            while stack:
+                node, successors = stack[-1]
+                for successor in successors:
+                    mark = state.get(successor)
+                    if mark == 0:
+                        return True
+                    if mark is None:
+                        state[successor] = 0
+                        stack.append((successor, iter(self.adjacency.get(successor, ()))))
+                        break
+                else:
+                    state[node] = 1
+                    stack.pop()
+        return False
+
+class ValidationState:
+    """一个模板的验证状态，在多次验证之间保留关系索引和元素检查结果
+
+    修改模板后需调用 mark_dirty 标记修改过的元素和关系（无法确定时调用 invalidate），
+    下一次验证只重新检查这些元素和关系。
+    """
+
+    def __init__(self):
+        self.index: Optional[RelationIndex] = None
+        # 元素键 -> 检查结果（第一个错误，没有错误时为None）
+        self.element_results: Dict[str, Optional[str]] = {}
+        self.acyclic: Optional[bool] = None
+        self.result: Optional[Dict[str, Any]] = None
+        # None 表示全部需要重新检查
+        self.dirty_elements: Optional[set] = None
+        self.dirty_relations: Optional[set] = None
+
+    def mark_dirty(self, element_ids: Iterable[str] = (), relation_ids: Iterable[str] = ()) -> None:
+        """标记修改过的元素和关系"""
+        if self.dirty_elements is not None:
+            self.dirty_elements.update(element_ids)
+        if self.dirty_relations is not None:
+            self.dirty_relations.update(relation_ids)
+
+    def invalidate(self) -> None:
+        """下一次验证重新检查所有元素和关系"""
+        self.dirty_elements = None
+        self.dirty_relations = None
+
+    @property
+    def is_dirty(self) -> bool:
+        return self.dirty_elements is None or self.dirty_relations is None or bool(self.dirty_elements or self.dirty_relations)
+
 class TemplateValidator:
     """模板验证器"""
     
@@ -31,12 +138,14 @@ class TemplateValidator:
         # 定义有效的关系类型
         self.valid_relation_types = {"contains", "references", "depends_on", "follows"}
         
-    def validate_template(self, template: Template) -> Dict[str, Any]:
+    def validate_template(self, template: Template, state: Optional[ValidationState] = None) -> Dict[str, Any]:
         """
         验证模板的有效性。
 
         Args:
             template (Template): 要验证的模板对象
+            state (ValidationState): 验证状态（可选），提供时复用其中未标记为已修改的元素的检查结果，
+                并增量更新关系索引
 
         Returns:
             Dict[str, Any]: 包含验证结果的字典
@@ -67,8 +176,15 @@ class TemplateValidator:
             result["is_valid"] = False
             result["errors"].append("Missing required elements")
 
+        # 新增或删除元素时，循环检测的起点随之变化
+        roots_changed = state is None or state.dirty_elements is None or any(
+            (element_id in template.elements) != (element_id in state.element_results)
+            for element_id in state.dirty_elements
+        )
+
         # 检查重复的元素ID
         element_ids = set()
+        checked = set()
         for element_id, element in template.elements.items():
             if not element_id or not isinstance(element, dict):
                 result["is_valid"] = False
@@ -87,49 +203,26 @@ class TemplateValidator:
                 break
             element_ids.add(element["element_id"])
             
-            if "element_type" not in element:
-                result["is_valid"] = False
-                result["errors"].append("Invalid element")
-                continue
-
-            # 验证元素类型
-            if element["element_type"] not in self.valid_element_types:
-                result["is_valid"] = False
-                result["errors"].append("Invalid element type")
-                continue
-                
-            if "content" not in element or not isinstance(element["content"], dict):
+            error = self._element_error(element_id, element, state)
+            checked.add(element_id)
+            if error:
                 result["is_valid"] = False
-                result["errors"].append("Invalid content format")
-                continue
+                result["errors"].append(error)
 
-            # 验证必需属性
-            if "attributes" in element:
-                if not isinstance(element["attributes"], dict):
-                    result["is_valid"] = False
-                    result["errors"].append("Invalid element")
-                    continue
-                
-                if "level" not in element["attributes"]:
-                    result["is_valid"] = False
-                    result["errors"].append("Missing required attributes")
-                    continue
+        # 因ID无效、重复或提前结束而没有检查的已修改元素保留到下次验证，避免沿用过期的结果
+        unchecked = set()
+        if state is not None:
+            pending = template.elements.keys() if state.dirty_elements is None else state.dirty_elements
+            unchecked = {element_id for element_id in pending
+                         if element_id in template.elements and element_id not in checked}
 
-                # 验证样式格式
-                if "style" in element["attributes"]:
-                    style = element["attributes"]["style"]
-                    if not isinstance(style, dict):
-                        result["is_valid"] = False
-                        result["errors"].append("Invalid style format")
-                        continue
-                    
-                    # 验证样式属性
-                    for key, value in style.items():
-                        if key == "size":
-                            if not isinstance(value, (int, float)) and not (isinstance(value, str) and value.isdigit()):
-                                result["is_valid"] = False
-                                result["errors"].append("Invalid style format")
-                                break
+        if state is not None:
+            # 移除已删除元素的检查结果
+            removed = (state.element_results.keys() - template.elements.keys()
+                       if state.dirty_elements is None else
+                       [element_id for element_id in state.dirty_elements if element_id not in template.elements])
+            for element_id in removed:
+                state.element_results.pop(element_id, None)
 
         # 验证关系
         for relation_id, relation in template.relations.items():
@@ -171,7 +264,7 @@ class TemplateValidator:
                 continue
 
         # 验证循环关系
-        if not self._validate_circular_relations(template):
+        if not self._check_acyclic(template, state, roots_changed):
             result["is_valid"] = False
             result["errors"].append("Circular relation detected")
 
@@ -220,43 +313,129 @@ class TemplateValidator:
                 result["is_valid"] = False
                 result["errors"].append("Error validating template structure")
 
+        if state is not None:
+            state.result = result
+            state.dirty_elements = unchecked
+            state.dirty_relations = set()
         return result
 
-    def _validate_circular_relations(self, template: Template) -> bool:
-        """验证模板中是否存在循环关系
+    def _check_acyclic(self, template: Template, state: Optional[ValidationState], roots_changed: bool) -> bool:
+        """检查关系是否无环，提供验证状态时增量更新关系索引"""
+        if state is None:
+            return self._validate_circular_relations(template)
+
+        if state.index is None or state.dirty_relations is None:
+            state.index = RelationIndex(template.relations)
+            state.acyclic = self._validate_circular_relations(template, state.index)
+            return state.acyclic
+
+        added = []
+        for relation_id in state.dirty_relations:
+            if relation_id in template.relations:
+                edge = state.index.set_relation(relation_id, template.relations[relation_id])
+                if edge is not None:
+                    added.append(edge)
+            else:
+                state.index.remove_relation(relation_id)
+
+        # 原本无环且起点不变时，新加入的边 (u, v) 只有在从 v 出发能到达环时才会使可达部分出现环
+        # （包括经过该边的新环，以及原本不可达、因该边变为可达的环）
+        if not (state.acyclic and not roots_changed and
+                not any(state.index.has_cycle([target]) for _, target in added)):
+            state.acyclic = self._validate_circular_relations(template, state.index)
+        return state.acyclic
+
+    def validate_all(self, template: Template, state: Optional[ValidationState] = None) -> Dict[str, Any]:
+        """运行模板验证以及关系、交叉引用、完整性和一致性检查，合并为一个验证结果
+        
+        各项检查共用同一份元素ID集合。
         
         Args:
             template: 待验证的模板
+            state: 验证状态（可选），见 validate_template
             
         Returns:
-            bool: 如果不存在循环关系返回True,否则返回False
+            Dict[str, Any]: 合并后的验证结果
         """
-        def find_cycles(node: str, visited: set, path: set) -> bool:
-            if node in path:
-                return True
-            if node in visited:
-                return False
+        base = self.validate_template(template, state)
+        results = {
+            "is_valid": base["is_valid"],
+            "errors": list(base["errors"]),
+            "warnings": list(base["warnings"])
+        }
+        
+        element_ids = set(template.template_data.get("elements", {}).keys())
+        for check in (
+            self._validate_relationships(template, element_ids),
+            self._validate_cross_references(template, element_ids),
+            self._validate_completeness(template),
+            self._validate_consistency(template, element_ids)
+        ):
+            if not check["is_valid"]:
+                results["is_valid"] = False
+            results["errors"].extend(check["errors"])
+            results["warnings"].extend(check["warnings"])
+        return results
+
+    def _element_error(self, element_id: str, element: Dict[str, Any],
+                       state: Optional[ValidationState] = None) -> Optional[str]:
+        """单个元素的检查结果，提供验证状态时复用未修改元素的结果"""
+        if state is None:
+            return self._check_element(element)
+        if (state.dirty_elements is not None and element_id not in state.dirty_elements
+                and element_id in state.element_results):
+            return state.element_results[element_id]
+        error = self._check_element(element)
+        state.element_results[element_id] = error
+        return error
+
+    def _check_element(self, element: Dict[str, Any]) -> Optional[str]:
+        """检查元素的类型、内容、属性和样式，返回第一个错误，没有错误时返回None"""
+        if "element_type" not in element:
+            return "Invalid element"
+
+        # 验证元素类型
+        if element["element_type"] not in self.valid_element_types:
+            return "Invalid element type"
+            
+        if "content" not in element or not isinstance(element["content"], dict):
+            return "Invalid content format"
+
+        # 验证必需属性
+        if "attributes" in element:
+            attributes = element["attributes"]
+            if not isinstance(attributes, dict):
+                return "Invalid element"
+            
+            if "level" not in attributes:
+                return "Missing required attributes"
+
+            # 验证样式格式
+            if "style" in attributes:
+                style = attributes["style"]
+                if not isinstance(style, dict):
+                    return "Invalid style format"
                 
-            visited.add(node)
-            path.add(node)
+                # 验证样式属性
+                value = style.get("size")
+                if "size" in style and not isinstance(value, (int, float)) and not (isinstance(value, str) and value.isdigit()):
+                    return "Invalid style format"
+        return None
+
+    def _validate_circular_relations(self, template: Template, index: Optional[RelationIndex] = None) -> bool:
+        """验证模板中是否存在循环关系
+        
+        Args:
+            template: 待验证的模板
+            index: 关系邻接索引（可选），默认根据模板的关系建立
             
-            # 查找所有以当前节点为源的关系
-            for relation in template.relations.values():
-                if relation["source_id"] == node:
-                    if find_cycles(relation["target_id"], visited, path):
-                        return True
-                        
-            path.remove(node)
-            return False
-            
-        visited = set()
-        # 对每个未访问的节点进行深度优先搜索
-        for element_id in template.elements:
-            if element_id not in visited:
-                if find_cycles(element_id, visited, set()):
-                    return False
-                    
-        return True
+        Returns:
+            bool: 如果不存在循环关系返回True,否则返回False
+        """
+        if index is None:
+            index = RelationIndex(template.relations)
+        # 从每个元素出发进行深度优先搜索
+        return not index.has_cycle(template.elements)
 
     def validate_elements(self, template: Template) -> Tuple[bool, Dict[str, Any]]:
         """验证模板元素
@@ -728,11 +907,12 @@ class TemplateValidator:
                 "warnings": []
             }
 
-    def _validate_relationships(self, template: Template) -> Dict[str, Any]:
+    def _validate_relationships(self, template: Template, element_ids: Optional[set] = None) -> Dict[str, Any]:
         """验证模板关系
         
         Args:
             template: 待验证的模板
+            element_ids: 元素ID集合（可选），默认根据模板数据中的元素计算
             
         Returns:
             Dict[str, Any]: 验证结果
@@ -745,7 +925,8 @@ class TemplateValidator:
             }
             
             relationships = template.template_data.get("relationships", {})
-            elements = template.template_data.get("elements", {})
+            if element_ids is None:
+                element_ids = set(template.template_data.get("elements", {}).keys())
             
             for rel_id, rel_data in relationships.items():
                 if not rel_data.get("source") or not rel_data.get("target"):
@@ -756,11 +937,11 @@ class TemplateValidator:
                 source = rel_data["source"]
                 target = rel_data["target"]
                 
-                if source not in elements:
+                if source not in element_ids:
                     results["is_valid"] = False
                     results["errors"].append(f"Relationship {rel_id} has invalid source: {source}")
                 
-                if target not in elements:
+                if target not in element_ids:
                     results["is_valid"] = False
                     results["errors"].append(f"Relationship {rel_id} has invalid target: {target}")
             
@@ -774,11 +955,12 @@ class TemplateValidator:
                 "warnings": []
             }
 
-    def _validate_cross_references(self, template: Template) -> Dict[str, Any]:
+    def _validate_cross_references(self, template: Template, element_ids: Optional[set] = None) -> Dict[str, Any]:
         """验证模板交叉引用
         
         Args:
             template: 待验证的模板
+            element_ids: 元素ID集合（可选），默认根据模板数据中的元素计算
             
         Returns:
             Dict[str, Any]: 验证结果
@@ -790,12 +972,12 @@ class TemplateValidator:
                 "warnings": []
             }
             
-            # 获取所有元素和引用
-            elements = template.template_data.get("elements", {})
+            # 获取所有引用
             references = template.template_data.get("references", {})
             
             # 收集所有元素ID
-            element_ids = set(elements.keys())
+            if element_ids is None:
+                element_ids = set(template.template_data.get("elements", {}).keys())
             
             # 验证每个引用
             for ref_id, ref in references.items():
@@ -1060,11 +1242,12 @@ class TemplateValidator:
                 "warnings": []
             }
 
-    def _validate_consistency(self, template: Template) -> Dict[str, Any]:
+    def _validate_consistency(self, template: Template, element_ids: Optional[set] = None) -> Dict[str, Any]:
         """验证模板一致性
         
         Args:
             template: 待验证的模板
+            element_ids: 元素ID集合（可选），默认根据模板数据中的元素计算
             
         Returns:
             Dict[str, Any]: 验证结果
@@ -1096,11 +1279,11 @@ class TemplateValidator:
                 results["errors"].append(f"Chapters in content but not in structure: {extra_chapters}")
             
             # 验证元素引用一致性
-            elements = template.template_data.get("elements", {})
             relationships = template.template_data.get("relationships", {})
             references = template.template_data.get("references", {})
             
-            element_ids = set(elements.keys())
+            if element_ids is None:
+                element_ids = set(template.template_data.get("elements", {}).keys())
             
             # 检查关系中的元素引用
             for rel in relationships.values():
@@ -0,0 +1,187 @@
+"""模板数据块存储模块
+
+此模块实现了按内容寻址的块存储，模板数据切分为块保存，各版本共享内容相同的块。
+
+序列化后不小于 CHUNK_MIN_BYTES 的字典或列表（元素、章节等）单独保存为一个块，父节点中以 {"$chunk": <哈希>}
+引用子块。块以内容的 SHA-256 命名，未变化的子树在比较版本时只需比较哈希。块可以按 gzip 或 zstd
+（需安装 zstandard）压缩保存。
+"""
+
+from typing import Dict, Any, Tuple
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+# 序列化后不小于该字节数的字典或列表单独保存为块
+CHUNK_MIN_BYTES = int(os.getenv("TEMPLATE_CHUNK_MIN_BYTES", "256"))
+# 块压缩方式：gzip、zstd 或 none
+DEFAULT_COMPRESSION = os.getenv("TEMPLATE_STORE_COMPRESSION", "gzip")
+
+# 子块引用和转义标记
+CHUNK_KEY = "$chunk"
+LITERAL_KEY = "$literal"
+
+# 块文件头，标明压缩方式，读取时与当前配置无关
+_HEADERS = {"none": b"N", "gzip": b"G", "zstd": b"Z"}
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+def _canonical(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+def is_chunk_ref(value: Any) -> bool:
+    """判断节点是否为子块引用"""
+    return isinstance(value, dict) and len(value) == 1 and isinstance(value.get(CHUNK_KEY), str)
+
+def _needs_escape(value: Dict[str, Any]) -> bool:
+    return len(value) == 1 and (CHUNK_KEY in value or LITERAL_KEY in value)
+
+class ObjectStore:
+    """内容寻址的块存储"""
+
+    def __init__(self, root: str, compression: str = DEFAULT_COMPRESSION,
+                 chunk_min_bytes: int = CHUNK_MIN_BYTES):
+        """初始化块存储
+
+        Args:
+            root: 块存储目录
+            compression: 压缩方式，gzip、zstd 或 none；未安装 zstandard 时 zstd 退回 gzip
+            chunk_min_bytes: 单独保存为块的最小序列化字节数
+        """
+        self.root = root
+        self.logger = logging.getLogger(__name__)
+        if compression not in _HEADERS:
+            raise ValueError(f"Unsupported compression: {compression}")
+        if compression == "zstd" and zstandard is None:
+            self.logger.warning("zstandard is not installed, falling back to gzip compression")
+            compression = "gzip"
+        self.compression = compression
+        self.chunk_min_bytes = chunk_min_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def _encode(self, raw: bytes) -> bytes:
+        if self.compression == "gzip":
+            return _HEADERS["gzip"] + gzip.compress(raw, mtime=0)
+        if self.compression == "zstd":
+            return _HEADERS["zstd"] + zstandard.ZstdCompressor().compress(raw)
+        return _HEADERS["none"] + raw
+
+    @staticmethod
+    def _decode(blob: bytes) -> bytes:
+        header, payload = blob[:1], blob[1:]
+        if header == _HEADERS["gzip"]:
+            return gzip.decompress(payload)
+        if header == _HEADERS["zstd"]:
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read zstd-compressed chunks")
+            return zstandard.ZstdDecompressor().decompress(payload)
+        return payload
+
+    def contains(self, digest: str) -> bool:
+        return os.path.exists(self._path(digest))
+
+    def put(self, raw: bytes) -> Tuple[str, bool]:
+        """保存块，内容已存在时不重复写入
+
+        Args:
+            raw: 块内容
+
+        Returns:
+            Tuple[str, bool]: 块哈希和是否新写入
+        """
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self._path(digest)
+        if os.path.exists(path):
+            return digest, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(self._encode(raw))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return digest, True
+
+    def get(self, digest: str) -> bytes:
+        """读取块内容
+
+        Raises:
+            KeyError: 块不存在时
+        """
+        try:
+            with open(self._path(digest), "rb") as f:
+                return self._decode(f.read())
+        except FileNotFoundError:
+            raise KeyError(f"Chunk {digest} not found") from None
+
+    def get_node(self, digest: str) -> Any:
+        """读取块对应的节点（子块仍为引用）"""
+        return json.loads(self.get(digest))
+
+    def put_tree(self, data: Any) -> Tuple[str, Dict[str, int]]:
+        """将数据切分为块并保存
+
+        Args:
+            data: 模板数据
+
+        Returns:
+            Tuple[str, Dict[str, int]]: 根块哈希和写入统计（chunks 为块总数，written 为新写入的块数）
+        """
+        stats = {"chunks": 0, "written": 0}
+
+        def store(node: Any) -> Any:
+            """返回节点在父块中的表示：较大的字典或列表保存为块并返回引用"""
+            if isinstance(node, dict):
+                encoded = {key: store(value) for key, value in node.items()}
+                if _needs_escape(encoded):
+                    encoded = {LITERAL_KEY: encoded}
+            elif isinstance(node, (list, tuple)):
+                encoded = [store(item) for item in node]
+            else:
+                return node
+
+            raw = _canonical(encoded)
+            if len(raw) < self.chunk_min_bytes:
+                return encoded
+            digest, written = self.put(raw)
+            stats["chunks"] += 1
+            stats["written"] += int(written)
+            return {CHUNK_KEY: digest}
+
+        encoded = store(data)
+        if is_chunk_ref(encoded):
+            return encoded[CHUNK_KEY], stats
+
+        # 根节点总是单独保存为块
+        digest, written = self.put(_canonical(encoded))
+        stats["chunks"] += 1
+        stats["written"] += int(written)
+        return digest, stats
+
+    def resolve(self, node: Any) -> Any:
+        """将节点中的子块引用展开为完整数据"""
+        if is_chunk_ref(node):
+            return self.resolve(self.get_node(node[CHUNK_KEY]))
+        if isinstance(node, dict):
+            if len(node) == 1 and LITERAL_KEY in node:
+                return {key: self.resolve(value) for key, value in node[LITERAL_KEY].items()}
+            return {key: self.resolve(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [self.resolve(item) for item in node]
+        return node
+
+    def get_tree(self, digest: str) -> Any:
+        """读取根块哈希对应的完整数据"""
+        return self.resolve(self.get_node(digest))
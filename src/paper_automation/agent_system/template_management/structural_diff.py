@@ -0,0 +1,250 @@
+"""模板结构差异模块
+
+此模块实现了模板版本之间的结构化比较，结果为 JSON Patch（RFC 6902）风格的操作列表：
+{"op": "add" | "remove" | "replace", "path": JSON指针, "value": 新值, "old": 旧值}，按顺序应用即可由旧数据得到新数据。
+
+列表先按内容哈希做最长公共子序列对齐，未对齐的部分中带ID（id、element_id 等）的元素再按ID对齐。
+数据来自块存储时，哈希相同的子树直接跳过，不读取其内容；两个块之间的差异按块哈希缓存。
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+import copy
+import difflib
+import json
+import os
+import threading
+from .object_store import ObjectStore, is_chunk_ref, CHUNK_KEY, LITERAL_KEY
+
+# 用于对齐列表元素的ID字段，按顺序取第一个存在的字段
+ID_KEYS = ("id", "element_id", "section_id", "relation_id")
+# 块对差异缓存的条目数
+DIFF_CACHE_SIZE = int(os.getenv("TEMPLATE_DIFF_CACHE_SIZE", "256"))
+
+Operation = Dict[str, Any]
+
+def escape_pointer(token: Any) -> str:
+    """转义JSON指针中的单个路径片段"""
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+def parse_pointer(path: str) -> List[str]:
+    """将JSON指针拆分为路径片段"""
+    if not path:
+        return []
+    if not path.startswith("/"):
+        raise ValueError(f"Invalid JSON pointer: {path}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in path[1:].split("/")]
+
+def _resolve_parent(data: Any, tokens: List[str]) -> Tuple[Any, str]:
+    parent = data
+    for token in tokens[:-1]:
+        parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+    return parent, tokens[-1]
+
+def apply_patch(data: Any, operations: List[Operation]) -> Any:
+    """按顺序应用操作列表，返回新数据（不修改输入）
+
+    Args:
+        data: 原数据
+        operations: 操作列表
+
+    Returns:
+        Any: 应用操作后的数据
+
+    Raises:
+        ValueError: 当操作无效时
+    """
+    result = copy.deepcopy(data)
+    for operation in operations:
+        op = operation.get("op")
+        tokens = parse_pointer(operation.get("path", ""))
+        if not tokens:
+            if op not in ("add", "replace"):
+                raise ValueError(f"Invalid operation on document root: {op}")
+            result = copy.deepcopy(operation["value"])
+            continue
+
+        parent, token = _resolve_parent(result, tokens)
+        if isinstance(parent, list):
+            index = len(parent) if token == "-" else int(token)
+            if op == "add":
+                parent.insert(index, copy.deepcopy(operation["value"]))
+            elif op == "remove":
+                del parent[index]
+            elif op == "replace":
+                parent[index] = copy.deepcopy(operation["value"])
+            else:
+                raise ValueError(f"Unsupported operation: {op}")
+        else:
+            if op in ("add", "replace"):
+                parent[token] = copy.deepcopy(operation["value"])
+            elif op == "remove":
+                del parent[token]
+            else:
+                raise ValueError(f"Unsupported operation: {op}")
+    return result
+
+class StructuralDiff:
+    """结构化差异引擎"""
+
+    def __init__(self, store: Optional[ObjectStore] = None, cache_size: int = DIFF_CACHE_SIZE):
+        """初始化差异引擎
+
+        Args:
+            store: 块存储，数据中含有块引用时用于按需读取子块
+            cache_size: 块对差异缓存的条目数
+        """
+        self.store = store
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str], List[Operation]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def diff(self, old: Any, new: Any) -> List[Operation]:
+        """计算两个数据之间的差异
+
+        Args:
+            old: 旧数据，可以是块引用 {"$chunk": 哈希}
+            new: 新数据，可以是块引用
+
+        Returns:
+            List[Operation]: 操作列表，按顺序应用到旧数据即得到新数据
+        """
+        operations: List[Operation] = []
+        self._diff(old, new, "", operations)
+        return operations
+
+    def _load(self, node: Any) -> Any:
+        """读取块引用指向的节点（只展开一层）"""
+        if self.store is None:
+            return node
+        while is_chunk_ref(node):
+            node = self.store.get_node(node[CHUNK_KEY])
+        if isinstance(node, dict) and len(node) == 1 and LITERAL_KEY in node:
+            node = node[LITERAL_KEY]
+        return node
+
+    def _value(self, node: Any) -> Any:
+        """完整展开节点，用于操作中的值"""
+        return self.store.resolve(node) if self.store is not None else copy.deepcopy(node)
+
+    def _loaded_value(self, node: Any) -> Any:
+        """完整展开已由 _load 读取的节点：节点本身已去掉引用和转义，只展开其子节点"""
+        if self.store is None:
+            return copy.deepcopy(node)
+        if isinstance(node, dict):
+            return {key: self.store.resolve(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [self.store.resolve(item) for item in node]
+        return node
+
+    def _diff(self, old: Any, new: Any, path: str, operations: List[Operation]) -> None:
+        # 块引用相等即内容相等，内联节点中的子块也只比较引用
+        if old == new:
+            return
+
+        if self.store is not None and is_chunk_ref(old) and is_chunk_ref(new):
+            key = (old[CHUNK_KEY], new[CHUNK_KEY])
+            with self._lock:
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+            if cached is None:
+                cached = []
+                self._diff_nodes(self._load(old), self._load(new), "", cached)
+                with self._lock:
+                    self._cache[key] = cached
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+            operations.extend(
+                dict(operation, path=path + operation["path"]) for operation in copy.deepcopy(cached)
+            )
+            return
+
+        self._diff_nodes(self._load(old), self._load(new), path, operations)
+
+    def _diff_nodes(self, old: Any, new: Any, path: str, operations: List[Operation]) -> None:
+        if isinstance(old, dict) and isinstance(new, dict):
+            for key, value in old.items():
+                child_path = f"{path}/{escape_pointer(key)}"
+                if key not in new:
+                    operations.append({"op": "remove", "path": child_path, "old": self._value(value)})
+                else:
+                    self._diff(value, new[key], child_path, operations)
+            for key, value in new.items():
+                if key not in old:
+                    operations.append({"op": "add", "path": f"{path}/{escape_pointer(key)}", "value": self._value(value)})
+        elif isinstance(old, list) and isinstance(new, list):
+            self._diff_list(old, new, path, operations)
+        elif old != new:
+            operations.append({"op": "replace", "path": path, "value": self._loaded_value(new),
+                               "old": self._loaded_value(old)})
+
+    @staticmethod
+    def _content_key(item: Any) -> str:
+        """列表元素的内容键：块引用取哈希，内联元素取其序列化结果"""
+        if is_chunk_ref(item):
+            return item[CHUNK_KEY]
+        return json.dumps(item, ensure_ascii=False, sort_keys=True, default=str)
+
+    @staticmethod
+    def _item_id(item: Any) -> Optional[Tuple[str, Any]]:
+        if isinstance(item, dict):
+            for key in ID_KEYS:
+                value = item.get(key)
+                if isinstance(value, (str, int)) and not isinstance(value, bool):
+                    return key, value
+        return None
+
+    def _diff_list(self, old: List[Any], new: List[Any], path: str, operations: List[Operation]) -> None:
+        # 第一步：按内容哈希对齐，相同的元素无需读取
+        matcher = difflib.SequenceMatcher(None, [self._content_key(item) for item in old],
+                                          [self._content_key(item) for item in new], autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                continue
+            if tag == "delete":
+                self._emit_removals(old[i1:i2], j1, path, operations)
+            elif tag == "insert":
+                self._emit_additions(new[j1:j2], j1, path, operations)
+            else:
+                self._diff_block(old[i1:i2], new[j1:j2], j1, path, operations)
+
+    def _diff_block(self, old: List[Any], new: List[Any], base: int, path: str,
+                    operations: List[Operation]) -> None:
+        """比较内容不同的一段元素，base 为该段在新列表中的起始位置"""
+        old_nodes = [self._load(item) for item in old]
+        new_nodes = [self._load(item) for item in new]
+        old_ids = [self._item_id(node) for node in old_nodes]
+        new_ids = [self._item_id(node) for node in new_nodes]
+
+        # 第二步：元素都有唯一ID时按ID对齐，ID相同的元素比较其内容
+        if all(old_ids) and all(new_ids) and len(set(old_ids)) == len(old_ids) and len(set(new_ids)) == len(new_ids):
+            matcher = difflib.SequenceMatcher(None, old_ids, new_ids, autojunk=False)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                if tag == "equal":
+                    for k in range(i2 - i1):
+                        self._diff(old[i1 + k], new[j1 + k], f"{path}/{base + j1 + k}", operations)
+                else:
+                    self._emit_removals(old[i1:i2], base + j1, path, operations)
+                    self._emit_additions(new[j1:j2], base + j1, path, operations)
+            return
+
+        # 匿名元素按位置配对，多余的元素删除或添加
+        paired = min(len(old), len(new))
+        for k in range(paired):
+            self._diff(old[k], new[k], f"{path}/{base + k}", operations)
+        self._emit_removals(old[paired:], base + paired, path, operations)
+        self._emit_additions(new[paired:], base + paired, path, operations)
+
+    def _emit_removals(self, items: List[Any], index: int, path: str, operations: List[Operation]) -> None:
+        # 依次删除同一位置上的元素
+        for item in items:
+            operations.append({"op": "remove", "path": f"{path}/{index}", "old": self._value(item)})
+
+    def _emit_additions(self, items: List[Any], index: int, path: str, operations: List[Operation]) -> None:
+        for k, item in enumerate(items):
+            operations.append({"op": "add", "path": f"{path}/{index + k}", "value": self._value(item)})
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,215 @@
+"""模板版本目录模块
+
+此模块实现了模板版本的 SQLite 目录，列出版本、分支和按条件搜索时只查询目录，模板数据在需要时再按版本ID读取。
+
+目录只保存版本ID、模板ID、分支、父版本、时间戳、元数据和标签，版本文件是权威数据：
+修改已有版本前标记的目录项（mark_pending）在下次启动时按版本文件重新建立。
+"""
+
+from typing import Dict, List, Any, Optional, Iterable
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+class VersionCatalog:
+    """模板版本目录"""
+
+    # 可以直接按列过滤的版本字段
+    COLUMNS = ("version_id", "template_id", "created_at", "updated_at")
+
+    def __init__(self, db_path: str):
+        """初始化版本目录
+
+        Args:
+            db_path: 目录数据库路径
+        """
+        self.db_path = db_path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS versions (
+                version_id TEXT PRIMARY KEY,
+                template_id TEXT NOT NULL,
+                branch TEXT,
+                parent_id TEXT,
+                created_at TEXT,
+                updated_at TEXT,
+                metadata TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_versions_template ON versions (template_id, created_at);
+            CREATE INDEX IF NOT EXISTS idx_versions_branch ON versions (branch, created_at);
+            CREATE INDEX IF NOT EXISTS idx_versions_created ON versions (created_at);
+            CREATE TABLE IF NOT EXISTS version_tags (
+                tag TEXT NOT NULL,
+                version_id TEXT NOT NULL,
+                PRIMARY KEY (tag, version_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_version_tags_version ON version_tags (version_id);
+            CREATE TABLE IF NOT EXISTS pending_versions (
+                version_id TEXT PRIMARY KEY
+            ) WITHOUT ROWID;
+        """)
+
+    @staticmethod
+    def _row(version: Dict[str, Any]) -> tuple:
+        metadata = version.get("metadata") or {}
+        branch = metadata.get("branch")
+        parent_id = metadata.get("parent_id")
+        return (
+            version["version_id"],
+            version["template_id"],
+            branch if isinstance(branch, str) else None,
+            parent_id if isinstance(parent_id, str) else None,
+            version.get("created_at"),
+            version.get("updated_at"),
+            json.dumps(metadata, ensure_ascii=False, default=str)
+        )
+
+    @staticmethod
+    def _tags(version: Dict[str, Any]) -> List[str]:
+        tags = (version.get("metadata") or {}).get("tags")
+        if not isinstance(tags, list):
+            return []
+        return sorted({tag for tag in tags if isinstance(tag, str)})
+
+    def _upsert(self, version: Dict[str, Any]) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO versions "
+            "(version_id, template_id, branch, parent_id, created_at, updated_at, metadata) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", self._row(version)
+        )
+        self._conn.execute("DELETE FROM version_tags WHERE version_id = ?", (version["version_id"],))
+        self._conn.executemany(
+            "INSERT INTO version_tags (tag, version_id) VALUES (?, ?)",
+            ((tag, version["version_id"]) for tag in self._tags(version))
+        )
+        self._conn.execute("DELETE FROM pending_versions WHERE version_id = ?", (version["version_id"],))
+
+    def upsert(self, version: Dict[str, Any]) -> None:
+        """加入或更新一个版本的目录项（单个事务）
+
+        Args:
+            version: 版本字典，包含 version_id、template_id、metadata、created_at、updated_at
+        """
+        with self._lock, self._conn:
+            self._upsert(version)
+
+    def upsert_many(self, versions: Iterable[Dict[str, Any]]) -> int:
+        """批量加入或更新目录项
+
+        Returns:
+            int: 写入的目录项数量
+        """
+        count = 0
+        with self._lock, self._conn:
+            for version in versions:
+                self._upsert(version)
+                count += 1
+        return count
+
+    def mark_pending(self, version_id: str) -> None:
+        """在修改已有版本的版本文件之前标记该版本，之后的 upsert 清除标记
+
+        写入版本文件和更新目录项之间中断时，标记保留下来，下次启动时按版本文件重新建立这些目录项。
+        """
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO pending_versions (version_id) VALUES (?)", (version_id,))
+
+    def pending_ids(self) -> List[str]:
+        """标记后尚未更新目录项的版本ID"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT version_id FROM pending_versions")]
+
+    def remove(self, version_ids: Iterable[str]) -> None:
+        """删除目录项"""
+        with self._lock, self._conn:
+            for version_id in version_ids:
+                self._conn.execute("DELETE FROM versions WHERE version_id = ?", (version_id,))
+                self._conn.execute("DELETE FROM version_tags WHERE version_id = ?", (version_id,))
+                self._conn.execute("DELETE FROM pending_versions WHERE version_id = ?", (version_id,))
+
+    def version_ids(self) -> List[str]:
+        """所有版本ID，按创建时间排序"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT version_id FROM versions ORDER BY created_at, version_id")]
+
+    def contains(self, version_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM versions WHERE version_id = ?", (version_id,)).fetchone() is not None
+
+    def get(self, version_id: str) -> Optional[Dict[str, Any]]:
+        """获取单个版本的目录项，不存在时返回None"""
+        entries = self.find(version_id=version_id)
+        return entries[0] if entries else None
+
+    def branches(self) -> List[str]:
+        """所有分支名称，按名称排序"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT DISTINCT branch FROM versions WHERE branch IS NOT NULL ORDER BY branch")]
+
+    def find(self, template_id: Optional[str] = None, branch: Optional[str] = None,
+             any_tags: Optional[List[str]] = None, **columns: Any) -> List[Dict[str, Any]]:
+        """按索引列查找目录项
+
+        Args:
+            template_id: 模板ID
+            branch: 分支名称
+            any_tags: 标签列表，包含其中任一标签的版本匹配
+            **columns: 其他列的等值条件，见 COLUMNS
+
+        Returns:
+            List[Dict[str, Any]]: 按创建时间排序的目录项，包含 version_id、template_id、branch、
+                parent_id、created_at、updated_at 和 metadata
+        """
+        conditions, params = [], []
+        if template_id is not None:
+            columns["template_id"] = template_id
+        for column, value in columns.items():
+            if column not in self.COLUMNS:
+                raise ValueError(f"Unknown catalog column: {column}")
+            conditions.append(f"{column} = ?")
+            params.append(value)
+        if branch is not None:
+            conditions.append("branch = ?")
+            params.append(branch)
+        if any_tags is not None:
+            tags = [tag for tag in any_tags if isinstance(tag, str)]
+            if not tags:
+                return []
+            placeholders = ",".join("?" * len(tags))
+            conditions.append(f"version_id IN (SELECT version_id FROM version_tags WHERE tag IN ({placeholders}))")
+            params.extend(tags)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT version_id, template_id, branch, parent_id, created_at, updated_at, metadata "
+                f"FROM versions {where} ORDER BY created_at, version_id", params
+            ).fetchall()
+        return [
+            {
+                "version_id": version_id,
+                "template_id": template_id,
+                "branch": branch,
+                "parent_id": parent_id,
+                "created_at": created_at,
+                "updated_at": updated_at,
+                "metadata": json.loads(metadata)
+            }
+            for version_id, template_id, branch, parent_id, created_at, updated_at, metadata in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
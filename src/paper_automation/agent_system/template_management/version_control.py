@@ -7,8 +7,10 @@ import os
 from datetime import datetime
 from dataclasses import dataclass, asdict
 from .base.template import Template
+from .version_catalog import VersionCatalog
+from .object_store import ObjectStore, CHUNK_KEY
+from .structural_diff import StructuralDiff
 import uuid
-import difflib
 
 @dataclass
 class VersionInfo:
@@ -123,6 +125,80 @@ class TemplateVersionControl:
         # 初始化检查点目录
         self.checkpoint_dir = os.path.join(storage_dir, "checkpoints")
         os.makedirs(self.checkpoint_dir, exist_ok=True)
+        
+        # 初始化块存储，模板数据按块保存，版本文件只记录根块哈希
+        self.object_store = ObjectStore(os.path.join(storage_dir, "objects"))
+        self.differ = StructuralDiff(self.object_store)
+        
+        # 初始化版本目录
+        self.catalog = VersionCatalog(os.path.join(storage_dir, "catalog.db"))
+        self._sync_catalog()
+    
+    def _version_file(self, version_id: str) -> str:
+        return os.path.join(self.storage_dir, f"{version_id}.json")
+    
+    def _read_manifest(self, version_id: str) -> Dict[str, Any]:
+        """读取版本文件（不展开模板数据）
+        
+        Raises:
+            ValueError: 当版本不存在时
+        """
+        version_file = self._version_file(version_id)
+        if not os.path.exists(version_file):
+            raise ValueError(f"Version {version_id} not found")
+        with open(version_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        """原子地写入版本文件"""
+        version_file = self._version_file(manifest["version_id"])
+        tmp_file = f"{version_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_file, version_file)
+    
+    def _manifest_to_version(self, manifest: Dict[str, Any]) -> VersionData:
+        """展开版本文件中引用的模板数据；兼容直接保存 template_data 的旧版本文件"""
+        data = dict(manifest)
+        if "template_data_ref" in data:
+            data["template_data"] = self.object_store.get_tree(data.pop("template_data_ref"))
+        return VersionData.from_dict(data)
+    
+    def _version_file_ids(self) -> List[str]:
+        """存储目录中的版本ID"""
+        return [filename[:-5] for filename in os.listdir(self.storage_dir) if filename.endswith(".json")]
+    
+    def _sync_catalog(self) -> None:
+        """使版本目录与存储目录一致：为目录中缺少的版本文件建立目录项，按版本文件重新建立修改中断的目录项，
+        删除文件已不存在的目录项"""
+        file_ids = set(self._version_file_ids())
+        catalog_ids = set(self.catalog.version_ids())
+        
+        # 版本文件是权威数据，标记为待更新的目录项按版本文件重新建立
+        missing = (file_ids - catalog_ids) | (set(self.catalog.pending_ids()) & file_ids)
+        if missing:
+            entries = []
+            for version_id in missing:
+                try:
+                    entries.append(self._read_manifest(version_id))
+                except Exception as e:
+                    self.logger.error(f"Error indexing version {version_id}: {str(e)}")
+            self.catalog.upsert_many(entries)
+            self.logger.info(f"Indexed {len(entries)} versions into catalog")
+        
+        stale = (catalog_ids | set(self.catalog.pending_ids())) - file_ids
+        if stale:
+            self.catalog.remove(stale)
+    
+    def _load_versions(self, version_ids: List[str]) -> List[VersionData]:
+        """按目录顺序读取版本数据，跳过文件已不存在的版本"""
+        versions = []
+        for version_id in version_ids:
+            try:
+                versions.append(self.get_version(version_id))
+            except ValueError as e:
+                self.logger.warning(f"Skipping version missing from storage: {str(e)}")
+        return [version for version in versions if version]
     
     def create_version(self, template_id: str, template_data: Dict[str, Any],
                        metadata: Dict[str, Any] = None) -> Optional[str]:
@@ -162,23 +238,72 @@ class TemplateVersionControl:
             version_data.template_data = template_data
             version_data.metadata = metadata
             
-            # 保存版本数据
-            version_file = os.path.join(self.storage_dir, f"{version_id}.json")
-            with open(version_file, "w", encoding="utf-8") as f:
-                json.dump(version_data.to_dict(), f, ensure_ascii=False, indent=2)
+            # 保存模板数据块，未变化的块与其他版本共享，不重复写入
+            root, stats = self.object_store.put_tree(template_data)
+            self.logger.debug(f"Version {version_id}: {stats['written']} of {stats['chunks']} chunks written")
             
-            # 执行后保存钩子
-            self._execute_post_save_hooks(version_id, template_data, metadata)
+            # 保存版本文件
+            manifest = version_data.to_dict()
+            del manifest["template_data"]
+            manifest["template_data_ref"] = root
+            self._save_manifest(manifest, lambda: template_data)
             
-            # 重新保存版本数据以包含钩子修改的元数据
-            with open(version_file, "r", encoding="utf-8") as f:
-                saved_data = json.load(f)
-                saved_data["metadata"] = metadata
+            return version_id
             
-            with open(version_file, "w", encoding="utf-8") as f:
-                json.dump(saved_data, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            self.logger.error(f"Error creating version: {str(e)}")
+            return None
+    
+    def _save_manifest(self, manifest: Dict[str, Any], load_template_data: Callable[[], Dict[str, Any]]) -> None:
+        """保存新版本的版本文件，执行后保存钩子并更新版本目录
+        
+        Args:
+            manifest: 版本文件内容
+            load_template_data: 返回版本的模板数据，只在有后保存钩子时调用
+        """
+        self._write_manifest(manifest)
+        metadata = manifest["metadata"]
+        saved_metadata = json.dumps(metadata, ensure_ascii=False, sort_keys=True, default=str)
+        
+        # 执行后保存钩子
+        if self.post_save_hooks:
+            self._execute_post_save_hooks(manifest["version_id"], load_template_data(), metadata)
+        
+        # 钩子修改了元数据时重新保存版本文件
+        if json.dumps(metadata, ensure_ascii=False, sort_keys=True, default=str) != saved_metadata:
+            self._write_manifest(manifest)
+        
+        # 更新版本目录
+        self.catalog.upsert(manifest)
+    
+    def _derive_version(self, version_id: str, metadata: Dict[str, Any]) -> Optional[str]:
+        """以已有版本的模板数据创建新版本（用于创建分支和回滚）
+        
+        没有预保存钩子时新版本直接引用源版本的数据块，不展开模板数据，也不重新分块和计算哈希；
+        有预保存钩子时钩子可能修改模板数据，按 create_version 保存。
+        
+        Raises:
+            ValueError: 当版本不存在时
+        """
+        manifest = self._read_manifest(version_id)
+        if self.pre_save_hooks or "template_data_ref" not in manifest:
+            version = self._manifest_to_version(manifest)
+            return self.create_version(version.template_id, version.template_data, metadata)
+        
+        try:
+            new_version_id = str(uuid.uuid4())
+            root = manifest["template_data_ref"]
+            new_manifest = VersionData(
+                version_id=new_version_id,
+                template_id=manifest["template_id"],
+                template_data=None,
+                metadata=metadata
+            ).to_dict()
+            del new_manifest["template_data"]
+            new_manifest["template_data_ref"] = root
+            self._save_manifest(new_manifest, lambda: self.object_store.get_tree(root))
             
-            return version_id
+            return new_version_id
             
         except Exception as e:
             self.logger.error(f"Error creating version: {str(e)}")
@@ -198,13 +323,7 @@ class TemplateVersionControl:
                 raise ValueError("Version ID cannot be empty")
             
             # 读取版本数据
-            version_file = os.path.join(self.storage_dir, f"{version_id}.json")
-            if not os.path.exists(version_file):
-                raise ValueError(f"Version {version_id} not found")
-            
-            with open(version_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return VersionData.from_dict(data)
+            return self._manifest_to_version(self._read_manifest(version_id))
             
         except ValueError as e:
             raise e
@@ -219,19 +338,61 @@ class TemplateVersionControl:
             List[VersionData]: 版本数据列表
         """
         try:
-            versions = []
-            for filename in os.listdir(self.storage_dir):
-                if filename.endswith(".json"):
-                    version_id = filename[:-5]
-                    version = self.get_version(version_id)
-                    if version:
-                        versions.append(version)
-            return versions
+            return self._load_versions(self.catalog.version_ids())
             
         except Exception as e:
             self.logger.error(f"Error listing versions: {str(e)}")
             return []
     
+    def list_version_summaries(self, template_id: Optional[str] = None,
+                               branch: Optional[str] = None) -> List[Dict[str, Any]]:
+        """列出版本摘要（只查询版本目录，不读取模板数据）
+        
+        Args:
+            template_id: 模板ID,如果指定则只列出该模板的版本
+            branch: 分支名称,如果指定则只列出该分支的版本
+            
+        Returns:
+            List[Dict[str, Any]]: 按创建时间排序的版本摘要,包含 version_id、template_id、branch、
+                parent_id、created_at、updated_at 和 metadata
+        """
+        try:
+            return self.catalog.find(template_id=template_id, branch=branch)
+            
+        except Exception as e:
+            self.logger.error(f"Error listing version summaries: {str(e)}")
+            return []
+    
+    def load_template(self, template_id: str) -> Optional[Template]:
+        """读取模板最新版本的模板数据，可作为 TemplateGenerator 的 template_loader
+        
+        Args:
+            template_id: 模板ID
+            
+        Returns:
+            Optional[Template]: 模板对象,如果模板没有版本则返回None
+        """
+        try:
+            entries = self.catalog.find(template_id=template_id)
+            if not entries:
+                return None
+            version = self.get_version(entries[-1]["version_id"])
+            if not version:
+                return None
+            template_data = version.template_data
+            template_metadata = template_data.get("metadata")
+            return Template(
+                template_id=template_id,
+                name=template_data.get("name") or template_id,
+                metadata=template_metadata if isinstance(template_metadata, dict) else {},
+                template_data=template_data,
+                discipline=template_data.get("discipline") or version.metadata.get("discipline") or ""
+            )
+            
+        except Exception as e:
+            self.logger.error(f"Error loading template {template_id}: {str(e)}")
+            return None
+    
     def compare_versions(self, version1_id: str, version2_id: str) -> Optional[Dict[str, Any]]:
         """比较两个版本
         
@@ -240,27 +401,51 @@ class TemplateVersionControl:
             version2_id: 第二个版本ID
             
         Returns:
-            Optional[Dict[str, Any]]: 版本差异数据,如果比较失败则返回None
+            Optional[Dict[str, Any]]: 版本差异数据,包含 operations（操作列表）和 summary（各类操作的数量）,
+                如果比较失败则返回None
         """
         try:
-            if not version1_id or not version2_id:
-                raise ValueError("Version IDs cannot be empty")
-            
-            # 获取版本数据
-            version1 = self.get_version(version1_id)
-            version2 = self.get_version(version2_id)
-            
-            if not version1 or not version2:
-                raise ValueError("One or both versions not found")
-            
-            # 比较版本数据
-            diff = self._compare_data(version1.template_data, version2.template_data)
-            return diff
+            operations = self.diff_versions(version1_id, version2_id)
+            summary = {"add": 0, "remove": 0, "replace": 0}
+            for operation in operations:
+                summary[operation["op"]] += 1
+            return {
+                "version1_id": version1_id,
+                "version2_id": version2_id,
+                "operations": operations,
+                "summary": summary
+            }
             
         except Exception as e:
             self.logger.error(f"Error comparing versions: {str(e)}")
             return None
     
+    def diff_versions(self, version1_id: str, version2_id: str) -> List[Dict[str, Any]]:
+        """计算两个版本模板数据之间的差异
+        
+        直接比较块哈希，未变化的子树不读取；相同版本对的差异由差异引擎缓存。
+        
+        Args:
+            version1_id: 旧版本ID
+            version2_id: 新版本ID
+            
+        Returns:
+            List[Dict[str, Any]]: JSON Patch 风格的操作列表,按顺序应用到旧版本即得到新版本
+            
+        Raises:
+            ValueError: 当版本ID为空或版本不存在时
+        """
+        if not version1_id or not version2_id:
+            raise ValueError("Version IDs cannot be empty")
+        
+        def data_node(version_id: str) -> Any:
+            manifest = self._read_manifest(version_id)
+            if "template_data_ref" in manifest:
+                return {CHUNK_KEY: manifest["template_data_ref"]}
+            return manifest.get("template_data")
+        
+        return self.differ.diff(data_node(version1_id), data_node(version2_id))
+    
     def rollback_version(self, version_id: str) -> bool:
         """回滚到指定版本
         
@@ -274,17 +459,8 @@ class TemplateVersionControl:
             if not version_id:
                 raise ValueError("Version ID cannot be empty")
             
-            # 获取版本数据
-            version = self.get_version(version_id)
-            if not version:
-                raise ValueError(f"Version {version_id} not found")
-            
-            # 创建新版本
-            new_version_id = self.create_version(
-                template_id=version.template_id,
-                template_data=version.template_data,
-                metadata={"rollback_to": version_id}
-            )
+            # 创建新版本，与回滚到的版本共享模板数据块
+            new_version_id = self._derive_version(version_id, {"rollback_to": version_id})
             
             if not new_version_id:
                 raise ValueError("Failed to create new version")
@@ -418,76 +594,6 @@ class TemplateVersionControl:
             except Exception as e:
                 self.logger.error(f"Error executing post-save hook: {str(e)}")
     
-    def _compare_data(self, data1: Dict[str, Any], data2: Dict[str, Any]) -> Dict[str, Any]:
-        """比较两个数据字典
-        
-        Args:
-            data1: 第一个数据字典
-            data2: 第二个数据字典
-            
-        Returns:
-            Dict[str, Any]: 差异数据
-        """
-        diff = {
-            "added": {},
-            "removed": {},
-            "modified": {}
-        }
-        
-        def compare_recursive(d1: Any, d2: Any, path: str = "") -> Dict[str, Any]:
-            """递归比较数据
-            
-            Args:
-                d1: 第一个数据
-                d2: 第二个数据
-                path: 当前路径
-                
-            Returns:
-                Dict[str, Any]: 差异数据
-            """
-            if isinstance(d1, dict) and isinstance(d2, dict):
-                result = {}
-                for key in d2:
-                    new_path = f"{path}.{key}" if path else key
-                    if key not in d1:
-                        result[key] = d2[key]
-                    else:
-                        sub_diff = compare_recursive(d1[key], d2[key], new_path)
-                        if sub_diff:
-                            result[key] = sub_diff
-                for key in d1:
-                    if key not in d2:
-                        result[key] = None
-                return result
-            elif isinstance(d1, list) and isinstance(d2, list):
-                if len(d1) != len(d2):
-                    return {"old": d1, "new": d2}
-                result = []
-                for i, (item1, item2) in enumerate(zip(d1, d2)):
-                    sub_diff = compare_recursive(item1, item2, f"{path}[{i}]")
-                    if sub_diff:
-                        result.append(sub_diff)
-                return result if result else None
-            elif d1 != d2:
-                return {"old": d1, "new": d2}
-            return None
-        
-        # 比较添加和修改的字段
-        for key in data2:
-            if key not in data1:
-                diff["added"][key] = data2[key]
-            else:
-                sub_diff = compare_recursive(data1[key], data2[key], key)
-                if sub_diff:
-                    diff["modified"][key] = sub_diff
-        
-        # 比较删除的字段
-        for key in data1:
-            if key not in data2:
-                diff["removed"][key] = data1[key]
-        
-        return diff
-
     def save_checkpoint(self, template_id: str, template_data: Dict[str, Any],
                        metadata: Dict[str, Any] = None) -> Optional[str]:
         """保存检查点
@@ -629,20 +735,11 @@ class TemplateVersionControl:
             if not branch_name:
                 raise ValueError("Branch name cannot be empty")
             
-            # 获取版本数据
-            version = self.get_version(version_id)
-            if not version:
-                raise ValueError(f"Version {version_id} not found")
-            
-            # 创建新版本
-            new_version_id = self.create_version(
-                template_id=version.template_id,
-                template_data=version.template_data,
-                metadata={
-                    "branch": branch_name,
-                    "parent_id": version_id
-                }
-            )
+            # 创建新版本，与源版本共享模板数据块
+            new_version_id = self._derive_version(version_id, {
+                "branch": branch_name,
+                "parent_id": version_id
+            })
             
             if not new_version_id:
                 raise ValueError("Failed to create new version")
@@ -662,11 +759,7 @@ class TemplateVersionControl:
             List[str]: 分支名称列表
         """
         try:
-            branches = set()
-            for version in self.list_versions():
-                if version.metadata and "branch" in version.metadata:
-                    branches.add(version.metadata["branch"])
-            return sorted(list(branches))
+            return self.catalog.branches()
             
         except Exception as e:
             self.logger.error(f"Error listing branches: {str(e)}")
@@ -685,11 +778,8 @@ class TemplateVersionControl:
             if not branch_name:
                 raise ValueError("Branch name cannot be empty")
             
-            versions = []
-            for version in self.list_versions():
-                if version.metadata and version.metadata.get("branch") == branch_name:
-                    versions.append(version)
-            return sorted(versions, key=lambda x: x.created_at)
+            entries = self.catalog.find(branch=branch_name)
+            return self._load_versions([entry["version_id"] for entry in entries])
             
         except ValueError as e:
             raise e
@@ -714,18 +804,20 @@ class TemplateVersionControl:
             if not metadata:
                 raise ValueError("Metadata cannot be empty")
             
-            # 获取版本数据
-            version = self.get_version(version_id)
-            if not version:
-                raise ValueError(f"Version {version_id} not found")
+            # 读取版本文件，模板数据块不变，无需展开
+            manifest = self._read_manifest(version_id)
             
             # 更新元数据
-            version.metadata.update(metadata)
+            manifest["metadata"] = manifest.get("metadata") or {}
+            manifest["metadata"].update(metadata)
+            manifest["updated_at"] = datetime.now().isoformat()
+            
+            # 先标记目录项，保存版本文件后更新目录项时清除标记；中断时下次启动按版本文件重建目录项
+            self.catalog.mark_pending(version_id)
+            self._write_manifest(manifest)
             
-            # 保存版本数据
-            version_file = os.path.join(self.storage_dir, f"{version_id}.json")
-            with open(version_file, "w", encoding="utf-8") as f:
-                json.dump(version.to_dict(), f, ensure_ascii=False, indent=2)
+            # 更新版本目录
+            self.catalog.upsert(manifest)
             
             return True
             
@@ -748,12 +840,8 @@ class TemplateVersionControl:
             if not version_id:
                 raise ValueError("Version ID cannot be empty")
             
-            # 获取版本数据
-            version = self.get_version(version_id)
-            if not version:
-                raise ValueError(f"Version {version_id} not found")
-            
-            return version.metadata
+            # 只读取版本文件，不展开模板数据
+            return self._read_manifest(version_id).get("metadata") or {}
             
         except ValueError as e:
             raise e
@@ -774,38 +862,32 @@ class TemplateVersionControl:
             if not query:
                 raise ValueError("Query cannot be empty")
             
-            versions = []
-            for version in self.list_versions():
-                match = True
-                for key, value in query.items():
-                    if key == "metadata":
-                        if not version.metadata:
-                            match = False
-                            break
-                        for meta_key, meta_value in value.items():
-                            if meta_key not in version.metadata:
-                                match = False
-                                break
-                            if meta_key == "tags":
-                                # 检查标签是否存在
-                                if not isinstance(version.metadata[meta_key], list):
-                                    match = False
-                                    break
-                                if not isinstance(meta_value, list):
-                                    match = False
-                                    break
-                                # 检查是否包含任一标签
-                                if not any(tag in version.metadata[meta_key] for tag in meta_value):
-                                    match = False
-                                    break
-                            elif version.metadata[meta_key] != meta_value:
-                                match = False
-                                break
-                    elif getattr(version, key) != value:
-                        match = False
-                        break
-                if match:
-                    versions.append(version)
+            # 能由版本目录判断的条件先在目录中过滤，只读取匹配版本的模板数据
+            columns = {}
+            metadata_query = {}
+            payload_query = {}
+            for key, value in query.items():
+                if key == "metadata":
+                    metadata_query = value
+                elif key in VersionCatalog.COLUMNS:
+                    columns[key] = value
+                elif key == "template_data":
+                    payload_query[key] = value
+                else:
+                    raise AttributeError(f"'VersionData' object has no attribute '{key}'")
+            
+            tags = metadata_query.get("tags")
+            any_tags = tags if isinstance(tags, list) and tags and all(isinstance(tag, str) for tag in tags) else None
+            
+            entries = self.catalog.find(any_tags=any_tags, **columns)
+            version_ids = [
+                entry["version_id"] for entry in entries
+                if "metadata" not in query or self._metadata_matches(entry["metadata"], metadata_query)
+            ]
+            
+            versions = self._load_versions(version_ids)
+            for key, value in payload_query.items():
+                versions = [version for version in versions if getattr(version, key) == value]
             return versions
             
         except ValueError as e:
@@ -814,6 +896,32 @@ class TemplateVersionControl:
             self.logger.error(f"Error searching versions: {str(e)}")
             return []
 
+    @staticmethod
+    def _metadata_matches(metadata: Dict[str, Any], query: Dict[str, Any]) -> bool:
+        """判断元数据是否满足查询条件，tags 条件匹配包含任一标签的版本
+        
+        Args:
+            metadata: 版本元数据
+            query: 元数据查询条件
+            
+        Returns:
+            bool: 是否匹配
+        """
+        if not metadata:
+            return False
+        for meta_key, meta_value in query.items():
+            if meta_key not in metadata:
+                return False
+            if meta_key == "tags":
+                # 检查是否包含任一标签
+                if not isinstance(metadata[meta_key], list) or not isinstance(meta_value, list):
+                    return False
+                if not any(tag in metadata[meta_key] for tag in meta_value):
+                    return False
+            elif metadata[meta_key] != meta_value:
+                return False
+        return True
+
     def unregister_pre_save_hook(self, hook: Callable[[Dict[str, Any], Dict[str, Any]], Tuple[Dict[str, Any], Dict[str, Any]]]):
         """注销预保存钩子
         
@@ -6,23 +6,19 @@ from fastapi import FastAPI, HTTPException, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Optional, Any
-import pandas as pd
-import numpy as np
-from statsmodels.regression.linear_model import OLS
-import statsmodels.api as sm
-from statsmodels.stats.diagnostic import het_white
-from statsmodels.stats.stattools import jarque_bera
-from statsmodels.stats.outliers_influence import variance_inflation_factor
-from statsmodels.stats.diagnostic import linear_reset
-import scipy.stats as stats
 import logging
 import traceback
 import os
 import json
+import hashlib
 from pathlib import Path
-import io
 
 from routes import auth, writing, agent, empirical
+from utils.analysis_service import submit_empirical_analysis
+from utils.result_cache import result_cache
+from utils.job_manager import job_manager, JobQueueFullError
+from utils.ingestion import spool_upload, ingest_file
+from utils.dataset_store import dataset_store
 
 # 配置日志
 logging.basicConfig(
@@ -59,12 +55,19 @@ app.include_router(agent.router)
 app.include_router(empirical.router)
 
 class EmpiricalAnalysisRequest(BaseModel):
-    data: List[Dict[str, Any]]
+    # 优先使用上传时返回的 datasetId；data 为兼容旧调用方式的行数据
+    datasetId: Optional[str] = None
+    data: Optional[List[Dict[str, Any]]] = None
     dependentVar: str
     independentVars: List[str]
     controlVars: Optional[List[str]] = []
     groupVars: Optional[List[str]] = []
 
+# 各章节最近一次提交的分析任务: {(writing_id, section_id): job_id}
+section_jobs: Dict[tuple, str] = {}
+# 各写作最近一次提交的分析任务: {writing_id: job_id}
+writing_jobs: Dict[str, str] = {}
+
 class LiteratureRequest(BaseModel):
     mainTitle: str
     subTitle: Optional[str] = None
@@ -75,85 +78,28 @@ class LiteratureRequest(BaseModel):
 async def root():
     return {"message": "论文写作系统API服务正在运行"}
 
-def run_regression_diagnostics(model, X):
-    """运行回归诊断检验"""
+@app.on_event("shutdown")
+async def shutdown_event():
+    job_manager.shutdown()
+
+def _submit_analysis_job(request: EmpiricalAnalysisRequest, metadata: Optional[Dict[str, Any]] = None) -> str:
+    """将实证分析提交到进程池，已缓存的基准回归与分组回归不再重复计算"""
     try:
-        # White异方差检验
-        white_test = het_white(model.resid, X)
-        
-        # Jarque-Bera正态性检验
-        jb_test = jarque_bera(model.resid)
-        
-        # VIF多重共线性检验
-        vif_data = pd.DataFrame()
-        vif_data["Variable"] = X.columns
-        vif_data["VIF"] = [variance_inflation_factor(X.values, i) for i in range(X.shape[1])]
-        
-        # Ramsey RESET检验
-        reset_test = linear_reset(model)
-        
-        diagnostics = [
-            {
-                'test': 'White异方差检验',
-                'statistic': float(white_test[0]),
-                'pValue': float(white_test[1]),
-                'conclusion': '存在异方差性' if white_test[1] < 0.05 else '不存在异方差性'
-            },
-            {
-                'test': 'Jarque-Bera正态性检验',
-                'statistic': float(jb_test[0]),
-                'pValue': float(jb_test[1]),
-                'conclusion': '残差不服从正态分布' if jb_test[1] < 0.05 else '残差服从正态分布'
-            },
-            {
-                'test': 'Ramsey RESET检验',
-                'statistic': float(reset_test.statistic),
-                'pValue': float(reset_test.pvalue),
-                'conclusion': '模型设定存在问题' if reset_test.pvalue < 0.05 else '模型设定合理'
-            }
-        ]
-        
-        # 添加VIF检验结果
-        for _, row in vif_data.iterrows():
-            if row['Variable'] != 'const':  # 跳过常数项
-                diagnostics.append({
-                    'test': f'VIF检验 ({row["Variable"]})',
-                    'statistic': float(row['VIF']),
-                    'pValue': None,
-                    'conclusion': '存在严重多重共线性' if row['VIF'] > 10 else '多重共线性在可接受范围'
-                })
-        
-        return diagnostics
-    except Exception as e:
-        logger.error(f"运行诊断检验时发生错误: {str(e)}")
-        logger.error(f"错误堆栈: {traceback.format_exc()}")
-        # 返回一个基本的诊断结果
-        return [{
-            'test': '诊断检验',
-            'statistic': None,
-            'pValue': None,
-            'conclusion': f'运行诊断检验时发生错误: {str(e)}'
-        }]
-
-def get_regression_results(model, group_name="全样本"):
-    """获取回归结果"""
-    return {
-        'group': group_name,
-        'coefficients': [{
-            'variable': var,
-            'estimate': float(model.params[var]),
-            'stdError': float(model.bse[var]),
-            'tValue': float(model.tvalues[var]),
-            'pValue': float(model.pvalues[var])
-        } for var in model.model.exog_names],
-        'modelStats': {
-            'rSquared': float(model.rsquared),
-            'adjRSquared': float(model.rsquared_adj),
-            'fStatistic': float(model.fvalue),
-            'fPvalue': float(model.f_pvalue),
-            'observations': int(model.nobs)
-        }
-    }
+        return submit_empirical_analysis(
+            request.dependentVar,
+            request.independentVars,
+            request.controlVars,
+            request.groupVars,
+            dataset_id=request.datasetId,
+            data=request.data,
+            metadata=metadata
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e).strip("'"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
 @app.post("/api/empirical-analysis")
 async def empirical_analysis(request: EmpiricalAnalysisRequest):
@@ -163,130 +109,9 @@ async def empirical_analysis(request: EmpiricalAnalysisRequest):
                    f"controlVars={request.controlVars}, "
                    f"groupVars={request.groupVars}")
         
-        # 将数据转换为DataFrame
-        df = pd.DataFrame(request.data)
-        logger.info(f"数据形状: {df.shape}")
-        
-        # 数据验证
-        if df.empty:
-            raise ValueError("数据为空")
-            
-        # 检查变量是否存在于数据中
-        missing_vars = []
-        if request.dependentVar not in df.columns:
-            missing_vars.append(request.dependentVar)
-        for var in request.independentVars:
-            if var not in df.columns:
-                missing_vars.append(var)
-        for var in request.controlVars:
-            if var not in df.columns:
-                missing_vars.append(var)
-        for var in request.groupVars:
-            if var not in df.columns:
-                missing_vars.append(var)
-                
-        if missing_vars:
-            raise ValueError(f"以下变量在数据中不存在: {', '.join(missing_vars)}")
-        
-        # 检查数据类型并尝试转换为数值
-        numeric_vars = [request.dependentVar] + request.independentVars + request.controlVars
-        for var in numeric_vars:
-            try:
-                # 直接使用 pd.to_numeric，不进行字符串处理
-                df[var] = pd.to_numeric(df[var], errors='coerce')
-                # 检查是否有任何 NaN 值
-                nan_count = df[var].isna().sum()
-                if nan_count > 0:
-                    logger.warning(f"变量 {var} 有 {nan_count} 个值无法转换为数值，这些值将被移除")
-                    df = df.dropna(subset=[var])
-                if df.empty:
-                    raise ValueError(f"转换 {var} 为数值后没有剩余有效数据")
-                logger.info(f"变量 {var} 的数值范围: 最小值={df[var].min()}, 最大值={df[var].max()}")
-            except Exception as e:
-                logger.error(f"转换变量 {var} 时发生错误: {str(e)}")
-                raise ValueError(f"变量 {var} 无法转换为数值类型: {str(e)}")
-        
-        logger.info(f"数据清理后的形状: {df.shape}")
-        
-        # 准备变量
-        y = df[request.dependentVar]
-        X_vars = request.independentVars + request.controlVars
-        X = df[X_vars]
-        X = sm.add_constant(X)
-        
-        logger.info(f"因变量形状: {y.shape}")
-        logger.info(f"自变量形状: {X.shape}")
-        
-        # 运行基准回归
-        base_model = OLS(y, X).fit()
-        base_results = get_regression_results(base_model)
-        logger.info("基准回归完成")
-        
-        # 运行诊断检验
-        diagnostics = run_regression_diagnostics(base_model, X)
-        logger.info("诊断检验完成")
-        
-        # 进行分组回归（异质性分析）
-        group_results = []
-        if request.groupVars:
-            for group_var in request.groupVars:
-                unique_groups = df[group_var].unique()
-                logger.info(f"分组变量 {group_var} 的唯一值: {unique_groups}")
-                
-                for group in unique_groups:
-                    # 获取分组数据
-                    group_df = df[df[group_var] == group]
-                    logger.info(f"组 {group} 的样本量: {len(group_df)}")
-                    
-                    if len(group_df) > len(X.columns):  # 确保样本量足够
-                        group_y = group_df[request.dependentVar]
-                        group_X = group_df[X_vars]
-                        group_X = sm.add_constant(group_X)
-                        
-                        # 运行分组回归
-                        group_model = OLS(group_y, group_X).fit()
-                        group_results.append(
-                            get_regression_results(group_model, f'{group_var}={group}')
-                        )
-                        logger.info(f"组 {group} 的回归完成")
-                    else:
-                        logger.warning(f"组 {group} 的样本量不足，跳过回归")
-        
-        # 计算组间差异显著性（如果有分组结果）
-        group_differences = []
-        if len(group_results) > 1:
-            logger.info("开始计算组间差异")
-            for i in range(len(group_results)):
-                for j in range(i + 1, len(group_results)):
-                    group1 = group_results[i]
-                    group2 = group_results[j]
-                    
-                    # 计算系数差异的t统计量和p值
-                    for coef1 in group1['coefficients']:
-                        coef2 = next(c for c in group2['coefficients'] if c['variable'] == coef1['variable'])
-                        if coef1['variable'] != 'const':  # 跳过常数项
-                            diff = abs(coef1['estimate'] - coef2['estimate'])
-                            pooled_se = np.sqrt(coef1['stdError']**2 + coef2['stdError']**2)
-                            t_stat = diff / pooled_se if pooled_se != 0 else 0
-                            p_value = 2 * (1 - stats.t.cdf(abs(t_stat), df=base_model.df_resid))
-                            
-                            group_differences.append({
-                                'group1': group1['group'],
-                                'group2': group2['group'],
-                                'variable': coef1['variable'],
-                                'difference': float(diff),
-                                'tStatistic': float(t_stat),
-                                'pValue': float(p_value),
-                                'isSignificant': bool(p_value < 0.05)
-                            })
-            logger.info("组间差异计算完成")
-        
-        response_data = {
-            'baseResults': base_results,
-            'groupResults': group_results,
-            'groupDifferences': group_differences,
-            'diagnostics': diagnostics
-        }
+        # 回归拟合在进程池中执行，这里只异步等待结果
+        job_id = _submit_analysis_job(request)
+        response_data = await job_manager.wait(job_id)
         logger.info("分析完成，返回结果")
         return {
             'success': True,
@@ -294,6 +119,8 @@ async def empirical_analysis(request: EmpiricalAnalysisRequest):
             'message': '分析完成'
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"发生错误: {str(e)}")
         logger.error(f"错误堆栈: {traceback.format_exc()}")
@@ -303,39 +130,118 @@ async def empirical_analysis(request: EmpiricalAnalysisRequest):
             'message': str(e)
         }
 
-def load_cnki_papers(directory: str) -> List[Dict[str, str]]:
-    """加载CNKI文献数据"""
-    papers = []
-    try:
-        # 确保目录存在
-        if not os.path.exists(directory):
-            logger.error(f"目录不存在: {directory}")
-            return papers
+@app.post("/api/empirical-analysis/jobs")
+async def submit_empirical_analysis_job(request: EmpiricalAnalysisRequest):
+    """提交实证分析任务，立即返回任务ID"""
+    job_id = _submit_analysis_job(request)
+    return {
+        'success': True,
+        'data': job_manager.get_job(job_id).to_dict(),
+        'message': '分析任务已提交'
+    }
 
-        # 遍历目录中的所有文件
-        for file_name in os.listdir(directory):
-            if not file_name.endswith('.txt'):
-                continue
+@app.get("/api/empirical-analysis/jobs/{job_id}")
+async def get_empirical_analysis_job(job_id: str):
+    """查询实证分析任务状态，任务完成后返回分析结果"""
+    job = job_manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="分析任务不存在")
+    return {
+        'success': job.status != 'failed',
+        'data': {
+            **job.to_dict(),
+            'result': job_manager.get_result(job_id) if job.status == 'completed' else None
+        },
+        'message': job.error or job.status
+    }
 
+@app.get("/api/empirical-analysis/metrics")
+async def get_empirical_analysis_metrics():
+    """返回分析进程池的队列深度、任务耗时与结果缓存命中指标"""
+    return {
+        'success': True,
+        'data': {
+            **job_manager.get_metrics(),
+            'resultCache': result_cache.get_stats()
+        }
+    }
+
+# CNKI文献检索索引所在目录
+LITERATURE_INDEX_DIR = os.getenv("LITERATURE_INDEX_DIR", "data/index")
+# 每次文献综述请求使用的最相关文献数量
+LITERATURE_TOP_K = int(os.getenv("LITERATURE_TOP_K", "50"))
+_cnki_indexes: Dict[str, Any] = {}
+
+def parse_cnki_file(content: str) -> Dict[str, str]:
+    """解析CNKI导出的文本文件"""
+    return {
+        'title': content.split('标题：')[1].split('\n')[0] if '标题：' in content else '',
+        'authors': content.split('作者：')[1].split('\n')[0] if '作者：' in content else '',
+        'abstract': content.split('摘要：')[1].split('\n')[0] if '摘要：' in content else '',
+        'keywords': content.split('关键词：')[1].split('\n')[0] if '关键词：' in content else '',
+        'year': content.split('年份：')[1].split('\n')[0] if '年份：' in content else ''
+    }
+
+def get_cnki_index(directory: str):
+    """获取CNKI目录的检索索引，并增量索引新增或变化的文件"""
+    from paper_automation.agent_system.knowledge_management.literature.search_index import LiteratureIndex
+
+    index = _cnki_indexes.get(directory)
+    if index is None:
+        name = hashlib.sha1(os.path.abspath(directory).encode('utf-8')).hexdigest()[:16]
+        index = LiteratureIndex(os.path.join(LITERATURE_INDEX_DIR, f"cnki_{name}.db"))
+        _cnki_indexes[directory] = index
+
+    indexed = index.get_signatures()
+    signatures = {}
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name.endswith('.txt') and entry.is_file():
+                stat = entry.stat()
+                signatures[entry.name] = f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def changed_papers():
+        for file_name, signature in signatures.items():
+            if indexed.get(file_name) == signature:
+                continue
             file_path = os.path.join(directory, file_name)
             try:
                 with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    papers.append({
-                        'title': content.split('标题：')[1].split('\n')[0] if '标题：' in content else '',
-                        'authors': content.split('作者：')[1].split('\n')[0] if '作者：' in content else '',
-                        'abstract': content.split('摘要：')[1].split('\n')[0] if '摘要：' in content else '',
-                        'keywords': content.split('关键词：')[1].split('\n')[0] if '关键词：' in content else '',
-                        'year': content.split('年份：')[1].split('\n')[0] if '年份：' in content else ''
-                    })
+                    yield file_name, parse_cnki_file(f.read()), signature
             except Exception as e:
                 logger.error(f"处理文件 {file_path} 时出错: {str(e)}")
-                continue
 
-        return papers
+    removed = [file_name for file_name in indexed if file_name not in signatures]
+    if removed:
+        index.remove_documents(removed)
+    count = index.add_documents(changed_papers())
+    if count or removed:
+        logger.info(f"CNKI文献索引已更新: 新增或更新 {count} 篇, 删除 {len(removed)} 篇")
+    return index
+
+def load_cnki_papers(directory: str, query: Optional[str] = None,
+                     limit: Optional[int] = None) -> List[Dict[str, str]]:
+    """加载CNKI文献数据
+
+    文献在首次出现或文件变化时才被读取并加入检索索引。给出 query 时按BM25
+    返回最相关的 limit 篇文献，没有命中时返回全部文献。
+    """
+    try:
+        # 确保目录存在
+        if not os.path.exists(directory):
+            logger.error(f"目录不存在: {directory}")
+            return []
+
+        index = get_cnki_index(directory)
+        if query:
+            papers = [paper for paper, _ in index.search(query, limit=limit or len(index))]
+            if papers:
+                return papers
+        papers = index.get_documents()
+        return papers[:limit] if limit else papers
     except Exception as e:
         logger.error(f"加载CNKI文献数据时出错: {str(e)}")
-        return papers
+        return []
 
 @app.post("/api/generate/literature")
 async def generate_literature(request: LiteratureRequest):
@@ -344,8 +250,12 @@ async def generate_literature(request: LiteratureRequest):
                    f"subTitle={request.subTitle}, "
                    f"reviewMethod={request.reviewMethod}")
         
-        # 加载CNKI文献数据
-        papers = load_cnki_papers("data/raw/cnki")
+        # 从CNKI文献索引中检索与题目最相关的文献
+        papers = load_cnki_papers(
+            "data/raw/cnki",
+            query=f"{request.mainTitle} {request.subTitle or ''}",
+            limit=LITERATURE_TOP_K
+        )
         
         # 调用LiteratureReviewAgent生成文献综述
         from paper_automation.agent_system.paper_agent.content.literature.literature_review_agent import LiteratureReviewAgent
@@ -364,41 +274,6 @@ async def generate_literature(request: LiteratureRequest):
         logger.error(f"错误堆栈: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=str(e))
 
-def detect_data_type(df):
-    """检测数据类型（截面数据、面板数据或时间序列数据）"""
-    try:
-        # 检查是否有时间相关的列
-        time_columns = df.select_dtypes(include=['datetime64']).columns
-        date_like_columns = [col for col in df.columns if any(x in col.lower() for x in ['year', 'month', 'date', 'time', 'period'])]
-        
-        # 检查是否有ID相关的列
-        id_like_columns = [col for col in df.columns if any(x in col.lower() for x in ['id', 'code', 'number', 'no'])]
-        
-        # 如果有时间列和ID列，可能是面板数据
-        if (len(time_columns) > 0 or len(date_like_columns) > 0) and len(id_like_columns) > 0:
-            return {
-                'type': 'panel',
-                'confidence': 0.9
-            }
-        # 如果只有时间列，可能是时间序列数据
-        elif len(time_columns) > 0 or len(date_like_columns) > 0:
-            return {
-                'type': 'time',
-                'confidence': 0.8
-            }
-        # 如果只有ID列或者都没有，可能是截面数据
-        else:
-            return {
-                'type': 'cross',
-                'confidence': 0.7
-            }
-    except Exception as e:
-        logger.error(f"检测数据类型时发生错误: {str(e)}")
-        return {
-            'type': 'cross',
-            'confidence': 0.5
-        }
-
 @app.options("/api/writing/{writing_id}/sections/{section_id}/data-analysis/upload")
 async def upload_data_file_options():
     return {}
@@ -412,67 +287,125 @@ async def upload_data_file(
     try:
         logger.info(f"接收到文件上传请求: writing_id={writing_id}, section_id={section_id}, filename={file.filename}")
         
-        # 读取文件内容
-        contents = await file.read()
-        
-        # 根据文件类型处理数据
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
-        elif file.filename.endswith(('.xls', '.xlsx')):
-            df = pd.read_excel(io.BytesIO(contents))
-        else:
-            raise HTTPException(status_code=400, detail="不支持的文件格式")
-        
-        # 生成数据预览
-        preview = df.to_string()
-        
-        # 检测数据类型
-        detected_data_type = detect_data_type(df)
-        
-        # 准备变量信息
-        variables = []
-        for col in df.columns:
-            var_info = {
-                'name': col,
-                'type': 'numeric' if pd.api.types.is_numeric_dtype(df[col]) else 'categorical',
-                'stats': {}
-            }
-            
-            if var_info['type'] == 'numeric':
-                var_info['stats'] = {
-                    'mean': float(df[col].mean()),
-                    'median': float(df[col].median()),
-                    'std': float(df[col].std()),
-                    'min': float(df[col].min()),
-                    'max': float(df[col].max())
-                }
-            else:
-                value_counts = df[col].value_counts()
-                var_info['stats'] = {
-                    'categories': value_counts.index.tolist(),
-                    'frequencies': value_counts.values.tolist()
-                }
-            
-            variables.append(var_info)
-        
-        # 准备响应数据
+        # 按块写入磁盘，不在内存中保留整个文件
+        dataset_id = dataset_store.new_id()
+        try:
+            source, fingerprint = await spool_upload(file, dataset_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        # 在进程池中分块解析并增量计算各列统计量
+        try:
+            ingested = await job_manager.run(ingest_file, source, dataset_id, name="data-ingestion")
+        except JobQueueFullError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        dataset_store.save_info(dataset_id, {
+            'datasetId': dataset_id,
+            'filename': file.filename,
+            'fingerprint': fingerprint,
+            'writingId': writing_id,
+            'sectionId': section_id,
+            'columns': ingested['columns'],
+            'totalRows': ingested['totalRows'],
+            'variables': ingested['variables']
+        })
+        
+        # 准备响应数据，只返回有限行数的预览
         response_data = {
+            'datasetId': dataset_id,
             'processedData': {
-                'variables': variables,
-                'rawData': df.values.tolist()
+                'datasetId': dataset_id,
+                'variables': ingested['variables'],
+                'rawData': ingested['previewRows'],
+                'totalRows': ingested['totalRows']
             },
-            'preview': preview,
-            'detectedDataType': detected_data_type
+            'preview': ingested['preview'],
+            'detectedDataType': ingested['detectedDataType']
         }
         
         logger.info("文件处理完成")
         return response_data
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"处理文件上传时发生错误: {str(e)}")
         logger.error(f"错误堆栈: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/datasets/{dataset_id}")
+async def get_dataset_info(dataset_id: str):
+    """获取已上传数据集的变量信息"""
+    try:
+        info = dataset_store.get_info(dataset_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if info is None:
+        raise HTTPException(status_code=404, detail="数据集不存在")
+    return {
+        'success': True,
+        'data': info
+    }
+
+def _significance_stars(p_value: Optional[float]) -> str:
+    if p_value is None:
+        return ''
+    if p_value < 0.01:
+        return '***'
+    if p_value < 0.05:
+        return '**'
+    if p_value < 0.1:
+        return '*'
+    return ''
+
+def _format_coefficient(coef: Dict[str, Any], variable: str) -> Dict[str, Any]:
+    return {
+        "variable": variable,
+        "coefficient": coef['estimate'],
+        "standardError": coef['stdError'],
+        "tStat": coef['tValue'],
+        "pValue": coef['pValue'],
+        "significance": _significance_stars(coef['pValue'])
+    }
+
+def format_section_results(analysis: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    """将实证分析结果转换为章节结果页使用的格式"""
+    regression_results = [
+        _format_coefficient(coef, coef['variable'])
+        for coef in analysis['baseResults']['coefficients']
+        if coef['variable'] != 'const'
+    ]
+    heterogeneity_results = [
+        _format_coefficient(coef, f"{coef['variable']}_{group['group'].split('=', 1)[-1]}")
+        for group in analysis['groupResults']
+        for coef in group['coefficients']
+        if coef['variable'] != 'const'
+    ]
+    diagnostic_tests = []
+    for item in analysis['diagnostics']:
+        statistic = item.get('statistic')
+        p_value = item.get('pValue')
+        result = f"统计量 = {statistic:.4f}" if statistic is not None else "-"
+        if p_value is not None:
+            result += f", p值 = {p_value:.4f}"
+        diagnostic_tests.append({
+            "testName": item['test'],
+            "result": result,
+            "suggestion": item['conclusion'],
+            "status": "warning" if p_value is not None and p_value < 0.05 else "success"
+        })
+
+    selected_method = config.get('selectedMethod')
+    if isinstance(selected_method, dict):
+        selected_method = selected_method.get('name')
+    return {
+        "regressionResults": regression_results,
+        "heterogeneityResults": heterogeneity_results,
+        "diagnosticTests": diagnostic_tests,
+        "robustnessTests": [],
+        "selectedMethods": [selected_method] if selected_method else []
+    }
+
 @app.post("/api/writing/{writing_id}/sections/{section_id}/empirical-analysis/start")
 async def start_empirical_analysis(
     writing_id: str,
@@ -483,17 +416,47 @@ async def start_empirical_analysis(
         logger.info(f"开始实证分析: writing_id={writing_id}, section_id={section_id}")
         logger.info(f"分析配置: {request}")
         
-        # 这里应该实现实证分析的逻辑
-        # 暂时返回成功响应
+        # 根据变量角色构造模型设定
+        variables = request.get('variables') or []
+        roles: Dict[str, List[str]] = {}
+        for variable in variables:
+            roles.setdefault(variable.get('role'), []).append(variable.get('name'))
+        if not roles.get('dependent') or not roles.get('independent'):
+            raise HTTPException(status_code=400, detail="请至少选择一个因变量和一个自变量")
+        dependent_var = roles['dependent'][0]
+        independent_vars = roles['independent']
+        control_vars = roles.get('control', [])
+        group_vars = roles.get('grouping', [])
+        config = {key: value for key, value in request.items() if key != 'data'}
+        metadata = {"writingId": writing_id, "sectionId": section_id, "config": config}
+        
+        # 优先使用上传时返回的数据集ID，由工作进程自行读取数据
+        job_id = _submit_analysis_job(
+            EmpiricalAnalysisRequest(
+                datasetId=request.get('datasetId'),
+                data=request.get('data'),
+                dependentVar=dependent_var,
+                independentVars=independent_vars,
+                controlVars=control_vars,
+                groupVars=group_vars
+            ),
+            metadata=metadata
+        )
+        section_jobs[(writing_id, section_id)] = job_id
+        writing_jobs[writing_id] = job_id
+        
         return {
             "success": True,
             "message": "实证分析已启动",
             "data": {
                 "writingId": writing_id,
                 "sectionId": section_id,
+                "jobId": job_id,
                 "status": "processing"
             }
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"启动实证分析时发生错误: {str(e)}")
         logger.error(f"错误堆栈: {traceback.format_exc()}")
@@ -505,96 +468,46 @@ async def start_empirical_analysis(
 @app.get("/api/writing/{writing_id}/sections/{section_id}/empirical-analysis/results")
 async def get_empirical_analysis_results(
     writing_id: str,
-    section_id: str
+    section_id: str,
+    jobId: Optional[str] = None
 ):
     try:
         logger.info(f"获取实证分析结果: writing_id={writing_id}, section_id={section_id}")
         
-        # 返回示例数据
+        # 结果页与数据分析页属于不同章节，找不到本章节任务时使用该写作最近的任务
+        job_id = jobId or section_jobs.get((writing_id, section_id)) or writing_jobs.get(writing_id)
+        job = job_manager.get_job(job_id) if job_id else None
+        if job is None:
+            raise HTTPException(status_code=404, detail="未找到实证分析任务，请先启动实证分析")
+        
+        if job.status == 'failed':
+            return {
+                "success": False,
+                "status": job.status,
+                "jobId": job.job_id,
+                "data": None,
+                "message": job.error
+            }
+        if job.status != 'completed':
+            return {
+                "success": True,
+                "status": job.status,
+                "jobId": job.job_id,
+                "data": None,
+                "message": "实证分析进行中"
+            }
+        
         return {
             "success": True,
-            "data": {
-                "regressionResults": [
-                    {
-                        "variable": "EC",
-                        "coefficient": 0.3245,
-                        "standardError": 0.0856,
-                        "tStat": 3.7910,
-                        "pValue": 0.0002,
-                        "significance": "***"
-                    },
-                    {
-                        "variable": "TC",
-                        "coefficient": 0.1523,
-                        "standardError": 0.0654,
-                        "tStat": 2.3287,
-                        "pValue": 0.0214,
-                        "significance": "**"
-                    }
-                ],
-                "heterogeneityResults": [
-                    {
-                        "variable": "EC_东部",
-                        "coefficient": 0.4123,
-                        "standardError": 0.0923,
-                        "tStat": 4.4669,
-                        "pValue": 0.0000,
-                        "significance": "***"
-                    },
-                    {
-                        "variable": "EC_中部",
-                        "coefficient": 0.2876,
-                        "standardError": 0.0845,
-                        "tStat": 3.4036,
-                        "pValue": 0.0008,
-                        "significance": "***"
-                    },
-                    {
-                        "variable": "EC_西部",
-                        "coefficient": 0.1987,
-                        "standardError": 0.0912,
-                        "tStat": 2.1789,
-                        "pValue": 0.0312,
-                        "significance": "**"
-                    }
-                ],
-                "diagnosticTests": [
-                    {
-                        "testName": "Hausman检验",
-                        "result": "Chi2(2) = 15.23, p值 = 0.0005",
-                        "suggestion": "建议使用固定效应模型",
-                        "status": "success"
-                    },
-                    {
-                        "testName": "异方差检验",
-                        "result": "Chi2(1) = 8.45, p值 = 0.0037",
-                        "suggestion": "存在异方差问题，建议使用稳健标准误",
-                        "status": "warning"
-                    },
-                    {
-                        "testName": "序列相关检验",
-                        "result": "F(1, 299) = 1.23, p值 = 0.2678",
-                        "suggestion": "不存在序列相关问题",
-                        "status": "success"
-                    }
-                ],
-                "robustnessTests": [
-                    {
-                        "testName": "替换核心解释变量",
-                        "description": "使用替代指标进行回归",
-                        "result": "系数符号和显著性保持一致",
-                        "conclusion": "结果具有稳健性"
-                    },
-                    {
-                        "testName": "剔除异常值",
-                        "description": "剔除首尾1%的极端值",
-                        "result": "主要结论保持不变",
-                        "conclusion": "结果不受异常值影响"
-                    }
-                ],
-                "selectedMethods": ["固定效应模型", "异质性分析", "稳健性检验"]
-            }
+            "status": job.status,
+            "jobId": job.job_id,
+            "data": format_section_results(
+                job_manager.get_result(job.job_id),
+                job.metadata.get('config', {})
+            )
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"获取实证分析结果时发生错误: {str(e)}")
         logger.error(f"错误堆栈: {traceback.format_exc()}")
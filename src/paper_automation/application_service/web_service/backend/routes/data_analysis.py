@@ -1,14 +1,17 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from pydantic import BaseModel
 from ...data_analysis.data_analyzer import DataAnalyzer
 from ...data_analysis.file_handler import FileHandler
+from utils.dataset_store import dataset_store
 
 router = APIRouter()
 analyzer = DataAnalyzer()
 
 class EmpiricalAnalysisRequest(BaseModel):
-    data: List[Dict[str, Any]]
+    # 优先使用上传时返回的 datasetId；data 为兼容旧调用方式的行数据
+    datasetId: Optional[str] = None
+    data: Optional[List[Dict[str, Any]]] = None
     dependentVar: str
     independentVars: List[str]
     controlVars: List[str]
@@ -90,9 +93,18 @@ async def run_empirical_analysis(request: EmpiricalAnalysisRequest) -> Dict[str,
         实证分析结果
     """
     try:
+        # 按数据集ID引用时只读取所选变量对应的列
+        if request.datasetId:
+            columns = [request.dependentVar] + request.independentVars + request.controlVars + request.groupVars
+            data = dataset_store.load(request.datasetId, columns)
+        elif request.data:
+            data = request.data
+        else:
+            raise ValueError("缺少分析数据，请提供 datasetId 或 data")
+        
         # 运行实证分析
         results = analyzer.run_empirical_analysis(
-            data=request.data,
+            data=data,
             dependent_var=request.dependentVar,
             independent_vars=request.independentVars,
             control_vars=request.controlVars,
@@ -104,6 +116,8 @@ async def run_empirical_analysis(request: EmpiricalAnalysisRequest) -> Dict[str,
             "data": results
         }
         
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
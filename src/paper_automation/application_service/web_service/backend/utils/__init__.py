@@ -0,0 +1,13 @@
+"""
+后端工具函数模块
+
+主要组件：
+- regression: 回归分析与诊断检验
+- diagnostics: 回归诊断检验（相关矩阵求逆计算VIF、复用残差的White/RESET检验）
+- grouped_ols: 分组OLS批量估计与组间系数差异检验
+- ingestion: 数据文件流式导入与增量统计
+- dataset_store: 列式数据集存储（Arrow IPC，内存映射读取）
+- result_cache: 按数据指纹与模型设定缓存回归结果
+- analysis_service: 结合结果缓存提交实证分析任务
+- job_manager: 实证分析任务执行层（进程池、任务句柄与运行指标）
+"""
@@ -0,0 +1,95 @@
+"""
+实证分析任务提交
+
+在提交到进程池之前查询结果缓存，只把缺失的部分交给工作进程计算，
+任务完成后将新算出的部分写回缓存。
+"""
+
+from typing import Any, Dict, List, Optional
+import logging
+
+from .dataset_store import dataset_store
+from .job_manager import job_manager
+from .regression import run_empirical_analysis, run_dataset_analysis, split_analysis_results
+from .result_cache import result_cache, fingerprint_records, base_cache_key, group_cache_key
+
+logger = logging.getLogger(__name__)
+
+def submit_empirical_analysis(
+    dependent_var: str,
+    independent_vars: List[str],
+    control_vars: Optional[List[str]] = None,
+    group_vars: Optional[List[str]] = None,
+    dataset_id: Optional[str] = None,
+    data: Optional[List[Dict[str, Any]]] = None,
+    metadata: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    提交实证分析任务
+
+    Args:
+        dependent_var: 因变量
+        independent_vars: 核心解释变量
+        control_vars: 控制变量
+        group_vars: 分组变量
+        dataset_id: 数据集ID，优先使用
+        data: 行数据，兼容旧的调用方式
+        metadata: 任务附加信息
+
+    Returns:
+        任务ID
+
+    Raises:
+        KeyError: 数据集不存在
+        ValueError: 未提供分析数据
+        JobQueueFullError: 任务队列已满
+    """
+    control_vars = control_vars or []
+    group_vars = group_vars or []
+
+    if dataset_id:
+        if not dataset_store.exists(dataset_id):
+            raise KeyError(f"数据集不存在: {dataset_id}")
+        info = dataset_store.get_info(dataset_id) or {}
+        fingerprint = info.get('fingerprint') or f"dataset:{dataset_id}"
+        fn, source = run_dataset_analysis, dataset_id
+    elif data:
+        fingerprint = fingerprint_records(data)
+        fn, source = run_empirical_analysis, data
+    else:
+        raise ValueError("缺少分析数据，请提供 datasetId 或 data")
+
+    base_key = base_cache_key(fingerprint, dependent_var, independent_vars, control_vars)
+    group_keys = {
+        group_var: group_cache_key(fingerprint, dependent_var, independent_vars, control_vars, group_var)
+        for group_var in group_vars
+    }
+    cached_groups = {}
+    for group_var, key in group_keys.items():
+        piece = result_cache.get(key)
+        if piece is not None:
+            cached_groups[group_var] = piece
+    cached = {'base': result_cache.get(base_key), 'groups': cached_groups}
+    logger.info(f"结果缓存: 基准回归{'命中' if cached['base'] is not None else '未命中'}, "
+                f"分组回归命中 {len(cached_groups)}/{len(group_vars)}")
+
+    def store_results(results: Dict[str, Any]) -> None:
+        base, groups = split_analysis_results(results, group_vars)
+        if cached['base'] is None:
+            result_cache.set(base_key, base)
+        for group_var, piece in groups.items():
+            if group_var not in cached_groups:
+                result_cache.set(group_keys[group_var], piece)
+
+    return job_manager.submit(
+        fn,
+        source,
+        dependent_var,
+        independent_vars,
+        control_vars,
+        group_vars,
+        cached,
+        name="empirical-analysis",
+        metadata=metadata,
+        on_success=store_results
+    )
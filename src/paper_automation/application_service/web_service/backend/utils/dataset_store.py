@@ -0,0 +1,159 @@
+"""
+服务端数据集存储
+
+上传的数据在导入时转换为 Arrow IPC 列式文件，读取时通过内存映射打开，
+分析请求只需携带数据集ID与变量选择，按需读取所需列，
+同一数据集上的多次模型设定共享操作系统页缓存和已打开的表。
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+import pandas as pd
+import pyarrow as pa
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# 数据集存放目录
+DATASET_DIR = Path(os.getenv("DATASET_DIR", "data/datasets"))
+
+def _to_arrow_array(series: pd.Series, arrow_type: pa.DataType) -> pa.Array:
+    """按目标类型转换一列，保证各数据块的类型一致"""
+    if pa.types.is_string(arrow_type):
+        values = series.astype(str).where(series.notna(), None)
+        return pa.Array.from_pandas(values, type=arrow_type)
+    if pa.types.is_floating(arrow_type):
+        return pa.Array.from_pandas(pd.to_numeric(series, errors='coerce').astype('float64'), type=arrow_type)
+    return pa.Array.from_pandas(series, type=arrow_type)
+
+class DatasetStore:
+    """以数据集ID为键的列式数据集注册表"""
+
+    DATA_FILE = 'data.arrow'
+    INFO_FILE = 'info.json'
+
+    def __init__(self, root: Path = DATASET_DIR, cache_size: int = 8):
+        """
+        初始化数据集存储
+
+        Args:
+            root: 数据集根目录
+            cache_size: 保持打开的内存映射表数量
+        """
+        self.root = Path(root)
+        self.cache_size = cache_size
+        self._tables: "OrderedDict[str, pa.Table]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    def get_dir(self, dataset_id: str) -> Path:
+        """数据集目录，数据集ID只允许十六进制字符以防止路径穿越"""
+        if not dataset_id or not all(c in '0123456789abcdef' for c in dataset_id):
+            raise ValueError(f"无效的数据集ID: {dataset_id}")
+        return self.root / dataset_id
+
+    def exists(self, dataset_id: str) -> bool:
+        try:
+            return (self.get_dir(dataset_id) / self.DATA_FILE).exists()
+        except ValueError:
+            return False
+
+    def save_info(self, dataset_id: str, info: Dict[str, Any]) -> None:
+        path = self.get_dir(dataset_id) / self.INFO_FILE
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(info, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+
+    def get_info(self, dataset_id: str) -> Optional[Dict[str, Any]]:
+        path = self.get_dir(dataset_id) / self.INFO_FILE
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def list_datasets(self) -> List[Dict[str, Any]]:
+        if not self.root.exists():
+            return []
+        datasets = []
+        for entry in self.root.iterdir():
+            info = self.get_info(entry.name) if entry.is_dir() else None
+            if info is not None:
+                datasets.append(info)
+        return datasets
+
+    def write(self, dataset_id: str, chunks: Iterable[pd.DataFrame], schema: pa.Schema) -> int:
+        """
+        将数据块写入 Arrow IPC 文件
+
+        Args:
+            dataset_id: 数据集ID
+            chunks: 数据块迭代器
+            schema: 各列的目标类型
+
+        Returns:
+            写入的行数
+        """
+        target = self.get_dir(dataset_id) / self.DATA_FILE
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_suffix('.tmp')
+        rows = 0
+        with pa.OSFile(str(tmp_path), 'wb') as sink:
+            with pa.ipc.new_file(sink, schema) as writer:
+                for chunk in chunks:
+                    arrays = [_to_arrow_array(chunk[field.name], field.type) for field in schema]
+                    writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                    rows += len(chunk)
+        os.replace(tmp_path, target)
+        self._evict(dataset_id)
+        logger.info(f"数据集已写入: {target} ({rows} 行)")
+        return rows
+
+    def open_table(self, dataset_id: str) -> pa.Table:
+        """以内存映射方式打开数据集，已打开的表按LRU缓存"""
+        with self._lock:
+            if dataset_id in self._tables:
+                self._tables.move_to_end(dataset_id)
+                return self._tables[dataset_id]
+
+        path = self.get_dir(dataset_id) / self.DATA_FILE
+        if not path.exists():
+            raise KeyError(f"数据集不存在: {dataset_id}")
+        table = pa.ipc.open_file(pa.memory_map(str(path), 'r')).read_all()
+
+        with self._lock:
+            self._tables[dataset_id] = table
+            while len(self._tables) > self.cache_size:
+                self._tables.popitem(last=False)
+        return table
+
+    def load(self, dataset_id: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """读取数据集，可只读取指定列（数据集中不存在的列会被忽略，由调用方校验）"""
+        table = self.open_table(dataset_id)
+        if columns is not None:
+            table = table.select([col for col in dict.fromkeys(columns) if col in table.column_names])
+        return table.to_pandas()
+
+    def delete(self, dataset_id: str) -> bool:
+        directory = self.get_dir(dataset_id)
+        self._evict(dataset_id)
+        if not directory.exists():
+            return False
+        shutil.rmtree(directory)
+        return True
+
+    def _evict(self, dataset_id: str) -> None:
+        with self._lock:
+            self._tables.pop(dataset_id, None)
+
+# 全局数据集存储
+dataset_store = DatasetStore()
@@ -0,0 +1,166 @@
+"""
+回归诊断检验
+
+VIF 由解释变量相关系数矩阵的一次求逆得到，不再逐列拟合辅助回归；
+White 检验与 RESET 检验直接复用已拟合模型的残差、拟合值和设计矩阵。
+解释变量较多时自动切换为精简模式，用 Breusch-Pagan 检验代替辅助回归规模为 O(k²) 的 White 检验。
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import pandas as pd
+import numpy as np
+from statsmodels.stats.diagnostic import het_white
+from statsmodels.stats.stattools import jarque_bera
+from statsmodels.stats.outliers_influence import variance_inflation_factor
+from statsmodels.stats.diagnostic import linear_reset
+import scipy.stats as stats
+import logging
+import os
+import traceback
+
+logger = logging.getLogger(__name__)
+
+# 解释变量（不含常数项）超过该数量时使用精简模式
+LITE_MAX_REGRESSORS = int(os.getenv("DIAGNOSTICS_LITE_THRESHOLD", "20"))
+
+def compute_vif(X: pd.DataFrame) -> pd.Series:
+    """
+    计算各解释变量的方差膨胀因子
+
+    含常数项时 VIF_j 等于解释变量相关系数矩阵逆矩阵的第 j 个对角元，
+    与逐列回归得到的 1 / (1 - R²_j) 相同。相关系数矩阵奇异或存在常数列时退回逐列计算。
+    """
+    columns = [col for col in X.columns if col != 'const']
+    if 'const' in X.columns and columns:
+        values = X[columns].to_numpy(dtype=float)
+        if np.all(values.std(axis=0) > 0):
+            corr = np.atleast_2d(np.corrcoef(values, rowvar=False))
+            try:
+                return pd.Series(np.diag(np.linalg.inv(corr)), index=columns)
+            except np.linalg.LinAlgError:
+                pass
+
+    exog = X.to_numpy(dtype=float)
+    return pd.Series(
+        [variance_inflation_factor(exog, X.columns.get_loc(col)) for col in columns],
+        index=columns
+    )
+
+def _auxiliary_lm_test(target: np.ndarray, exog: np.ndarray) -> Tuple[float, float]:
+    """辅助回归 LM 检验：nR²，自由度为辅助回归的秩减一"""
+    coef, _, rank, _ = np.linalg.lstsq(exog, target, rcond=None)
+    ssr = float(((target - exog @ coef) ** 2).sum())
+    centered_tss = float(((target - target.mean()) ** 2).sum())
+    lm = len(target) * (1 - ssr / centered_tss)
+    return lm, float(stats.chi2.sf(lm, rank - 1))
+
+def white_test(resid: np.ndarray, exog: np.ndarray) -> Tuple[float, float]:
+    """White 异方差检验（设计矩阵需包含常数项）"""
+    i0, i1 = np.triu_indices(exog.shape[1])
+    return _auxiliary_lm_test(resid ** 2, exog[:, i0] * exog[:, i1])
+
+def breusch_pagan_test(resid: np.ndarray, exog: np.ndarray) -> Tuple[float, float]:
+    """Breusch-Pagan 异方差检验（Koenker 学生化形式，设计矩阵需包含常数项）"""
+    return _auxiliary_lm_test(resid ** 2, exog)
+
+def reset_test(model, exog: np.ndarray, power: int = 3) -> Tuple[float, float]:
+    """
+    Ramsey RESET 检验（拟合值的 2..power 次幂，Wald 卡方统计量）
+
+    利用 Frisch-Waugh 定理，只需将新增的幂次项对原设计矩阵做正交化，
+    不必重新拟合扩展回归。拟合值先标准化，张成的空间不变，数值更稳定。
+    """
+    fitted = np.asarray(model.fittedvalues, dtype=float)
+    resid = np.asarray(model.resid, dtype=float)
+    z = (fitted - fitted.mean()) / fitted.std()
+    extra = np.column_stack([z ** p for p in range(2, power + 1)])
+
+    Q, _ = np.linalg.qr(exog)
+    extra_resid = extra - Q @ (Q.T @ extra)
+    g = extra_resid.T @ resid
+    ssr_drop = float(g @ np.linalg.solve(extra_resid.T @ extra_resid, g))
+    df_resid = len(resid) - exog.shape[1] - extra.shape[1]
+    statistic = ssr_drop / ((float(model.ssr) - ssr_drop) / df_resid)
+    return statistic, float(stats.chi2.sf(statistic, extra.shape[1]))
+
+def run_regression_diagnostics(model, X, lite: Optional[bool] = None) -> List[Dict[str, Any]]:
+    """
+    运行回归诊断检验
+
+    Args:
+        model: 已拟合的 OLS 结果
+        X: 设计矩阵（DataFrame）
+        lite: 是否使用精简模式；为 None 时解释变量超过 LITE_MAX_REGRESSORS 个自动启用
+    """
+    try:
+        if lite is None:
+            lite = X.shape[1] - 1 > LITE_MAX_REGRESSORS
+        exog = X.to_numpy(dtype=float)
+        resid = np.asarray(model.resid, dtype=float)
+        # 快速路径依赖常数项和满秩设计矩阵，否则使用 statsmodels 的原始实现
+        fast = 'const' in X.columns and int(model.model.rank) == X.shape[1]
+
+        # 异方差检验
+        if lite:
+            het_name = 'Breusch-Pagan异方差检验'
+            het_stat, het_pvalue = breusch_pagan_test(resid, exog)
+        elif fast:
+            het_name = 'White异方差检验'
+            het_stat, het_pvalue = white_test(resid, exog)
+        else:
+            het_name = 'White异方差检验'
+            het_stat, het_pvalue = het_white(model.resid, X)[:2]
+
+        # Jarque-Bera正态性检验
+        jb_test = jarque_bera(model.resid)
+
+        # VIF多重共线性检验
+        vif = compute_vif(X)
+
+        # Ramsey RESET检验
+        if fast:
+            reset_stat, reset_pvalue = reset_test(model, exog)
+        else:
+            reset_result = linear_reset(model)
+            reset_stat, reset_pvalue = reset_result.statistic, reset_result.pvalue
+
+        diagnostics = [
+            {
+                'test': het_name,
+                'statistic': float(het_stat),
+                'pValue': float(het_pvalue),
+                'conclusion': '存在异方差性' if het_pvalue < 0.05 else '不存在异方差性'
+            },
+            {
+                'test': 'Jarque-Bera正态性检验',
+                'statistic': float(jb_test[0]),
+                'pValue': float(jb_test[1]),
+                'conclusion': '残差不服从正态分布' if jb_test[1] < 0.05 else '残差服从正态分布'
+            },
+            {
+                'test': 'Ramsey RESET检验',
+                'statistic': float(reset_stat),
+                'pValue': float(reset_pvalue),
+                'conclusion': '模型设定存在问题' if reset_pvalue < 0.05 else '模型设定合理'
+            }
+        ]
+
+        # 添加VIF检验结果（常数项已跳过）
+        diagnostics.extend({
+            'test': f'VIF检验 ({variable})',
+            'statistic': float(value),
+            'pValue': None,
+            'conclusion': '存在严重多重共线性' if value > 10 else '多重共线性在可接受范围'
+        } for variable, value in vif.items())
+
+        return diagnostics
+    except Exception as e:
+        logger.error(f"运行诊断检验时发生错误: {str(e)}")
+        logger.error(f"错误堆栈: {traceback.format_exc()}")
+        # 返回一个基本的诊断结果
+        return [{
+            'test': '诊断检验',
+            'statistic': None,
+            'pValue': None,
+            'conclusion': f'运行诊断检验时发生错误: {str(e)}'
+        }]
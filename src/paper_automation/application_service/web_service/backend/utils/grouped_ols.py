@@ -0,0 +1,184 @@
+"""
+分组OLS估计引擎
+
+一次分组排序后用 np.add.reduceat 计算各组的 X'X、X'y，再对所有组做批量求解，
+替代逐组筛选 DataFrame 并调用 statsmodels OLS 的做法；组间系数差异检验同样向量化计算。
+"""
+
+from typing import List, Dict, Any, Tuple
+import pandas as pd
+import numpy as np
+import scipy.stats as stats
+import logging
+
+logger = logging.getLogger(__name__)
+
+def fit_grouped_ols(X: np.ndarray, y: np.ndarray, codes: np.ndarray, n_groups: int) -> Dict[str, np.ndarray]:
+    """
+    对所有组同时拟合OLS
+
+    Args:
+        X: 设计矩阵 (n, k)，需已包含常数项
+        y: 因变量 (n,)
+        codes: 每个样本所属组的编号，取值 0..n_groups-1，负数表示不参与任何组
+        n_groups: 组数
+
+    Returns:
+        各组估计结果数组：nobs (G,)、params/bse/tvalues/pvalues (G, k)、
+        rsquared/rsquared_adj/fvalue/f_pvalue/df_resid (G,)
+    """
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+    k = X.shape[1]
+
+    valid = codes >= 0
+    order = np.argsort(codes[valid], kind="stable")
+    Xs = X[valid][order]
+    ys = y[valid][order]
+    codes_sorted = codes[valid][order]
+
+    nobs = np.bincount(codes_sorted, minlength=n_groups)
+    present = np.flatnonzero(nobs)
+    starts = np.concatenate(([0], np.cumsum(nobs)[:-1]))[present]
+
+    def group_sum(values: np.ndarray) -> np.ndarray:
+        # 样本已按组排序，每组是连续的一段
+        out = np.zeros((n_groups,) + values.shape[1:])
+        if present.size:
+            out[present] = np.add.reduceat(values, starts, axis=0)
+        return out
+
+    # 各组的 X'X、X'y 及 y 的和
+    XtX = np.zeros((n_groups, k, k))
+    for j in range(k):
+        XtX[:, :, j] = group_sum(Xs * Xs[:, [j]])
+    Xty = group_sum(Xs * ys[:, None])
+    y_sum = group_sum(ys)
+
+    # 与 statsmodels 默认的 pinv 方法保持一致，允许奇异的组设计矩阵
+    XtX_inv = np.linalg.pinv(XtX)
+    params = np.einsum("gij,gj->gi", XtX_inv, Xty)
+    rank = np.linalg.matrix_rank(XtX)
+
+    resid = ys - np.einsum("ij,ij->i", Xs, params[codes_sorted])
+    ssr = group_sum(resid ** 2)
+    y_sq = group_sum(ys ** 2)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df_resid = (nobs - rank).astype(float)
+        df_model = (rank - 1).astype(float)
+        sigma2 = ssr / df_resid
+        bse = np.sqrt(sigma2[:, None] * np.diagonal(XtX_inv, axis1=1, axis2=2))
+        tvalues = params / bse
+        pvalues = 2 * stats.t.sf(np.abs(tvalues), df_resid[:, None])
+
+        centered_tss = y_sq - y_sum ** 2 / nobs
+        ess = centered_tss - ssr
+        rsquared = 1 - ssr / centered_tss
+        rsquared_adj = 1 - (nobs - 1) / df_resid * (1 - rsquared)
+        fvalue = (ess / df_model) / sigma2
+        f_pvalue = stats.f.sf(fvalue, df_model, df_resid)
+
+    return {
+        "nobs": nobs,
+        "params": params,
+        "bse": bse,
+        "tvalues": tvalues,
+        "pvalues": pvalues,
+        "rsquared": rsquared,
+        "rsquared_adj": rsquared_adj,
+        "fvalue": fvalue,
+        "f_pvalue": f_pvalue,
+        "df_resid": df_resid
+    }
+
+def grouped_regression(
+    df: pd.DataFrame,
+    dependent_var: str,
+    x_vars: List[str],
+    group_var: str
+) -> Tuple[List[Dict[str, Any]], np.ndarray, np.ndarray]:
+    """
+    按分组变量对所有组一次性拟合回归
+
+    样本量不超过参数个数的组会被跳过，与逐组回归时的规则一致。
+
+    Returns:
+        (与 get_regression_results 格式相同的各组结果列表, 系数矩阵 (G, k), 标准误矩阵 (G, k))
+    """
+    variables = ['const'] + list(x_vars)
+    X = np.column_stack([np.ones(len(df)), df[x_vars].to_numpy(dtype=float)])
+    y = df[dependent_var].to_numpy(dtype=float)
+    codes, uniques = pd.factorize(df[group_var], sort=False)
+
+    fit = fit_grouped_ols(X, y, codes, len(uniques))
+    keep = np.flatnonzero(fit["nobs"] > len(variables))
+    skipped = [uniques[g] for g in range(len(uniques)) if fit["nobs"][g] <= len(variables)]
+    logger.info(f"分组变量 {group_var} 共 {len(uniques)} 组，完成回归 {len(keep)} 组")
+    if skipped:
+        logger.warning(f"分组变量 {group_var} 中以下组样本量不足，跳过回归: {skipped}")
+
+    results = []
+    for g in keep:
+        results.append({
+            'group': f'{group_var}={uniques[g]}',
+            'groupVar': group_var,
+            'coefficients': [{
+                'variable': var,
+                'estimate': float(fit["params"][g, i]),
+                'stdError': float(fit["bse"][g, i]),
+                'tValue': float(fit["tvalues"][g, i]),
+                'pValue': float(fit["pvalues"][g, i])
+            } for i, var in enumerate(variables)],
+            'modelStats': {
+                'rSquared': float(fit["rsquared"][g]),
+                'adjRSquared': float(fit["rsquared_adj"][g]),
+                'fStatistic': float(fit["fvalue"][g]),
+                'fPvalue': float(fit["f_pvalue"][g]),
+                'observations': int(fit["nobs"][g])
+            }
+        })
+    return results, fit["params"][keep], fit["bse"][keep]
+
+def compute_group_differences(
+    labels: List[str],
+    variables: List[str],
+    params: np.ndarray,
+    bse: np.ndarray,
+    df_resid: float
+) -> List[Dict[str, Any]]:
+    """
+    计算所有组两两之间的系数差异显著性（常数项除外）
+
+    Args:
+        labels: 组标签 (G,)
+        variables: 系数名称 (k,)
+        params: 系数矩阵 (G, k)
+        bse: 标准误矩阵 (G, k)
+        df_resid: t 检验使用的自由度（基准回归的残差自由度）
+    """
+    if len(labels) < 2:
+        return []
+
+    columns = np.array([i for i, var in enumerate(variables) if var != 'const'])
+    first, second = np.triu_indices(len(labels), k=1)
+    diff = np.abs(params[first][:, columns] - params[second][:, columns])
+    pooled_se = np.sqrt(bse[first][:, columns] ** 2 + bse[second][:, columns] ** 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_stat = np.where(pooled_se != 0, diff / pooled_se, 0.0)
+    p_value = 2 * stats.t.sf(np.abs(t_stat), df=df_resid)
+
+    names = [variables[i] for i in columns]
+    return [
+        {
+            'group1': labels[first[p]],
+            'group2': labels[second[p]],
+            'variable': names[c],
+            'difference': float(diff[p, c]),
+            'tStatistic': float(t_stat[p, c]),
+            'pValue': float(p_value[p, c]),
+            'isSignificant': bool(p_value[p, c] < 0.05)
+        }
+        for p in range(len(first))
+        for c in range(len(names))
+    ]
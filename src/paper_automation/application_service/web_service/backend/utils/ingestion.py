@@ -0,0 +1,261 @@
+"""
+数据文件流式导入
+
+上传文件按块写入磁盘，再分块解析并增量计算各列统计量，随后转换为列式数据集，
+只返回有限行数的数据预览和数据集ID，后续分析接口通过数据集ID引用数据。
+"""
+
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import hashlib
+import logging
+
+from .dataset_store import dataset_store
+
+logger = logging.getLogger(__name__)
+
+# 上传文件写入磁盘的块大小（字节）
+SPOOL_CHUNK_SIZE = 1024 * 1024
+# 解析CSV时每块的行数
+PARSE_CHUNK_ROWS = 100_000
+# 返回的预览行数
+PREVIEW_ROWS = 20
+# 每列最多统计的类别数
+MAX_CATEGORIES = 1000
+# 中位数估计使用的样本量
+MEDIAN_SAMPLE_SIZE = 10_000
+
+SUPPORTED_EXTENSIONS = ('.csv', '.xls', '.xlsx')
+
+class ColumnStatistics:
+    """单列增量统计：数值列使用合并矩（Chan 算法），类别列使用计数器"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.is_numeric = True
+        self.count = 0
+        self.missing = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.categories: Optional[Counter] = Counter()
+        self.categories_truncated = False
+        # 各数据块的 dtype 类别（i/u/f/b/O 等），用于确定列式存储的统一类型
+        self.dtype_kinds = set()
+        # 为每个数值赋予随机键并保留键最小的样本，用于估计中位数
+        self._sample_keys = np.empty(0)
+        self._sample_values = np.empty(0)
+        self._rng = np.random.default_rng()
+
+    def update(self, series: pd.Series) -> None:
+        """用一块数据更新统计量"""
+        self.missing += int(series.isna().sum())
+        self.dtype_kinds.add(series.dtype.kind)
+        values = series.dropna()
+        if values.empty:
+            return
+
+        if self.is_numeric and not pd.api.types.is_numeric_dtype(values):
+            self.is_numeric = False
+        if self.is_numeric:
+            self._update_moments(values.to_numpy(dtype=float))
+
+        if self.categories is None and not self.is_numeric:
+            # 数值列在后续块中出现非数值，之前块的类别计数已经丢弃
+            self.categories = Counter()
+            self.categories_truncated = True
+        if self.categories is not None:
+            counts = values.value_counts()
+            self.categories.update(dict(zip(counts.index.tolist(), counts.values.tolist())))
+            if len(self.categories) > MAX_CATEGORIES:
+                if self.is_numeric:
+                    # 连续数值列不再统计类别
+                    self.categories = None
+                else:
+                    # 类别过多时只保留出现次数最多的类别
+                    self.categories = Counter(dict(self.categories.most_common(MAX_CATEGORIES)))
+                    self.categories_truncated = True
+
+    def _update_moments(self, values: np.ndarray) -> None:
+        n_b = len(values)
+        mean_b = float(values.mean())
+        m2_b = float(((values - mean_b) ** 2).sum())
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta ** 2 * self.count * n_b / n
+        self.count = n
+
+        chunk_min, chunk_max = float(values.min()), float(values.max())
+        self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+        self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+
+        keys = np.concatenate([self._sample_keys, self._rng.random(n_b)])
+        samples = np.concatenate([self._sample_values, values])
+        if len(keys) > MEDIAN_SAMPLE_SIZE:
+            keep = np.argpartition(keys, MEDIAN_SAMPLE_SIZE)[:MEDIAN_SAMPLE_SIZE]
+            keys, samples = keys[keep], samples[keep]
+        self._sample_keys, self._sample_values = keys, samples
+
+    @property
+    def arrow_type(self) -> pa.DataType:
+        """与整表读取时 pandas 推断结果一致的存储类型"""
+        kinds = self.dtype_kinds
+        if kinds == {'b'} and not self.missing:
+            return pa.bool_()
+        if kinds <= {'i', 'u'} and not self.missing:
+            return pa.int64()
+        if kinds <= {'i', 'u', 'f'} or (self.is_numeric and not self.count):
+            return pa.float64()
+        return pa.string()
+
+    @property
+    def std(self) -> Optional[float]:
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else None
+
+    def to_variable_info(self) -> Dict[str, Any]:
+        """转换为上传接口返回的变量信息"""
+        if self.is_numeric and self.count:
+            return {
+                'name': self.name,
+                'type': 'numeric',
+                'stats': {
+                    'mean': self.mean,
+                    'median': float(np.median(self._sample_values)),
+                    'std': self.std,
+                    'min': self.min,
+                    'max': self.max,
+                    'missing': self.missing,
+                    'medianApproximate': self.count > MEDIAN_SAMPLE_SIZE
+                }
+            }
+
+        most_common = (self.categories or Counter()).most_common()
+        return {
+            'name': self.name,
+            'type': 'categorical',
+            'stats': {
+                'categories': [category for category, _ in most_common],
+                'frequencies': [int(frequency) for _, frequency in most_common],
+                'missing': self.missing,
+                'truncated': self.categories_truncated
+            }
+        }
+
+def detect_data_type(df):
+    """检测数据类型（截面数据、面板数据或时间序列数据）"""
+    try:
+        # 检查是否有时间相关的列
+        time_columns = df.select_dtypes(include=['datetime64']).columns
+        date_like_columns = [col for col in df.columns if any(x in col.lower() for x in ['year', 'month', 'date', 'time', 'period'])]
+        
+        # 检查是否有ID相关的列
+        id_like_columns = [col for col in df.columns if any(x in col.lower() for x in ['id', 'code', 'number', 'no'])]
+        
+        # 如果有时间列和ID列，可能是面板数据
+        if (len(time_columns) > 0 or len(date_like_columns) > 0) and len(id_like_columns) > 0:
+            return {
+                'type': 'panel',
+                'confidence': 0.9
+            }
+        # 如果只有时间列，可能是时间序列数据
+        elif len(time_columns) > 0 or len(date_like_columns) > 0:
+            return {
+                'type': 'time',
+                'confidence': 0.8
+            }
+        # 如果只有ID列或者都没有，可能是截面数据
+        else:
+            return {
+                'type': 'cross',
+                'confidence': 0.7
+            }
+    except Exception as e:
+        logger.error(f"检测数据类型时发生错误: {str(e)}")
+        return {
+            'type': 'cross',
+            'confidence': 0.5
+        }
+
+async def spool_upload(file, dataset_id: str) -> Tuple[Path, str]:
+    """将上传文件按块写入数据集目录，返回落盘后的文件路径及文件内容的 SHA-256 指纹"""
+    filename = file.filename or ''
+    suffix = Path(filename).suffix.lower()
+    if suffix not in SUPPORTED_EXTENSIONS:
+        raise ValueError("不支持的文件格式")
+
+    target_dir = dataset_store.get_dir(dataset_id)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    target = target_dir / f"source{suffix}"
+    size = 0
+    digest = hashlib.sha256()
+    with open(target, 'wb') as f:
+        while True:
+            chunk = await file.read(SPOOL_CHUNK_SIZE)
+            if not chunk:
+                break
+            f.write(chunk)
+            digest.update(chunk)
+            size += len(chunk)
+    logger.info(f"上传文件已写入磁盘: {target} ({size} 字节)")
+    return target, digest.hexdigest()
+
+def iter_file_chunks(path: Path, chunk_rows: int = PARSE_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """分块读取数据文件；Excel 文件无法分块解析，整体作为一块返回"""
+    if path.suffix.lower() == '.csv':
+        yield from pd.read_csv(path, chunksize=chunk_rows, encoding='utf-8')
+    else:
+        yield pd.read_excel(path)
+
+def _json_rows(df: pd.DataFrame) -> List[List[Any]]:
+    return df.astype(object).where(df.notna(), None).values.tolist()
+
+def ingest_file(path: Path, dataset_id: str) -> Dict[str, Any]:
+    """
+    分块解析已落盘的数据文件，增量计算统计量并转换为列式数据集
+
+    第一遍扫描确定各列的统一类型和统计量，第二遍按块写入 Arrow IPC 文件，
+    转换完成后删除原始文件。
+
+    Args:
+        path: 数据文件路径
+        dataset_id: 数据集ID
+
+    Returns:
+        变量统计、有限行数的预览、总行数与检测到的数据类型
+    """
+    path = Path(path)
+    columns: Dict[str, ColumnStatistics] = {}
+    head: Optional[pd.DataFrame] = None
+    total_rows = 0
+
+    for chunk in iter_file_chunks(path):
+        if head is None:
+            head = chunk.head(PREVIEW_ROWS)
+            columns = {col: ColumnStatistics(col) for col in chunk.columns}
+        for col, column_stats in columns.items():
+            column_stats.update(chunk[col])
+        total_rows += len(chunk)
+
+    if head is None:
+        raise ValueError("数据为空")
+
+    schema = pa.schema([(col, column_stats.arrow_type) for col, column_stats in columns.items()])
+    dataset_store.write(dataset_id, iter_file_chunks(path), schema)
+    path.unlink()
+
+    result = {
+        'variables': [column_stats.to_variable_info() for column_stats in columns.values()],
+        'columns': list(columns.keys()),
+        'previewRows': _json_rows(head),
+        'preview': head.to_string(),
+        'totalRows': total_rows,
+        'detectedDataType': detect_data_type(head)
+    }
+    logger.info(f"数据文件解析完成: {path} ({total_rows} 行, {len(columns)} 列)")
+    return result
@@ -0,0 +1,269 @@
+"""
+实证分析任务执行层
+
+将回归拟合等CPU密集型计算提交到有界进程池执行，避免阻塞 uvicorn 事件循环。
+每个任务提交后立即获得任务ID，调用方可以轮询任务状态或异步等待结果，
+同时记录队列深度与单任务耗时等指标，用于评估进程池规模。
+"""
+
+from concurrent.futures import ProcessPoolExecutor, Future
+from dataclasses import dataclass, field
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+class JobQueueFullError(RuntimeError):
+    """等待中的任务数量达到上限"""
+
+@dataclass
+class AnalysisJob:
+    """分析任务记录"""
+    job_id: str
+    name: str
+    future: Future
+    submitted_at: float
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    status: str = "queued"  # queued, running, completed, failed
+    error: Optional[str] = None
+
+    @property
+    def queue_time(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        return max(self.started_at - self.submitted_at, 0.0)
+
+    @property
+    def run_time(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return max(self.finished_at - self.started_at, 0.0)
+
+    @property
+    def wall_time(self) -> Optional[float]:
+        if self.finished_at is None:
+            return None
+        return max(self.finished_at - self.submitted_at, 0.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "jobId": self.job_id,
+            "name": self.name,
+            "status": self.status,
+            "metadata": self.metadata,
+            "submittedAt": self.submitted_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+            "queueTime": self.queue_time,
+            "runTime": self.run_time,
+            "wallTime": self.wall_time,
+            "error": self.error
+        }
+
+def _timed_call(fn: Callable, args: Tuple, kwargs: Dict[str, Any]) -> Tuple[Any, float, float]:
+    """在工作进程中执行任务并记录实际开始/结束时间"""
+    started_at = time.time()
+    result = fn(*args, **kwargs)
+    return result, started_at, time.time()
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+class AnalysisJobManager:
+    """基于有界进程池的分析任务管理器"""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_pending: int = 32,
+        history_size: int = 500
+    ):
+        """
+        初始化任务管理器
+
+        Args:
+            max_workers: 进程池大小，默认为CPU核数
+            max_pending: 允许同时存在的未完成任务上限，超过后拒绝提交
+            history_size: 保留的已完成任务及耗时样本数量
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.history_size = history_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: "OrderedDict[str, AnalysisJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._wall_times: Deque[float] = deque(maxlen=history_size)
+        self._run_times: Deque[float] = deque(maxlen=history_size)
+        self._queue_times: Deque[float] = deque(maxlen=history_size)
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # 进程池延迟创建，避免在模块导入时启动工作进程
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _pending_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if not job.future.done())
+
+    def submit(self, fn: Callable, *args, name: str = "analysis",
+               metadata: Optional[Dict[str, Any]] = None,
+               on_success: Optional[Callable[[Any], None]] = None, **kwargs) -> str:
+        """
+        提交任务到进程池，立即返回任务ID
+
+        Args:
+            fn: 可被工作进程导入的模块级函数
+            name: 任务名称
+            metadata: 任务附加信息（如 writingId、sectionId）
+            on_success: 任务成功后在主进程中以结果调用的回调（如写入结果缓存）
+
+        Returns:
+            任务ID
+        """
+        with self._lock:
+            if self._pending_count() >= self.max_pending:
+                self._counters["rejected"] += 1
+                raise JobQueueFullError(f"分析任务队列已满（上限 {self.max_pending}），请稍后重试")
+
+            job_id = uuid.uuid4().hex
+            future = self._get_executor().submit(_timed_call, fn, args, kwargs)
+            job = AnalysisJob(
+                job_id=job_id,
+                name=name,
+                future=future,
+                submitted_at=time.time(),
+                metadata=metadata or {}
+            )
+            self._jobs[job_id] = job
+            self._counters["submitted"] += 1
+            self._evict_finished()
+
+        future.add_done_callback(lambda f, job_id=job_id: self._on_done(job_id, f, on_success))
+        logger.info(f"提交分析任务: job_id={job_id}, name={name}")
+        return job_id
+
+    def _on_done(self, job_id: str, future: Future,
+                 on_success: Optional[Callable[[Any], None]] = None) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            if future.cancelled():
+                job.status = "failed"
+                job.error = "任务已取消"
+                job.finished_at = time.time()
+            elif future.exception() is not None:
+                job.status = "failed"
+                job.error = str(future.exception())
+                job.finished_at = time.time()
+            else:
+                _, job.started_at, job.finished_at = future.result()
+                job.status = "completed"
+
+            self._counters["completed" if job.status == "completed" else "failed"] += 1
+            self._wall_times.append(job.wall_time)
+            if job.run_time is not None:
+                self._run_times.append(job.run_time)
+                self._queue_times.append(job.queue_time)
+
+        if job.status == "failed":
+            logger.error(f"分析任务失败: job_id={job_id}, error={job.error}")
+            return
+        logger.info(f"分析任务完成: job_id={job_id}, 耗时={job.wall_time:.3f}s")
+        if on_success is not None:
+            try:
+                on_success(future.result()[0])
+            except Exception as e:
+                logger.error(f"分析任务回调失败: job_id={job_id}, error={str(e)}")
+
+    def _evict_finished(self) -> None:
+        """仅保留最近 history_size 个已完成任务"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.future.done()]
+        for job_id in finished[:max(len(finished) - self.history_size, 0)]:
+            del self._jobs[job_id]
+
+    def get_job(self, job_id: str) -> Optional[AnalysisJob]:
+        """获取任务记录，并刷新运行状态"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status == "queued" and job.future.running():
+                job.status = "running"
+            return job
+
+    def get_result(self, job_id: str) -> Any:
+        """获取已完成任务的结果，任务失败时抛出原始异常"""
+        job = self.get_job(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        result, _, _ = job.future.result(timeout=0)
+        return result
+
+    async def wait(self, job_id: str) -> Any:
+        """在不阻塞事件循环的情况下等待任务完成并返回结果"""
+        job = self.get_job(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        result, _, _ = await asyncio.wrap_future(job.future)
+        return result
+
+    async def run(self, fn: Callable, *args, name: str = "analysis",
+                  metadata: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
+        """提交任务并异步等待结果"""
+        job_id = self.submit(fn, *args, name=name, metadata=metadata, **kwargs)
+        return await self.wait(job_id)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """返回队列深度与耗时统计"""
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.future.running())
+            pending = self._pending_count()
+            wall_times = list(self._wall_times)
+            run_times = list(self._run_times)
+            queue_times = list(self._queue_times)
+            counters = dict(self._counters)
+
+        def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+            return {
+                "count": len(values),
+                "mean": sum(values) / len(values) if values else None,
+                "p50": _percentile(values, 0.5),
+                "p95": _percentile(values, 0.95),
+                "max": max(values) if values else None
+            }
+
+        return {
+            "maxWorkers": self.max_workers,
+            "maxPending": self.max_pending,
+            "queueDepth": pending - running,
+            "running": running,
+            "pending": pending,
+            "counters": counters,
+            "wallTime": summarize(wall_times),
+            "runTime": summarize(run_times),
+            "queueTime": summarize(queue_times)
+        }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+
+# 全局任务管理器，进程池大小与队列上限可通过环境变量配置
+job_manager = AnalysisJobManager(
+    max_workers=int(os.getenv("EMPIRICAL_MAX_WORKERS", "0")) or None,
+    max_pending=int(os.getenv("EMPIRICAL_MAX_PENDING_JOBS", "32"))
+)
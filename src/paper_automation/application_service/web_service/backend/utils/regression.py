@@ -0,0 +1,213 @@
+"""
+回归分析与诊断检验
+
+该模块不依赖 FastAPI 应用实例，可以被进程池中的工作进程直接导入执行。
+"""
+
+from typing import List, Dict, Optional, Any, Tuple, Union
+import pandas as pd
+import numpy as np
+from statsmodels.regression.linear_model import OLS
+import statsmodels.api as sm
+import logging
+
+from .diagnostics import run_regression_diagnostics
+from .grouped_ols import grouped_regression, compute_group_differences
+from .dataset_store import dataset_store
+
+logger = logging.getLogger(__name__)
+
+def get_regression_results(model, group_name="全样本"):
+    """获取回归结果"""
+    return {
+        'group': group_name,
+        'coefficients': [{
+            'variable': var,
+            'estimate': float(model.params[var]),
+            'stdError': float(model.bse[var]),
+            'tValue': float(model.tvalues[var]),
+            'pValue': float(model.pvalues[var])
+        } for var in model.model.exog_names],
+        'modelStats': {
+            'rSquared': float(model.rsquared),
+            'adjRSquared': float(model.rsquared_adj),
+            'fStatistic': float(model.fvalue),
+            'fPvalue': float(model.f_pvalue),
+            'observations': int(model.nobs)
+        }
+    }
+
+def prepare_analysis_data(
+    data: Union[pd.DataFrame, List[Dict[str, Any]]],
+    dependent_var: str,
+    independent_vars: List[str],
+    control_vars: Optional[List[str]] = None,
+    group_vars: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """校验变量并将回归变量转换为数值，移除无法转换的样本"""
+    control_vars = control_vars or []
+    group_vars = group_vars or []
+    
+    # 将数据转换为DataFrame
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    logger.info(f"数据形状: {df.shape}")
+    
+    # 数据验证
+    if df.empty:
+        raise ValueError("数据为空")
+        
+    # 检查变量是否存在于数据中
+    missing_vars = [
+        var for var in [dependent_var] + independent_vars + control_vars + group_vars
+        if var not in df.columns
+    ]
+    if missing_vars:
+        raise ValueError(f"以下变量在数据中不存在: {', '.join(missing_vars)}")
+    
+    # 检查数据类型并尝试转换为数值
+    numeric_vars = [dependent_var] + independent_vars + control_vars
+    for var in numeric_vars:
+        try:
+            # 直接使用 pd.to_numeric，不进行字符串处理
+            df[var] = pd.to_numeric(df[var], errors='coerce')
+            # 检查是否有任何 NaN 值
+            nan_count = df[var].isna().sum()
+            if nan_count > 0:
+                logger.warning(f"变量 {var} 有 {nan_count} 个值无法转换为数值，这些值将被移除")
+                df = df.dropna(subset=[var])
+            if df.empty:
+                raise ValueError(f"转换 {var} 为数值后没有剩余有效数据")
+            logger.info(f"变量 {var} 的数值范围: 最小值={df[var].min()}, 最大值={df[var].max()}")
+        except Exception as e:
+            logger.error(f"转换变量 {var} 时发生错误: {str(e)}")
+            raise ValueError(f"变量 {var} 无法转换为数值类型: {str(e)}")
+    
+    logger.info(f"数据清理后的形状: {df.shape}")
+    return df
+
+def fit_base_model(df: pd.DataFrame, dependent_var: str, x_vars: List[str]) -> Dict[str, Any]:
+    """运行基准回归与诊断检验"""
+    y = df[dependent_var]
+    X = sm.add_constant(df[x_vars])
+    
+    logger.info(f"因变量形状: {y.shape}")
+    logger.info(f"自变量形状: {X.shape}")
+    
+    # 运行基准回归
+    base_model = OLS(y, X).fit()
+    base_results = get_regression_results(base_model)
+    # 组间差异检验使用基准回归的残差自由度
+    base_results['modelStats']['dfResid'] = float(base_model.df_resid)
+    logger.info("基准回归完成")
+    
+    # 运行诊断检验
+    diagnostics = run_regression_diagnostics(base_model, X)
+    logger.info("诊断检验完成")
+    
+    return {
+        'baseResults': base_results,
+        'diagnostics': diagnostics
+    }
+
+def combine_analysis_results(base: Dict[str, Any], group_pieces: List[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    合并基准回归与各分组变量的回归结果，并计算组间差异显著性
+    
+    Args:
+        base: fit_base_model 的结果
+        group_pieces: 按分组变量顺序排列的分组回归结果列表
+    """
+    group_results = [result for piece in group_pieces for result in piece]
+    
+    # 计算组间差异显著性（如果有分组结果）
+    group_differences = []
+    if len(group_results) > 1:
+        logger.info("开始计算组间差异")
+        group_differences = compute_group_differences(
+            [result['group'] for result in group_results],
+            [coef['variable'] for coef in group_results[0]['coefficients']],
+            np.array([[coef['estimate'] for coef in result['coefficients']] for result in group_results]),
+            np.array([[coef['stdError'] for coef in result['coefficients']] for result in group_results]),
+            base['baseResults']['modelStats']['dfResid']
+        )
+        logger.info("组间差异计算完成")
+    
+    return {
+        'baseResults': base['baseResults'],
+        'groupResults': group_results,
+        'groupDifferences': group_differences,
+        'diagnostics': base['diagnostics']
+    }
+
+def split_analysis_results(results: Dict[str, Any], group_vars: List[str]) -> Tuple[Dict[str, Any], Dict[str, List[Dict[str, Any]]]]:
+    """将完整分析结果拆分为基准回归部分与各分组变量的部分，便于分别缓存"""
+    base = {
+        'baseResults': results['baseResults'],
+        'diagnostics': results['diagnostics']
+    }
+    groups = {group_var: [] for group_var in group_vars}
+    for result in results['groupResults']:
+        groups[result['groupVar']].append(result)
+    return base, groups
+
+def run_empirical_analysis(
+    data: Optional[Union[pd.DataFrame, List[Dict[str, Any]]]],
+    dependent_var: str,
+    independent_vars: List[str],
+    control_vars: Optional[List[str]] = None,
+    group_vars: Optional[List[str]] = None,
+    cached: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    运行完整的实证分析：基准回归、诊断检验、分组回归及组间差异检验
+    
+    Args:
+        data: 样本数据（DataFrame或行字典列表）；所有部分均已缓存时可以为 None
+        dependent_var: 因变量
+        independent_vars: 核心解释变量
+        control_vars: 控制变量
+        group_vars: 分组变量（异质性分析）
+        cached: 已缓存的部分结果 {'base': 基准回归结果, 'groups': {分组变量: 分组回归结果}}，
+            只计算缺失的部分
+        
+    Returns:
+        包含 baseResults、groupResults、groupDifferences、diagnostics 的结果字典
+    """
+    control_vars = control_vars or []
+    group_vars = group_vars or []
+    cached = cached or {}
+    base = cached.get('base')
+    group_pieces = dict(cached.get('groups') or {})
+    missing_groups = [group_var for group_var in group_vars if group_var not in group_pieces]
+    
+    if base is None or missing_groups:
+        df = prepare_analysis_data(data, dependent_var, independent_vars, control_vars, missing_groups)
+        X_vars = independent_vars + control_vars
+        if base is None:
+            base = fit_base_model(df, dependent_var, X_vars)
+        # 进行分组回归（异质性分析），每个分组变量的所有组一次性批量求解
+        for group_var in missing_groups:
+            group_pieces[group_var], _, _ = grouped_regression(df, dependent_var, X_vars, group_var)
+    else:
+        logger.info("所有结果均已缓存，跳过回归拟合")
+    
+    return combine_analysis_results(base, [group_pieces[group_var] for group_var in group_vars])
+
+def run_dataset_analysis(
+    dataset_id: str,
+    dependent_var: str,
+    independent_vars: List[str],
+    control_vars: Optional[List[str]] = None,
+    group_vars: Optional[List[str]] = None,
+    cached: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """按数据集ID读取所需变量并运行实证分析，供工作进程直接调用；所有部分均已缓存时不读取数据"""
+    control_vars = control_vars or []
+    group_vars = group_vars or []
+    cached = cached or {}
+    missing_groups = [group_var for group_var in group_vars if group_var not in (cached.get('groups') or {})]
+    df = None
+    if cached.get('base') is None or missing_groups:
+        columns = list(dict.fromkeys([dependent_var] + independent_vars + control_vars + missing_groups))
+        df = dataset_store.load(dataset_id, columns)
+    return run_empirical_analysis(df, dependent_var, independent_vars, control_vars, group_vars, cached)
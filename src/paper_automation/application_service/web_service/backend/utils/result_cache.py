@@ -0,0 +1,128 @@
+"""
+回归结果缓存
+
+以数据内容指纹和模型设定为键缓存基准回归（含诊断检验）与各分组变量的回归结果。
+内存层为LRU，可选的磁盘层在进程重启后仍然有效。分组变量不影响基准回归的样本，
+因此只修改分组变量的请求可以复用基准回归，各分组变量的结果也分别复用。
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+def fingerprint_records(records: List[Dict[str, Any]]) -> str:
+    """计算行数据的内容指纹"""
+    payload = json.dumps(records, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def base_cache_key(fingerprint: str, dependent_var: str, independent_vars: List[str],
+                   control_vars: List[str]) -> str:
+    """基准回归与诊断检验的缓存键"""
+    spec = ['base', fingerprint, dependent_var, list(independent_vars), list(control_vars)]
+    return hashlib.sha256(json.dumps(spec, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def group_cache_key(fingerprint: str, dependent_var: str, independent_vars: List[str],
+                    control_vars: List[str], group_var: str) -> str:
+    """单个分组变量的分组回归缓存键"""
+    spec = ['group', fingerprint, dependent_var, list(independent_vars), list(control_vars), group_var]
+    return hashlib.sha256(json.dumps(spec, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+class ResultCache:
+    """内存LRU + 可选磁盘层的结果缓存"""
+
+    def __init__(self, max_entries: int = 256, cache_dir: Optional[Path] = None):
+        """
+        初始化结果缓存
+
+        Args:
+            max_entries: 内存中保留的条目数
+            cache_dir: 磁盘缓存目录，为 None 时只使用内存
+        """
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "diskHits": 0, "misses": 0, "sets": 0, "evictions": 0}
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _disk_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        """读取缓存，内存未命中时查找磁盘层并提升到内存"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return self._entries[key]
+
+        value = None
+        if self.cache_dir is not None and self._disk_path(key).exists():
+            try:
+                with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                    value = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"读取磁盘缓存失败: {key}, {str(e)}")
+
+        with self._lock:
+            if value is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["diskHits"] += 1
+            self._store(key, value)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """写入缓存"""
+        with self._lock:
+            self._counters["sets"] += 1
+            self._store(key, value)
+
+        if self.cache_dir is not None:
+            path = self._disk_path(key)
+            tmp_path = path.with_suffix('.tmp')
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(value, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"写入磁盘缓存失败: {key}, {str(e)}")
+
+    def _store(self, key: str, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """返回命中/未命中计数"""
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        lookups = counters["hits"] + counters["diskHits"] + counters["misses"]
+        return {
+            **counters,
+            "size": size,
+            "maxEntries": self.max_entries,
+            "diskEnabled": self.cache_dir is not None,
+            "hitRate": (counters["hits"] + counters["diskHits"]) / lookups if lookups else None
+        }
+
+# 全局结果缓存，设置 RESULT_CACHE_DIR 后启用磁盘层
+result_cache = ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256")),
+    cache_dir=os.getenv("RESULT_CACHE_DIR") or None
+)
@@ -44,8 +44,11 @@ interface VariableInfo {
 }
 
 interface ProcessedData {
+  datasetId?: string;
   variables: VariableInfo[];
+  // 仅包含预览行，完整数据保存在服务端数据集中
   rawData: any[][];
+  totalRows?: number;
   preprocessConfig: PreprocessConfig;
 }
 
@@ -715,7 +718,8 @@ export const DataAnalysisEditor: React.FC<DataAnalysisEditorProps> = ({
         selectedMethod,
         variables,
         preprocessConfig,
-        dataSource: currentFile?.name
+        dataSource: currentFile?.name,
+        datasetId: processedData.datasetId
       });
 
       // 更新章节内容
@@ -897,7 +901,7 @@ export const DataAnalysisEditor: React.FC<DataAnalysisEditorProps> = ({
             {selectedVariables.length > 0 && (
               <DescriptiveStats 
                 variables={selectedVariables}
-                rawDataLength={processedData.rawData.length}
+                rawDataLength={(processedData.totalRows ?? processedData.rawData.length)}
               />
             )}
 
@@ -1164,7 +1168,7 @@ export const DataAnalysisEditor: React.FC<DataAnalysisEditorProps> = ({
                                                   <Card className="stat-card" bordered={false}>
                                                     <Statistic 
                                                       title={<Text strong>样本量</Text>}
-                                                      value={processedData.rawData.length - (variable.stats?.missing || 0)}
+                                                      value={(processedData.totalRows ?? processedData.rawData.length) - (variable.stats?.missing || 0)}
                                                       valueStyle={{ color: '#fa8c16' }}
                                                     />
                                                   </Card>
@@ -1204,7 +1208,7 @@ export const DataAnalysisEditor: React.FC<DataAnalysisEditorProps> = ({
                                                   <Card className="stat-card" bordered={false}>
                                                     <Statistic 
                                                       title={<Text strong>缺失率</Text>}
-                                                      value={(variable.stats?.missing / processedData.rawData.length) * 100}
+                                                      value={(variable.stats?.missing / (processedData.totalRows ?? processedData.rawData.length)) * 100}
                                                       precision={2}
                                                       valueStyle={{ color: '#f5222d' }}
                                                       suffix="%"
@@ -1219,7 +1223,7 @@ export const DataAnalysisEditor: React.FC<DataAnalysisEditorProps> = ({
                                                 key: index,
                                                 category,
                                                 frequency: variable.stats.frequencies?.[index] || 0,
-                                                percentage: ((variable.stats.frequencies?.[index] || 0) / processedData.rawData.length * 100).toFixed(2)
+                                                percentage: ((variable.stats.frequencies?.[index] || 0) / (processedData.totalRows ?? processedData.rawData.length) * 100).toFixed(2)
                                               }))}
                                               columns={[
                                                 {
@@ -0,0 +1,20 @@
+"""测试公共配置：将 src 加入模块搜索路径
+
+agent_system 和 template_management 的包 __init__ 会导入全部子系统（论文代理、模板优化等），
+其中部分模块在当前源码树中无法导入。测试只需要其中的子模块，因此将这两个包注册为只设置了
+__path__ 的包，子模块按原路径正常导入，不执行包的 __init__。
+"""
+
+import os
+import sys
+import types
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+for package in ("paper_automation.agent_system", "paper_automation.agent_system.template_management"):
+    if package not in sys.modules:
+        module = types.ModuleType(package)
+        module.__path__ = [os.path.join(SRC_DIR, *package.split("."))]
+        sys.modules[package] = module
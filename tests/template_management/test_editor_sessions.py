@@ -0,0 +1,50 @@
+"""编辑会话恢复测试：从操作日志和快照恢复的会话应能继续撤销和重做"""
+
+import copy
+
+import pytest
+
+from paper_automation.agent_system.template_management import editor as editor_module
+from paper_automation.agent_system.template_management.editor import TemplateEditor
+
+def _template_data():
+    return {"name": "n", "structure": {"x": {}}, "elements": {}, "relations": {}}
+
+@pytest.mark.parametrize("snapshot_interval", [2, 1000])
+def test_integer_dict_keys_survive_recovery(tmp_path, monkeypatch, snapshot_interval):
+    monkeypatch.setattr(editor_module, "SNAPSHOT_INTERVAL", snapshot_interval)
+    editor = TemplateEditor(str(tmp_path))
+    session_id = editor.create_edit_session("t", _template_data())
+    initial = copy.deepcopy(editor.sessions[session_id].template_data)
+    editor.apply_edit(session_id, {"path": ["structure", "x", 0], "value": "a"})
+    editor.apply_edit(session_id, {"path": ["structure", "x", 0], "value": "b"})
+    editor.apply_edit(session_id, {"path": ["elements", 5], "value": {"k": 1}})
+    live = editor.sessions[session_id].template_data
+    # 字典中的整数键按 JSON 中的形式保存
+    assert live["structure"] == {"x": {"0": "b"}}
+    assert list(live["elements"]) == ["5"]
+    editor.close()
+
+    recovered = TemplateEditor(str(tmp_path))
+    try:
+        session = recovered.load_session(session_id)
+        assert session.template_data == live
+        for _ in range(3):
+            recovered.undo_edit(session_id)
+        assert recovered.sessions[session_id].template_data == initial
+        for _ in range(3):
+            recovered.redo_edit(session_id)
+        assert recovered.sessions[session_id].template_data == live
+    finally:
+        recovered.close()
+
+def test_unsupported_dict_keys_are_rejected(tmp_path):
+    editor = TemplateEditor(str(tmp_path))
+    try:
+        session_id = editor.create_edit_session("t", _template_data())
+        initial = copy.deepcopy(editor.sessions[session_id].template_data)
+        with pytest.raises(ValueError):
+            editor.apply_edit(session_id, {"path": ["structure", (1, 2)], "value": 1})
+        assert editor.sessions[session_id].template_data == initial
+    finally:
+        editor.close()
@@ -0,0 +1,113 @@
+"""编辑器增量验证测试：每次编辑后的增量验证结果应与对同一模板的完整验证一致"""
+
+import random
+
+import pytest
+
+from paper_automation.agent_system.template_management.base.template import Template as BaseTemplate
+from paper_automation.agent_system.template_management.editor import TemplateEditor
+from paper_automation.agent_system.template_management.generation.validator import TemplateValidator
+
+ELEMENT_IDS = [f"e{i}" for i in range(11)]
+RELATION_IDS = [f"r{i}" for i in range(12)]
+
+def _element(element_id, element_type="section"):
+    return {"element_id": element_id, "element_type": element_type, "content": {}}
+
+def _random_element(rng):
+    x = rng.random()
+    if x < 0.4:
+        return _element(rng.choice(ELEMENT_IDS), rng.choice(["section", "bad"]))
+    if x < 0.55:
+        # element_id 可能与其他元素重复
+        return _element(rng.choice(ELEMENT_IDS))
+    if x < 0.65:
+        return {"element_type": "section", "content": {}}
+    if x < 0.72:
+        return "junk"
+    if x < 0.85:
+        element = _element(rng.choice(ELEMENT_IDS))
+        element["attributes"] = rng.choice([{}, {"level": 1}, {"level": 1, "style": {"size": "x"}}])
+        return element
+    element = _element(rng.choice(ELEMENT_IDS))
+    element["content"] = rng.choice([{}, "x"])
+    return element
+
+def _random_edit(editor, session_id, rng):
+    x = rng.random()
+    try:
+        if x < 0.3:
+            editor.apply_edit(session_id, {"path": ["elements", rng.choice(ELEMENT_IDS)],
+                                           "value": _random_element(rng)})
+        elif x < 0.4:
+            editor.apply_edit(session_id, {
+                "path": ["elements", rng.choice(ELEMENT_IDS), rng.choice(["element_id", "element_type"])],
+                "value": rng.choice(ELEMENT_IDS + ["section", "bad"])
+            })
+        elif x < 0.65:
+            relation_id = rng.choice(RELATION_IDS)
+            editor.apply_edit(session_id, {"path": ["relations", relation_id], "value": {
+                "relation_id": relation_id,
+                "relation_type": rng.choice(["contains", "contains", "bogus"]),
+                "source_id": rng.choice(ELEMENT_IDS),
+                "target_id": rng.choice(ELEMENT_IDS)
+            }})
+        elif x < 0.72:
+            editor.apply_edit(session_id, {"path": ["relations", rng.choice(RELATION_IDS), "target_id"],
+                                           "value": rng.choice(ELEMENT_IDS)})
+        elif x < 0.85:
+            editor.undo_edit(session_id)
+        elif x < 0.95:
+            editor.redo_edit(session_id)
+        else:
+            history = editor.sessions[session_id].history
+            if history:
+                editor.rollback_to_version(session_id, rng.randrange(len(history)))
+    except ValueError:
+        # 路径不存在、没有可撤销或重做的操作
+        pass
+
+def _full_validation(template_data):
+    template = BaseTemplate(template_id="t", name=template_data["name"], template_data=template_data)
+    return TemplateValidator().validate_template(template)
+
+@pytest.fixture
+def editor(tmp_path):
+    editor = TemplateEditor(str(tmp_path))
+    yield editor
+    editor.close()
+
+def _new_session(editor, n=8):
+    template_data = {
+        "name": "n",
+        "structure": {"chapters": []},
+        "elements": {element_id: _element(element_id) for element_id in ELEMENT_IDS[:n]},
+        "relations": {}
+    }
+    return editor.create_edit_session("t", template_data)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_validation_matches_full_validation(editor, seed):
+    rng = random.Random(seed)
+    session_id = _new_session(editor)
+    for step in range(400):
+        _random_edit(editor, session_id, rng)
+        result = editor.validate_template(session_id)
+        expected = _full_validation(editor.sessions[session_id].template_data)
+        assert result["errors"] == expected["errors"], f"seed {seed}, step {step}"
+        assert result["is_valid"] == expected["is_valid"], f"seed {seed}, step {step}"
+
+def test_elements_after_duplicate_id_are_rechecked(editor):
+    session_id = _new_session(editor, n=4)
+    assert editor.validate_template(session_id)["is_valid"]
+
+    # e1 与 e0 的 element_id 重复，验证在 e1 处结束，e3 的修改尚未检查
+    editor.apply_edit(session_id, {"path": ["elements", "e1", "element_id"], "value": "e0"})
+    editor.apply_edit(session_id, {"path": ["elements", "e3", "element_type"], "value": "bad"})
+    assert editor.validate_template(session_id)["errors"] == ["Duplicate element ID"]
+
+    # 去掉重复后，上次未检查的 e3 必须重新检查，不能沿用之前“有效”的结果
+    editor.apply_edit(session_id, {"path": ["elements", "e1", "element_id"], "value": "e1"})
+    result = editor.validate_template(session_id)
+    assert result["errors"] == ["Invalid element type"]
+    assert result["errors"] == _full_validation(editor.sessions[session_id].template_data)["errors"]
@@ -0,0 +1,159 @@
+"""模板生成任务调度测试：随机依赖图上的执行顺序、失败传播、循环检测和检查点恢复"""
+
+import random
+import threading
+
+import pytest
+
+from paper_automation.agent_system.template_management.base.template import Template
+from paper_automation.agent_system.template_management.generation.generator import TemplateGenerator, GenerationStatus
+
+def _random_dag(rng, n):
+    """随机生成无环依赖：任务只依赖编号更小的任务"""
+    dependencies = {}
+    for i in range(n):
+        candidates = list(range(i))
+        dependencies[f"t{i}"] = [f"t{j}" for j in rng.sample(candidates, min(len(candidates), rng.randrange(4)))]
+    return dependencies
+
+def _add_tasks(generator, dependencies, rng, run, failing=()):
+    failing = set(failing)
+    priorities = {}
+    # 按随机顺序添加，使添加顺序与依赖顺序无关
+    names = list(dependencies)
+    rng.shuffle(names)
+    for name in names:
+        priorities[name] = rng.randrange(3)
+        generator.add_task(name, run, name, name in failing, dependencies=dependencies[name],
+                           priority=priorities[name])
+    return priorities
+
+class _Recorder:
+    """记录任务的开始和结束顺序"""
+
+    def __init__(self):
+        self.events = []
+        self.lock = threading.Lock()
+
+    def __call__(self, name, fail):
+        with self.lock:
+            self.events.append(("start", name))
+        if fail:
+            raise RuntimeError(f"{name} failed")
+        with self.lock:
+            self.events.append(("end", name))
+        return name.upper()
+
+    @property
+    def started(self):
+        return [name for event, name in self.events if event == "start"]
+
+def _expected_order(dependencies, priorities, order):
+    """单个工作线程时的执行顺序：依赖都已完成的任务中优先级高的先执行，其次是层级低、添加早的"""
+    level = {}
+    for name in dependencies:
+        level[name] = 1 + max((level[d] for d in dependencies[name]), default=-1)
+    position = {name: index for index, name in enumerate(order)}
+    done, result = set(), []
+    while len(result) < len(order):
+        ready = [name for name in order if name not in done and all(d in done for d in dependencies[name])]
+        name = min(ready, key=lambda name: (-priorities[name], level[name], position[name]))
+        done.add(name)
+        result.append(name)
+    return result
+
+def _ancestors(dependencies, name):
+    ancestors, pending = set(), list(dependencies[name])
+    while pending:
+        dependency = pending.pop()
+        if dependency not in ancestors:
+            ancestors.add(dependency)
+            pending.extend(dependencies[dependency])
+    return ancestors
+
+def _descendants(dependencies, roots):
+    failed = set(roots)
+    changed = True
+    while changed:
+        changed = False
+        for name, deps in dependencies.items():
+            if name not in failed and failed.intersection(deps):
+                failed.add(name)
+                changed = True
+    return failed
+
+@pytest.mark.parametrize("seed", range(10))
+def test_single_worker_runs_ready_tasks_by_priority(tmp_path, seed):
+    rng = random.Random(seed)
+    dependencies = _random_dag(rng, rng.randint(1, 25))
+    generator = TemplateGenerator(checkpoint_dir=str(tmp_path), max_workers=1)
+    recorder = _Recorder()
+    priorities = _add_tasks(generator, dependencies, rng, recorder)
+    results = generator.execute_tasks()
+    assert results == {name: name.upper() for name in dependencies}
+    assert recorder.started == _expected_order(dependencies, priorities, list(generator.tasks))
+
+@pytest.mark.parametrize("seed", range(10))
+def test_failures_propagate_to_dependents(tmp_path, seed):
+    rng = random.Random(seed)
+    dependencies = _random_dag(rng, rng.randint(2, 30))
+    failing = set(rng.sample(list(dependencies), rng.randint(1, 3)))
+    generator = TemplateGenerator(checkpoint_dir=str(tmp_path), max_workers=4)
+    recorder = _Recorder()
+    _add_tasks(generator, dependencies, rng, recorder, failing)
+    results = generator.execute_tasks()
+
+    failed = _descendants(dependencies, failing)
+    assert results == {name: name.upper() for name in dependencies if name not in failed}
+    # 依赖失败的任务不执行，其余任务都在依赖完成后才开始
+    assert set(recorder.started) == {name for name in dependencies if not _ancestors(dependencies, name) & failing}
+    ended = {name: index for index, (event, name) in enumerate(recorder.events) if event == "end"}
+    for index, (event, name) in enumerate(recorder.events):
+        if event == "start":
+            assert all(ended[d] < index for d in dependencies[name])
+    for name in dependencies:
+        expected_status = GenerationStatus.FAILED if name in failed else GenerationStatus.COMPLETED
+        assert generator.steps[name].status == expected_status
+
+@pytest.mark.parametrize("seed", range(5))
+def test_cycles_are_rejected_before_running(tmp_path, seed):
+    rng = random.Random(seed)
+    dependencies = _random_dag(rng, rng.randint(2, 20))
+    # 从某个任务到它的一个祖先加一条边，形成循环
+    names = list(dependencies)
+    while True:
+        target = rng.choice(names[1:])
+        ancestors = _ancestors(dependencies, target)
+        if ancestors:
+            break
+    dependencies[rng.choice(sorted(ancestors))].append(target)
+    generator = TemplateGenerator(checkpoint_dir=str(tmp_path))
+    recorder = _Recorder()
+    _add_tasks(generator, dependencies, rng, recorder)
+    with pytest.raises(ValueError):
+        generator.execute_tasks()
+    assert recorder.events == []
+
+@pytest.mark.parametrize("seed", range(10))
+def test_resume_from_checkpoint_only_runs_unfinished_tasks(tmp_path, seed):
+    rng = random.Random(seed)
+    dependencies = _random_dag(rng, rng.randint(2, 25))
+    failing = set(rng.sample(list(dependencies), rng.randint(1, 3)))
+    generator = TemplateGenerator(checkpoint_dir=str(tmp_path), max_workers=3)
+    _add_tasks(generator, dependencies, random.Random(seed), _Recorder(), failing)
+    first = generator.execute_tasks()
+    checkpoint_id = generator.save_checkpoint(Template(template_id="t", name="n", template_data={}))
+
+    # 修复失败的任务后从检查点恢复，已完成的任务不再执行
+    resumed = TemplateGenerator(checkpoint_dir=str(tmp_path), max_workers=3)
+    recorder = _Recorder()
+    _add_tasks(resumed, dependencies, random.Random(seed), recorder)
+    results = resumed.execute_tasks(resume_from=checkpoint_id)
+    assert results == {name: name.upper() for name in dependencies}
+    assert sorted(recorder.started) == sorted(set(dependencies) - set(first))
+
+def test_resume_from_unknown_checkpoint(tmp_path):
+    generator = TemplateGenerator(checkpoint_dir=str(tmp_path))
+    generator.add_task("a", _Recorder(), "a", False)
+    with pytest.raises(ValueError):
+        generator.execute_tasks(resume_from="missing")
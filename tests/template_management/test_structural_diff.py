@@ -0,0 +1,70 @@
+"""结构化差异测试：对随机模板数据，按顺序应用差异操作应由旧数据得到新数据"""
+
+import copy
+import random
+
+import pytest
+
+from paper_automation.agent_system.template_management.object_store import ObjectStore, CHUNK_KEY, LITERAL_KEY
+from paper_automation.agent_system.template_management.structural_diff import StructuralDiff, apply_patch
+
+def _random_value(rng, depth=0):
+    x = rng.random()
+    if depth > 3 or x < 0.3:
+        return rng.choice([1, "s", None, "long" * rng.randrange(20)])
+    if x < 0.4:
+        # 与块引用、转义标记同名的键
+        return {rng.choice([CHUNK_KEY, LITERAL_KEY]): _random_value(rng, depth + 1)}
+    if x < 0.55:
+        return [{"id": rng.randrange(5), "v": _random_value(rng, depth + 1)} for _ in range(rng.randrange(5))]
+    if x < 0.75:
+        return [_random_value(rng, depth + 1) for _ in range(rng.randrange(5))]
+    return {rng.choice("ab/~c"): _random_value(rng, depth + 1) for _ in range(rng.randrange(4))}
+
+def _mutate(rng, value, depth=0):
+    if not isinstance(value, (dict, list)) or not value or rng.random() < 0.2:
+        return _random_value(rng, depth)
+    value = copy.deepcopy(value)
+    x = rng.random()
+    if isinstance(value, list):
+        index = rng.randrange(len(value))
+        if x < 0.3:
+            value.insert(rng.randrange(len(value) + 1), _random_value(rng, depth + 1))
+        elif x < 0.5:
+            del value[index]
+        elif x < 0.6:
+            value.insert(rng.randrange(len(value) + 1), value.pop(index))
+        else:
+            value[index] = _mutate(rng, value[index], depth + 1)
+    else:
+        key = rng.choice(list(value))
+        if x < 0.2:
+            value[rng.choice("abde")] = _random_value(rng, depth + 1)
+        elif x < 0.4:
+            del value[key]
+        else:
+            value[key] = _mutate(rng, value[key], depth + 1)
+    return value
+
+@pytest.mark.parametrize("seed", range(5))
+def test_patch_round_trip(tmp_path, seed):
+    rng = random.Random(seed)
+    differ = StructuralDiff(ObjectStore(str(tmp_path), chunk_min_bytes=40))
+    for step in range(300):
+        old = _random_value(rng)
+        new = old
+        for _ in range(rng.randrange(1, 4)):
+            new = _mutate(rng, new)
+        old_ref, _ = differ.store.put_tree(old)
+        new_ref, _ = differ.store.put_tree(new)
+        expected = copy.deepcopy(new)
+        # 直接比较数据和比较块存储中的数据都应得到可还原的差异
+        assert apply_patch(copy.deepcopy(old), StructuralDiff().diff(old, new)) == expected, f"seed {seed}, step {step}"
+        operations = differ.diff({CHUNK_KEY: old_ref}, {CHUNK_KEY: new_ref})
+        assert apply_patch(copy.deepcopy(old), operations) == expected, f"seed {seed}, step {step}"
+
+def test_identical_chunks_produce_no_operations(tmp_path):
+    store = ObjectStore(str(tmp_path), chunk_min_bytes=40)
+    data = {"elements": [{"id": i, "text": "x" * 50} for i in range(10)]}
+    ref, _ = store.put_tree(data)
+    assert StructuralDiff(store).diff({CHUNK_KEY: ref}, {CHUNK_KEY: ref}) == []
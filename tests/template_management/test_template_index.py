@@ -0,0 +1,101 @@
+"""模板推荐索引测试：索引检索结果应与逐个模板计算距离的暴力排序一致，重新加载后结果不变"""
+
+import math
+import os
+import random
+
+import numpy as np
+import pytest
+
+from paper_automation.agent_system.template_management.base.template import Template
+from paper_automation.agent_system.template_management.discipline import template_index
+from paper_automation.agent_system.template_management.discipline.template_index import TemplateIndex
+
+def _random_template(rng, template_id):
+    elements = {}
+    for i in range(rng.randrange(12)):
+        elements[f"e{i}"] = {"element_id": f"e{i}", "content": {},
+                             "element_type": rng.choice(["chapter", "section", "paragraph", "table", "figure"])}
+    relations = {}
+    for j in range(rng.randrange(len(elements) + 1) if len(elements) > 1 else 0):
+        source, target = rng.sample(list(elements), 2)
+        relations[f"r{j}"] = {"relation_id": f"r{j}", "relation_type": "contains",
+                              "source_id": source, "target_id": target}
+    chapters = [{"type": rng.choice(["intro", "method"]), "sections": [{"id": "s"}] * rng.randrange(2)}
+                for _ in range(rng.randrange(3))]
+    return Template(template_id=template_id, name=template_id, discipline=rng.choice(["cs", "bio"]),
+                    metadata={"paper_type": rng.choice(["empirical", "review"])},
+                    template_data={"name": template_id, "structure": {"chapters": chapters},
+                                   "elements": elements, "relations": relations})
+
+def _brute_force(index, templates, vector, discipline, paper_type, signature, exclude):
+    """对每个模板重新提取特征并计算距离"""
+    distances = {}
+    for template_id, template in templates.items():
+        features = index.featurize(template)
+        if template_id in exclude or any(value is not None and features[column] != value for column, value in
+                                         (("discipline", discipline), ("paper_type", paper_type), ("signature", signature))):
+            continue
+        difference = features["vector"].astype(np.float64) - vector.astype(np.float64)
+        distances[template_id] = math.sqrt(float(difference @ difference))
+    return distances
+
+def _assert_top_k(results, distances, top_k):
+    expected = sorted(distances.values())[:top_k]
+    assert len(results) == len(expected)
+    assert len({template_id for template_id, _ in results}) == len(results)
+    for (template_id, similarity), distance in zip(results, expected):
+        # 距离相同的模板顺序不限，只比较每个位置的距离
+        assert template_id in distances
+        assert distances[template_id] == pytest.approx(distance, abs=1e-3)
+        assert similarity == pytest.approx(1.0 / (1.0 + distance), abs=1e-3)
+
+def _random_operations(rng, index, templates, steps):
+    for step in range(steps):
+        template_id = f"t{rng.randrange(60)}"
+        if template_id in templates and rng.random() < 0.3:
+            assert index.remove(template_id)
+            del templates[template_id]
+        else:
+            templates[template_id] = _random_template(rng, template_id)
+            index.add(templates[template_id])
+
+def _random_query(rng, index, templates):
+    vector = index.featurize(_random_template(rng, "query"))["vector"]
+    discipline = rng.choice([None, "cs", "bio", "unknown"])
+    paper_type = rng.choice([None, None, "empirical", "review"])
+    signature = rng.choice([None, None, None, index.featurize(_random_template(rng, "query"))["signature"]])
+    exclude = set(rng.sample(sorted(templates), min(len(templates), rng.randrange(4))))
+    return vector, discipline, paper_type, signature, exclude
+
+@pytest.mark.parametrize("seed", range(5))
+def test_search_matches_brute_force_ranking(seed):
+    rng = random.Random(seed)
+    index = TemplateIndex()
+    templates = {}
+    for round_ in range(10):
+        _random_operations(rng, index, templates, 20)
+        assert len(index) == len(templates) and all(template_id in index for template_id in templates)
+        for _ in range(10):
+            vector, discipline, paper_type, signature, exclude = _random_query(rng, index, templates)
+            top_k = rng.randrange(1, 12)
+            results = index.search(vector, top_k, discipline, paper_type, signature, exclude)
+            distances = _brute_force(index, templates, vector, discipline, paper_type, signature, exclude)
+            _assert_top_k(results, distances, top_k)
+
+@pytest.mark.parametrize("snapshot_interval", [7, 1000])
+def test_reloaded_index_returns_the_same_results(tmp_path, monkeypatch, snapshot_interval):
+    monkeypatch.setattr(template_index, "INDEX_SNAPSHOT_INTERVAL", snapshot_interval)
+    rng = random.Random(snapshot_interval)
+    path = str(tmp_path / "index.npz")
+    index = TemplateIndex(path)
+    templates = {}
+    _random_operations(rng, index, templates, 100)
+    assert os.path.exists(path) == (snapshot_interval < 100)
+
+    reloaded = TemplateIndex(path)
+    assert len(reloaded) == len(templates) and all(template_id in reloaded for template_id in templates)
+    for _ in range(20):
+        vector, discipline, paper_type, signature, exclude = _random_query(rng, index, templates)
+        assert reloaded.search(vector, 5, discipline, paper_type, signature, exclude) == \
+            index.search(vector, 5, discipline, paper_type, signature, exclude)
@@ -0,0 +1,160 @@
+"""模板验证器测试：关系索引和增量验证的结果应与逐条扫描关系的原有验证逻辑一致"""
+
+import random
+import re
+
+import pytest
+
+from paper_automation.agent_system.template_management.base.template import Template
+from paper_automation.agent_system.template_management.generation.validator import TemplateValidator, ValidationState
+
+def _reference_validation(validator, template):
+    """原有的 validate_template：逐个检查元素和关系，循环检测时对每个节点扫描全部关系"""
+    errors = []
+    if not template.template_id or not template.name:
+        errors.append("Invalid template basic information")
+    if not isinstance(template.version, str) or not re.match(r'^\d+\.\d+(\.\d+)?$', template.version):
+        errors.append("Invalid version format")
+    if not template.elements:
+        errors.append("Missing required elements")
+
+    element_ids = set()
+    for element_id, element in template.elements.items():
+        if not element_id or not isinstance(element, dict) or not element.get("element_id"):
+            errors.append("Invalid element")
+            continue
+        if element["element_id"] in element_ids:
+            errors.append("Duplicate element ID")
+            break
+        element_ids.add(element["element_id"])
+        if "element_type" not in element:
+            errors.append("Invalid element")
+        elif element["element_type"] not in validator.valid_element_types:
+            errors.append("Invalid element type")
+        elif not isinstance(element.get("content"), dict):
+            errors.append("Invalid content format")
+        elif "attributes" in element:
+            attributes = element["attributes"]
+            if not isinstance(attributes, dict):
+                errors.append("Invalid element")
+            elif "level" not in attributes:
+                errors.append("Missing required attributes")
+            elif "style" in attributes:
+                style = attributes["style"]
+                if not isinstance(style, dict):
+                    errors.append("Invalid style format")
+                elif "size" in style:
+                    size = style["size"]
+                    if not isinstance(size, (int, float)) and not (isinstance(size, str) and size.isdigit()):
+                        errors.append("Invalid style format")
+
+    for relation_id, relation in template.relations.items():
+        if not relation_id or not isinstance(relation, dict) or not relation.get("relation_id") \
+                or "relation_type" not in relation:
+            errors.append("Invalid relation")
+        elif relation["relation_type"] not in validator.valid_relation_types:
+            errors.append("Invalid relation type")
+        elif "source_id" not in relation or "target_id" not in relation:
+            errors.append("Invalid relation")
+        elif relation["source_id"] not in template.elements or relation["target_id"] not in template.elements:
+            errors.append("Invalid element references")
+
+    def find_cycle(node, visited, path):
+        if node in path:
+            return True
+        if node in visited:
+            return False
+        visited.add(node)
+        path.add(node)
+        for relation in template.relations.values():
+            if relation["source_id"] == node and find_cycle(relation["target_id"], visited, path):
+                return True
+        path.remove(node)
+        return False
+
+    visited = set()
+    if any(element_id not in visited and find_cycle(element_id, visited, set()) for element_id in template.elements):
+        errors.append("Circular relation detected")
+
+    warnings = [] if template.description else ["Empty description"]
+    return {"is_valid": not errors, "errors": errors, "warnings": warnings}
+
+def _random_element(rng, element_id):
+    element = {"element_id": element_id, "element_type": rng.choice(["chapter", "section", "section", "bad"]),
+               "content": rng.choice([{"t": "x"}, {"t": "x"}, "x"])}
+    x = rng.random()
+    if x < 0.3:
+        element["attributes"] = {"level": 1, "style": {"size": rng.choice([12, "12", "x"])}}
+    elif x < 0.35:
+        element["attributes"] = {"style": {}}
+    elif x < 0.4:
+        element["element_id"] = f"e{rng.randrange(4)}"
+    return element
+
+def _random_relation(rng, relation_id, element_keys, acyclic):
+    source, target = rng.sample(range(len(element_keys) + 1), 2)
+    if acyclic and source > target:
+        source, target = target, source
+    keys = element_keys + ["missing"]
+    return {
+        "relation_id": relation_id if rng.random() > 0.03 else "",
+        "relation_type": rng.choice(["contains", "references", "follows", "bogus"] if rng.random() < 0.1 else ["contains"]),
+        "source_id": keys[source],
+        "target_id": keys[target]
+    }
+
+def _random_template(rng):
+    n = rng.randint(1, 25)
+    elements = {f"e{i}": _random_element(rng, f"e{i}") for i in range(n)}
+    acyclic = rng.random() < 0.6
+    relations = {f"r{j}": _random_relation(rng, f"r{j}", list(elements), acyclic) for j in range(rng.randint(0, 30))}
+    return Template(template_id="t", name="n", description=rng.choice(["", "d"]), structure={},
+                    elements=elements, relations=relations, content={}, metadata={}, template_data={},
+                    style={}, version="1.0")
+
+@pytest.fixture(scope="module")
+def validator():
+    return TemplateValidator()
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_reference_validation(validator, seed):
+    rng = random.Random(seed)
+    for case in range(100):
+        template = _random_template(rng)
+        expected = _reference_validation(validator, template)
+        state = ValidationState()
+        assert validator.validate_template(template) == expected, f"seed {seed}, case {case}"
+        assert validator.validate_template(template, state) == expected, f"seed {seed}, case {case}"
+        # 没有修改时直接复用上一次的结果
+        assert validator.validate_template(template, state) == expected, f"seed {seed}, case {case}"
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_validation_matches_reference(validator, seed):
+    rng = random.Random(seed)
+    for case in range(20):
+        template = _random_template(rng)
+        state = ValidationState()
+        validator.validate_template(template, state)
+        for step in range(20):
+            x = rng.random()
+            if x < 0.3:
+                element_id = rng.choice(list(template.elements))
+                template.elements[element_id] = _random_element(rng, element_id)
+                state.mark_dirty(element_ids=[element_id])
+            elif x < 0.45:
+                element_id = f"e{rng.randrange(30)}"
+                if element_id in template.elements and len(template.elements) > 1:
+                    del template.elements[element_id]
+                else:
+                    template.elements[element_id] = _random_element(rng, element_id)
+                state.mark_dirty(element_ids=[element_id])
+            elif x < 0.8:
+                relation_id = f"r{rng.randrange(40)}"
+                template.relations[relation_id] = _random_relation(rng, relation_id, list(template.elements), False)
+                state.mark_dirty(relation_ids=[relation_id])
+            elif template.relations:
+                relation_id = rng.choice(list(template.relations))
+                del template.relations[relation_id]
+                state.mark_dirty(relation_ids=[relation_id])
+            expected = _reference_validation(validator, template)
+            assert validator.validate_template(template, state) == expected, f"seed {seed}, case {case}, step {step}"
@@ -0,0 +1,72 @@
+"""版本控制测试：元数据更新中断后的目录恢复，以及分支和回滚对模板数据块的复用"""
+
+import pytest
+
+from paper_automation.agent_system.template_management.version_control import TemplateVersionControl
+
+def _template_data():
+    return {"name": "n", "structure": {}, "elements": {"e0": {"element_id": "e0", "element_type": "section"}}}
+
+def _fail(*args, **kwargs):
+    raise RuntimeError("interrupted")
+
+def test_metadata_update_interrupted_before_catalog_update(tmp_path):
+    version_control = TemplateVersionControl(str(tmp_path))
+    version_id = version_control.create_version("t", _template_data(), {"tags": ["draft"]})
+    version_control.catalog.upsert = _fail
+    assert not version_control.update_version_metadata(version_id, {"tags": ["final"]})
+    version_control.catalog.close()
+
+    reopened = TemplateVersionControl(str(tmp_path))
+    assert reopened.get_version_metadata(version_id)["tags"] == ["final"]
+    assert [entry["version_id"] for entry in reopened.catalog.find(any_tags=["final"])] == [version_id]
+    assert reopened.catalog.find(any_tags=["draft"]) == []
+    assert reopened.catalog.get(version_id)["updated_at"] == reopened.get_version(version_id).updated_at
+    assert reopened.catalog.pending_ids() == []
+
+def test_metadata_update_interrupted_before_manifest_write(tmp_path):
+    version_control = TemplateVersionControl(str(tmp_path))
+    version_id = version_control.create_version("t", _template_data(), {"tags": ["draft"]})
+    version_control._write_manifest = _fail
+    assert not version_control.update_version_metadata(version_id, {"tags": ["final"]})
+    version_control.catalog.close()
+
+    reopened = TemplateVersionControl(str(tmp_path))
+    assert reopened.get_version_metadata(version_id)["tags"] == ["draft"]
+    assert [entry["version_id"] for entry in reopened.catalog.find(any_tags=["draft"])] == [version_id]
+    assert reopened.catalog.pending_ids() == []
+
+def _data_ref(version_control, version_id):
+    return version_control._read_manifest(version_id)["template_data_ref"]
+
+def test_branch_and_rollback_share_the_source_chunks(tmp_path):
+    version_control = TemplateVersionControl(str(tmp_path))
+    version_id = version_control.create_version("t", _template_data())
+    # 不重新分块，也不展开源版本的数据
+    version_control.object_store.put_tree = _fail
+    version_control.object_store.get_tree = _fail
+
+    branch_id = version_control.create_branch(version_id, "dev")
+    assert version_control.rollback_version(version_id)
+    rollback_id, = [entry["version_id"] for entry in version_control.catalog.find(template_id="t")
+                    if "rollback_to" in entry["metadata"]]
+    assert {_data_ref(version_control, branch_id), _data_ref(version_control, rollback_id)} == \
+        {_data_ref(version_control, version_id)}
+    assert version_control.catalog.get(branch_id)["branch"] == "dev"
+    assert version_control.get_version_metadata(rollback_id) == {"rollback_to": version_id}
+
+def test_branch_runs_save_hooks(tmp_path):
+    version_control = TemplateVersionControl(str(tmp_path))
+    version_id = version_control.create_version("t", _template_data())
+    saved = []
+    version_control.register_post_save_hook(lambda new_id, data, metadata: saved.append((new_id, data)))
+    branch_id = version_control.create_branch(version_id, "dev")
+    assert saved == [(branch_id, _template_data())]
+    assert _data_ref(version_control, branch_id) == _data_ref(version_control, version_id)
+
+    def rename(data, metadata):
+        return dict(data, name="renamed"), metadata
+    version_control.register_pre_save_hook(rename)
+    renamed_id = version_control.create_branch(version_id, "renamed")
+    assert version_control.get_version(renamed_id).template_data["name"] == "renamed"
+    assert saved[-1] == (renamed_id, dict(_template_data(), name="renamed"))